@@ -1,14 +1,24 @@
 # ai_analyst.py
 # [V14 Revert] 의장(Chairman) 권한을 ChatGPT(GPT-4o)로 복구 + 디버깅 모드
 
+import hashlib
 import json
-import requests
 import re
+import time
 import warnings
 import os
+from concurrent.futures import ThreadPoolExecutor, wait
 import pandas as pd
 import config
 import traceback
+import clock
+from verdict_cache import VerdictCache, chart_fingerprint
+from data_feed.news_client import get_news_client
+from strategy.chart_encoder import encode_chart
+from ai_telemetry import get_ai_telemetry, CircuitOpen
+
+# 위원 -> 공급자 (서킷 브레이커 단위)
+PROVIDERS = {"Bull": "gemini", "Bear": "claude", "Chairman": "openai"}
 
 # [1] 경고 메시지 차단
 os.environ["GRPC_VERBOSITY"] = "ERROR"
@@ -21,6 +31,15 @@ from anthropic import Anthropic
 class AIAnalyst:
     def __init__(self):
         print("\n🔍 [AI Analyst] 초기화 (GPT-4o 의장 체제)...")
+        # ✅ [신규] 위원 동시 호출용 스레드 풀 (마감 시간이 지나 버려진 호출이 남아있을 수 있어 여유 있게)
+        self.pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="ai-committee")
+        self.call_timeout = config.AI_CALL_TIMEOUT
+        # ✅ [신규] 차트 판정 캐시 (같은 종목 + 같은 가격대 차트면 재호출 안 함)
+        self.verdicts = VerdictCache()
+        # ✅ [신규] 뉴스/FNG 는 공용 수집기 캐시에서 (백그라운드 갱신)
+        self.news_client = get_news_client()
+        # ✅ [신규] 호출별 토큰/지연 기록 (프롬프트 압축 효과 측정) - 공급자 브레이커는 프로세스 공용
+        self.telemetry = get_ai_telemetry()
         
         # 1. ChatGPT (의장) - ✅ 복구됨
         try:
@@ -76,30 +95,123 @@ class AIAnalyst:
             print(f"   🚨 [{source}] 파싱 에러: {e}")
             return None
 
+    def _call(self, fn, *args):
+        """스레드 풀에서 실행 -> (결과, 소요 초)"""
+        started = time.perf_counter()
+        try:
+            result = fn(*args)
+        except Exception as e:
+            print(f"   🚨 [AI] {getattr(fn, '__name__', fn)} 오류: {e}")
+            result = None
+        return result, time.perf_counter() - started
+
+    def _gather(self, calls, deadline):
+        """
+        여러 위원을 동시에 호출하고 마감 시각(perf_counter 기준)까지 기다림
+        :param calls: {단계 이름: (함수, 인자 튜플)}
+        Return: ({단계: 결과}, {단계: 소요 초 / 마감 초과면 None})
+        (마감을 넘긴 호출은 취소할 수 없으므로 결과만 버림)
+        """
+        futures = {self.pool.submit(self._call, fn, *args): stage for stage, (fn, args) in calls.items()}
+        done, _ = wait(futures, timeout=max(deadline - time.perf_counter(), 0.0))
+        results, latency = {}, {}
+        for future, stage in futures.items():
+            if future in done:
+                results[stage], latency[stage] = future.result()
+            else:
+                results[stage], latency[stage] = None, None
+        return results, latency
+
+    # -----------------------------------------------------------
+    # 📡 모델 호출 (호출마다 토큰/지연 기록, 예외는 호출한 쪽에서 처리)
+    # -----------------------------------------------------------
+    def _measure(self, role, task, model, prompt, request):
+        provider = PROVIDERS[role]
+        if not self.telemetry.allow(provider):
+            raise CircuitOpen(provider)
+        started = time.perf_counter()
+        try:
+            resp = request()
+        except Exception:
+            self.telemetry.record(role, task, provider, model, prompt, elapsed=time.perf_counter() - started, error=True)
+            raise
+        self.telemetry.record(role, task, provider, model, prompt, resp, time.perf_counter() - started)
+        return resp
+
+    def _available(self, role):
+        return self.telemetry.available(PROVIDERS[role])
+
+    def _ask_gemini(self, role, task, prompt):
+        resp = self._measure(role, task, config.MODEL_BULL.strip(), prompt,
+                             lambda: self.gemini_model.generate_content(prompt, request_options={"timeout": self.call_timeout}))
+        return resp.text
+
+    def _ask_claude(self, role, task, prompt, max_tokens):
+        model = config.MODEL_BEAR.strip()
+        msg = self._measure(role, task, model, prompt, lambda: self.claude_client.messages.create(
+            model=model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=self.call_timeout
+        ))
+        return msg.content[0].text
+
+    def _ask_chairman(self, task, prompt):
+        resp = self._measure("Chairman", task, config.MODEL_CHAIRMAN, prompt, lambda: self.openai_client.chat.completions.create(
+            model=config.MODEL_CHAIRMAN,
+            messages=[{"role": "user", "content": prompt}],
+            response_format={"type": "json_object"},
+            timeout=self.call_timeout
+        ))
+        return json.loads(resp.choices[0].message.content)
+
+    def _log_latency(self, label, latency, total):
+        parts = [f"{stage} {'⌛마감초과' if sec is None else f'{sec:.1f}s'}" for stage, sec in latency.items()]
+        print(f"      ⏱️ [{label}] {' / '.join(parts)} / 총 {total:.1f}s")
+
     # =========================================================
     # 📰 Part 1. 거시경제 분석
     # =========================================================
     def get_crypto_news(self):
         print("   📰 뉴스 수집 중...")
-        base_url = "https://cryptopanic.com/api/developer/v2/posts/"
-        params = {"auth_token": config.CRYPTOPANIC_API_KEY, "public": "true", "filter": "hot", "kind": "news"}
-        try:
-            if not config.CRYPTOPANIC_API_KEY: return "API Key missing."
-            resp = requests.get(base_url, params=params, timeout=10)
-            data = resp.json()
-            if 'results' not in data: return "News fetch failed."
-            news_list = [post['title'] for post in data['results']]
-            if not news_list: return "No news found."
-            print(f"   ✅ 뉴스 {len(news_list)}건 수집 완료")
-            return "\n".join(news_list)
-        except: return "Market data unavailable."
+        if not config.CRYPTOPANIC_API_KEY: return "API Key missing."
+        news = self.news_client.get_news()
+        if news is None: return "Market data unavailable."
+        print(f"   ✅ 뉴스 {len(news.splitlines())}건 (캐시 {self.news_client._age('news'):.0f}초 전)")
+        return news
 
     def get_fear_greed_index(self):
+        fng = self.news_client.get_fng()
+        return 50 if fng is None else fng
+
+    # -----------------------------------------------------------
+    # 💾 지난 합의 재사용 (입력이 같으면 위원회를 다시 부르지 않음)
+    # -----------------------------------------------------------
+    def _inputs_hash(self, news, fng):
+        key = "|".join([config.MODEL_BULL, config.MODEL_BEAR, config.MODEL_CHAIRMAN, str(fng), news])
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def _load_consensus(self, inputs_hash):
+        path = config.AI_CONSENSUS_FILE
+        if not path or not os.path.exists(path): return None
         try:
-            url = "https://api.alternative.me/fng/"
-            resp = requests.get(url, timeout=5).json()
-            return int(resp['data'][0]['value'])
-        except: return 50
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if saved.get("inputs_hash") != inputs_hash: return None
+            if clock.time() - saved.get("saved_at", 0) > config.AI_CONSENSUS_MAX_AGE: return None
+            return saved.get("params")
+        except: return None
+
+    def _save_consensus(self, inputs_hash, params):
+        path = config.AI_CONSENSUS_FILE
+        if not path: return
+        try:
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"inputs_hash": inputs_hash, "saved_at": clock.time(), "params": params}, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"   ⚠️ 합의 결과 저장 실패: {e}")
 
     def ask_gemini_bull_macro(self, news, fng):
         print("   🦁 [Gemini] 공격수 의견 청취 중...")
@@ -110,8 +222,7 @@ class AIAnalyst:
         Format: JSON only {{ "RSI_BUY": int, "STOP_LOSS": float, "KIMP_MAX": float }}
         """
         try:
-            resp = self.gemini_model.generate_content(prompt)
-            return self._parse_json(resp.text, "Gemini Bull")
+            return self._parse_json(self._ask_gemini("Bull", "macro", prompt), "Gemini Bull")
         except Exception as e:
             print(f"   🚨 Gemini 오류: {e}")
             return None
@@ -125,12 +236,7 @@ class AIAnalyst:
         Format: JSON only {{ "RSI_BUY": int, "STOP_LOSS": float, "KIMP_MAX": float }}
         """
         try:
-            msg = self.claude_client.messages.create(
-                model=config.MODEL_BEAR.strip(),
-                max_tokens=250,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return self._parse_json(msg.content[0].text, "Claude Bear")
+            return self._parse_json(self._ask_claude("Bear", "macro", prompt, 250), "Claude Bear")
         except Exception as e:
             print(f"   🚨 Claude 오류: {e}")
             return None
@@ -146,57 +252,105 @@ class AIAnalyst:
         """
         try:
             # ✅ OpenAI API 호출 (의장)
-            resp = self.openai_client.chat.completions.create(
-                model=config.MODEL_CHAIRMAN,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(resp.choices[0].message.content)
+            return self._ask_chairman("macro", prompt)
         except Exception as e:
             print(f"   🚨 Chairman(OpenAI) 오류: {e}")
             return None
 
+    def _macro_fallback(self, bull, bear, mode=None, cause="Deadline"):
+        """마감 초과/차단 시 대체 전략 (기본 AI_DEADLINE_FALLBACK) - PARTIAL 이면 받은 의견(수비수 우선)으로 구성"""
+        if (mode or config.AI_DEADLINE_FALLBACK) != "PARTIAL": return None
+        opinion = bear or bull
+        if not opinion: return None
+        params = {'REASON': f'{cause} fallback (' + ('Bear' if bear else 'Bull') + ' opinion)'}
+        for src, dst in (("RSI_BUY", "RSI_BUY_THRESHOLD"), ("STOP_LOSS", "STOP_LOSS_PCT"), ("KIMP_MAX", "MAX_KIMP_THRESHOLD")):
+            if src in opinion: params[dst] = opinion[src]
+        return params
+
     def get_consensus_params(self):
         print("\n🧠 [Macro] AI 위원회 소집 (GPT 의장)...")
-        news = self.get_crypto_news()
-        fng = self.get_fear_greed_index()
-        
-        bull = self.ask_gemini_bull_macro(news, fng)
-        bear = self.ask_claude_bear_macro(news, fng)
+        started = time.perf_counter()
+        deadline = started + config.AI_MACRO_DEADLINE_SEC
+
+        # 뉴스/공포탐욕지수 동시 수집
+        inputs, latency = self._gather({
+            "News": (self.get_crypto_news, ()),
+            "FNG": (self.get_fear_greed_index, ()),
+        }, deadline)
+        news = inputs["News"] or "Market data unavailable."
+        fng = inputs["FNG"] if inputs["FNG"] is not None else 50
+
+        # 뉴스/FNG 가 지난번과 같으면 저장된 합의 재사용
+        inputs_hash = self._inputs_hash(news, fng)
+        saved = self._load_consensus(inputs_hash)
+        if saved:
+            print(f"   ♻️ 입력 변화 없음 -> 지난 전략 재사용: {saved.get('REASON')}")
+            return saved
         
+        # 차단된 공급자가 있으면 축소 모드 (AI_REDUCED_MODE)
+        tripped = self._tripped()
+        members = {
+            "Bull": (self.ask_gemini_bull_macro, (news, fng)),
+            "Bear": (self.ask_claude_bear_macro, (news, fng)),
+        }
+        if tripped:
+            print(f"   🚫 차단된 위원: {', '.join(tripped)} -> 축소 모드({config.AI_REDUCED_MODE})")
+            if config.AI_REDUCED_MODE != "PARTIAL": return None
+            members = {role: call for role, call in members.items() if role not in tripped}
+
+        # 공격수/수비수 동시 호출
+        opinions, stage = self._gather(members, deadline)
+        latency.update(stage)
+        bull, bear = opinions.get("Bull"), opinions.get("Bear")
+
+        if tripped and (bull or bear):
+            # 남은 위원 의견으로 결정 (의장이 차단이면 위원 의견 그대로 사용)
+            final = None
+            if "Chairman" not in tripped:
+                final, stage = self._gather({"Chairman": (self.ask_chairman_macro, (news, fng, bull or {}, bear or {}))}, deadline)
+                latency.update(stage)
+                final = final["Chairman"]
+            self._log_latency("Macro", latency, time.perf_counter() - started)
+            return final or self._macro_fallback(bull, bear, "PARTIAL", "Reduced committee")
+
         if not bull or not bear:
             print("   ⚠️ 위원 의견 수렴 실패")
-            return None
+            self._log_latency("Macro", latency, time.perf_counter() - started)
+            return self._macro_fallback(bull, bear)
         
-        final = self.ask_chairman_macro(news, fng, bull, bear)
+        final, stage = self._gather({"Chairman": (self.ask_chairman_macro, (news, fng, bull, bear))}, deadline)
+        latency.update(stage)
+        self._log_latency("Macro", latency, time.perf_counter() - started)
+        final = final["Chairman"]
         if final:
             print(f"   ✅ 전략 수립 완료: {final.get('REASON')}")
+            self._save_consensus(inputs_hash, final)
             return final
-        return None
+        return self._macro_fallback(bull, bear)
 
     # =========================================================
     # 📈 Part 2. 차트 패턴 정밀 분석
     # =========================================================
     def _df_to_string(self, df):
-        return df[['open', 'high', 'low', 'close', 'volume']].tail(30).to_string()
+        if config.AI_CHART_FORMAT == "compact":
+            return encode_chart(df, config.AI_CHART_BARS)
+        return df[['open', 'high', 'low', 'close', 'volume']].tail(config.AI_CHART_BARS).to_string()
 
     def ask_bull_chart(self, ticker, chart_str):
         prompt = f"""Target: {ticker}\nData:\n{chart_str}\nTask: Find BULLISH patterns. Output JSON {{ "opinion": "BUY"/"WAIT", "reason": "brief" }}"""
         try:
-            resp = self.gemini_model.generate_content(prompt)
-            return self._parse_json(resp.text, "Bull Chart")
-        except: return {"opinion": "WAIT", "reason": "Error"}
+            return self._parse_json(self._ask_gemini("Bull", "chart", prompt), "Bull Chart")
+        except Exception as e:
+            print(f"   🚨 [Bull Chart] {type(e).__name__}: {e}")
+            return {"opinion": "WAIT", "reason": "Error"}
 
     def ask_bear_chart(self, ticker, chart_str):
         prompt = f"""Target: {ticker}\nData:\n{chart_str}\nTask: Find RISKS. Output JSON {{ "opinion": "BUY"/"WAIT", "reason": "brief" }}"""
         try:
-            msg = self.claude_client.messages.create(
-                model=config.MODEL_BEAR.strip(),
-                max_tokens=200,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            return self._parse_json(msg.content[0].text, "Bear Chart")
-        except: return {"opinion": "WAIT", "reason": "Error"}
+            return self._parse_json(self._ask_claude("Bear", "chart", prompt, 200), "Bear Chart")
+        except Exception as e:
+            print(f"   🚨 [Bear Chart] {type(e).__name__}: {e}")
+            return {"opinion": "WAIT", "reason": "Error"}
 
     def ask_chairman_chart(self, ticker, chart_str, bull, bear):
         prompt = f"""
@@ -208,28 +362,77 @@ class AIAnalyst:
         """
         try:
             # ✅ OpenAI API 호출 (의장)
-            resp = self.openai_client.chat.completions.create(
-                model=config.MODEL_CHAIRMAN,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            return json.loads(resp.choices[0].message.content)
-        except: return {"decision": "REJECT", "reason": "Chairman Error"}
+            return self._ask_chairman("chart", prompt)
+        except Exception as e:
+            print(f"   🚨 [Chairman Chart] {type(e).__name__}: {e}")
+            return {"decision": "REJECT", "reason": "Chairman Error"}
+
+    def _chart_fallback(self, bull_res, bear_res, stage, mode=None, cause="deadline"):
+        """마감 초과/차단 시 결정 (기본 AI_DEADLINE_FALLBACK: REJECT / APPROVE / PARTIAL=받은 의견이 모두 BUY 면 승인)"""
+        mode = mode or config.AI_DEADLINE_FALLBACK
+        if mode == "APPROVE":
+            return {"decision": "APPROVE", "reason": f"{stage} {cause} -> fallback approve"}
+        if mode == "PARTIAL":
+            ops = [r.get('opinion') for r in (bull_res, bear_res) if r]
+            if ops and all(op == "BUY" for op in ops):
+                return {"decision": "APPROVE", "reason": f"{stage} {cause} -> available opinions BUY ({len(ops)}/2)"}
+        return {"decision": "REJECT", "reason": f"{stage} {cause}"}
+
+    def _tripped(self):
+        """서킷 브레이커로 차단 중인 위원 목록"""
+        return [role for role in PROVIDERS if not self._available(role)]
 
     def verify_buy_signal_consensus(self, ticker, df_ohlcv):
+        fingerprint = chart_fingerprint(df_ohlcv)
+        cached = self.verdicts.get(ticker, fingerprint)
+        if cached is not None:
+            print(f"   ♻️ [Chartist] {ticker} 같은 차트 판정 재사용: {cached.get('decision')} (적중률 {self.verdicts.stats()['hit_rate']}%)")
+            return cached
+
         print(f"   🧠 [Chartist] {ticker} 3대 AI 긴급 회의 (GPT 의장)...")
+        started = time.perf_counter()
+        deadline = started + config.AI_CHART_DEADLINE_SEC
         chart_str = self._df_to_string(df_ohlcv)
-        
-        bull_res = self.ask_bull_chart(ticker, chart_str)
-        bear_res = self.ask_bear_chart(ticker, chart_str)
+
+        # 차단된 공급자가 있으면 축소 모드 (AI_REDUCED_MODE: PARTIAL=남은 위원만 / REJECT=매수 거부)
+        tripped = self._tripped()
+        members = {
+            "Bull": (self.ask_bull_chart, (ticker, chart_str)),
+            "Bear": (self.ask_bear_chart, (ticker, chart_str)),
+        }
+        if tripped:
+            print(f"      🚫 차단된 위원: {', '.join(tripped)} -> 축소 모드({config.AI_REDUCED_MODE})")
+            members = {role: call for role, call in members.items() if role not in tripped}
+            if config.AI_REDUCED_MODE != "PARTIAL" or len(tripped) == len(PROVIDERS):
+                return {"decision": "REJECT", "reason": f"Reduced committee ({'/'.join(tripped)} tripped)"}
+
+        # 공격수/수비수 동시 호출 (마감까지만 대기)
+        opinions, latency = self._gather(members, deadline)
+        bull_res, bear_res = opinions.get("Bull"), opinions.get("Bear")
         
         # 안전장치
         bull_op = bull_res.get('opinion', 'WAIT') if bull_res else 'WAIT'
         bear_op = bear_res.get('opinion', 'WAIT') if bear_res else 'WAIT'
         
         print(f"      🦁 Bull: {bull_op} | 🐢 Bear: {bear_op}")
-        
-        final_res = self.ask_chairman_chart(ticker, chart_str, bull_res, bear_res)
+
+        if None in latency.values():
+            final_res = self._chart_fallback(bull_res, bear_res, "Committee")
+        elif "Chairman" in tripped:
+            final_res = self._chart_fallback(bull_res, bear_res, "Chairman", "PARTIAL", "tripped")
+        else:
+            final, stage = self._gather({
+                "Chairman": (self.ask_chairman_chart, (ticker, chart_str, bull_res or {}, bear_res or {}))
+            }, deadline)
+            latency.update(stage)
+            final_res = final["Chairman"] or self._chart_fallback(bull_res, bear_res, "Chairman")
+            # 의장이 정상 위원회로 내린 거부 판정만 캐시 (APPROVE / 마감 초과 / 오류 / 축소 모드 판정은 제외)
+            # 위원 의견이 없거나 오류 대체값("Error")이면 가짜 의견 기반 판정이므로 제외
+            committee_ok = all(res and res.get('reason') != "Error" for res in (bull_res, bear_res))
+            if final["Chairman"] and final_res.get('reason') != "Chairman Error" and not tripped and committee_ok:
+                self.verdicts.put(ticker, fingerprint, final_res)
+
+        self._log_latency(ticker, latency, time.perf_counter() - started)
         return final_res
 
 if __name__ == "__main__":
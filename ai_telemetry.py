@@ -0,0 +1,204 @@
+# ai_telemetry.py
+# [NEW] AI 호출 계측 - 호출마다 입력/출력 토큰, 지연, 프롬프트 길이 기록
+# 프롬프트 형식(AI_CHART_FORMAT)별로 모아서 압축 전후 절감량 비교 / CSV 로그(AI_TELEMETRY_FILE)
+# 공급자(gemini/claude/openai)별 최근 호출 지연 분포·오류율·토큰·비용 + 서킷 브레이커 (get_ai_telemetry 로 프로세스 공용)
+#   - 최근 AI_BREAKER_WINDOW 회 중 p95 지연 또는 오류율이 기준 초과 -> 차단(open)
+#   - AI_BREAKER_COOLDOWN_SEC 후 1회 시험 호출(half-open) -> 정상이면 복구, 아니면 다시 차단
+
+import csv
+import os
+import threading
+import time
+from collections import deque
+import clock
+import config
+from data_feed.latency import _percentile
+
+FIELDS = ["time", "role", "task", "provider", "model", "format", "prompt_chars", "input_tokens", "output_tokens", "latency_ms", "error"]
+
+
+def usage_tokens(resp):
+    """SDK 응답 -> (입력 토큰, 출력 토큰) / Gemini·Claude·OpenAI 응답 모양을 모두 처리"""
+    meta = getattr(resp, "usage_metadata", None)  # Gemini
+    if meta is not None:
+        return getattr(meta, "prompt_token_count", None), getattr(meta, "candidates_token_count", None)
+    usage = getattr(resp, "usage", None)
+    if usage is None: return None, None
+    if hasattr(usage, "input_tokens"):  # Claude
+        return usage.input_tokens, usage.output_tokens
+    return getattr(usage, "prompt_tokens", None), getattr(usage, "completion_tokens", None)  # OpenAI
+
+
+# 지연 분포 구간 (ms, 마지막은 그 이상)
+HIST_EDGES = [500, 1000, 2000, 4000, 8000]
+
+
+class CircuitOpen(Exception):
+    """차단 중인 공급자 호출 (실제 요청은 보내지 않음)"""
+
+
+class ProviderHealth:
+    def __init__(self, name):
+        self.name = name
+        self.window = deque(maxlen=config.AI_BREAKER_WINDOW)  # 최근 (지연 ms, 오류 여부)
+        self.state = "closed"  # closed(정상) / open(차단) / half_open(시험 호출 중)
+        self.opened_at = 0.0
+        self.trips = 0
+        self.rejected = 0  # 차단으로 건너뛴 호출 수
+        self.calls = 0
+        self.errors = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def allow(self):
+        """호출 가능 여부 (차단 후 쿨다운이 지나면 시험 호출 1회 허용)"""
+        if self.state == "closed": return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= config.AI_BREAKER_COOLDOWN_SEC:
+            self.state = "half_open"
+            print(f"🔌 [AI Breaker] {self.name} 시험 호출")
+            return True
+        self.rejected += 1
+        return False
+
+    def p95(self):
+        return _percentile(sorted(ms for ms, _ in self.window), 95)
+
+    def error_rate(self):
+        return sum(1 for _, err in self.window if err) / len(self.window) if self.window else 0.0
+
+    def record(self, elapsed_ms, error, tokens_in, tokens_out):
+        self.calls += 1
+        if error: self.errors += 1
+        self.tokens_in += tokens_in or 0
+        self.tokens_out += tokens_out or 0
+
+        if self.state == "half_open":
+            if error or elapsed_ms > config.AI_BREAKER_P95_MS:
+                self._trip(f"시험 호출 실패 ({elapsed_ms:.0f}ms)")
+            else:
+                self.state = "closed"
+                self.window.clear()
+                print(f"✅ [AI Breaker] {self.name} 복구")
+            return
+
+        self.window.append((elapsed_ms, error))
+        if self.state != "closed" or len(self.window) < config.AI_BREAKER_MIN_CALLS: return
+        p95, err = self.p95(), self.error_rate()
+        if p95 > config.AI_BREAKER_P95_MS:
+            self._trip(f"p95 {p95:.0f}ms > {config.AI_BREAKER_P95_MS}ms")
+        elif err > config.AI_BREAKER_ERROR_RATE:
+            self._trip(f"오류율 {err * 100:.0f}% > {config.AI_BREAKER_ERROR_RATE * 100:.0f}%")
+
+    def _trip(self, reason):
+        self.state = "open"
+        self.opened_at = time.monotonic()
+        self.trips += 1
+        print(f"🚫 [AI Breaker] {self.name} 차단 {config.AI_BREAKER_COOLDOWN_SEC}초: {reason}")
+
+    def stats(self):
+        values = [ms for ms, _ in self.window]
+        hist = [0] * (len(HIST_EDGES) + 1)
+        for ms in values:
+            hist[sum(1 for edge in HIST_EDGES if ms >= edge)] += 1
+        price_in, price_out = config.AI_PRICE_PER_MTOK.get(self.name, (0.0, 0.0))
+        return {
+            "state": self.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.error_rate() * 100, 1),
+            "p95": round(self.p95(), 1) if values else None,
+            "hist": dict(zip([f"<{e}" for e in HIST_EDGES] + [f">={HIST_EDGES[-1]}"], hist)),
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "cost_usd": round((self.tokens_in * price_in + self.tokens_out * price_out) / 1e6, 4),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class AITelemetry:
+    def __init__(self, path=None):
+        self.path = config.AI_TELEMETRY_FILE if path is None else path
+        self._lock = threading.Lock()
+        self.providers = {name: ProviderHealth(name) for name in ("gemini", "claude", "openai")}
+        self.groups = {}  # {(역할, 작업, 형식): {"calls", "errors", "usage", "in", "out", "chars", "latency": deque(ms)}}
+
+    def allow(self, provider):
+        with self._lock:
+            return self.providers[provider].allow()
+
+    def available(self, provider):
+        """
+        차단 상태 조회만 (시험 호출 허용 여부는 실제 호출 시 allow 로 결정)
+        - half_open 은 다른 호출자가 시험 호출 중이므로 차단으로 봄 (allow 가 어차피 거부)
+        """
+        health = self.providers[provider]
+        if health.state == "half_open": return False
+        return health.state == "closed" or time.monotonic() - health.opened_at >= config.AI_BREAKER_COOLDOWN_SEC
+
+    def record(self, role, task, provider, model, prompt, resp=None, elapsed=0.0, error=False):
+        tokens_in, tokens_out = usage_tokens(resp) if resp is not None else (None, None)
+        fmt = config.AI_CHART_FORMAT if task == "chart" else "text"
+        with self._lock:
+            g = self.groups.get((role, task, fmt))
+            if g is None:
+                g = self.groups[(role, task, fmt)] = {
+                    "calls": 0, "errors": 0, "usage": 0, "in": 0, "out": 0, "chars": 0,
+                    "latency": deque(maxlen=config.LATENCY_SAMPLE_SIZE),
+                }
+            g["calls"] += 1
+            if error: g["errors"] += 1
+            if tokens_in is not None: g["usage"] += 1
+            g["in"] += tokens_in or 0
+            g["out"] += tokens_out or 0
+            g["chars"] += len(prompt)
+            g["latency"].append(elapsed * 1000)
+            self.providers[provider].record(elapsed * 1000, error, tokens_in, tokens_out)
+            self._write([clock.now().strftime("%Y-%m-%d %H:%M:%S"), role, task, provider, model, fmt, len(prompt),
+                         tokens_in, tokens_out, round(elapsed * 1000, 1), int(error)])
+
+    def _write(self, row):
+        if not self.path: return
+        try:
+            new = not os.path.exists(self.path)
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new: writer.writerow(FIELDS)
+                writer.writerow(row)
+        except Exception as e:
+            print(f"⚠️ [AI Telemetry] 기록 실패: {e}")
+
+    def stats(self):
+        """{"역할/작업/형식": {calls, errors, avg_in, avg_out, avg_chars, p50, p99}}"""
+        with self._lock:
+            out = {}
+            for (role, task, fmt), g in self.groups.items():
+                n, u = g["calls"], max(g["usage"], 1)  # 토큰 평균은 사용량을 돌려준 호출 기준
+                values = sorted(g["latency"])
+                out[f"{role}/{task}/{fmt}"] = {
+                    "calls": n,
+                    "errors": g["errors"],
+                    "avg_in": round(g["in"] / u, 1),
+                    "avg_out": round(g["out"] / u, 1),
+                    "avg_chars": round(g["chars"] / n, 1),
+                    "p50": round(_percentile(values, 50), 1) if values else None,
+                    "p99": round(_percentile(values, 99), 1) if values else None,
+                }
+            return out
+
+    def provider_stats(self):
+        with self._lock:
+            return {name: health.stats() for name, health in self.providers.items()}
+
+
+_telemetry = None
+_telemetry_lock = threading.Lock()
+
+
+def get_ai_telemetry():
+    """프로세스 공용 계측기 (처음 호출 시 생성) - 매매 루프/스캐너의 AIAnalyst 가 같은 브레이커 상태 공유"""
+    global _telemetry
+    with _telemetry_lock:
+        if _telemetry is None:
+            _telemetry = AITelemetry()
+        return _telemetry
@@ -0,0 +1,374 @@
+# backtest/engine.py
+# [NEW] NumPy 벡터화 백테스터 - SignalMaker 진입 규칙 + RiskManager 청산 규칙을 전 종목 동시 평가
+#
+# - 지표/진입 신호: (종목 x 캔들) 2차원 배열로 한 번에 계산
+# - 청산: 포지션 상태(트레일링 고점, 분할익절 여부, 쿨타임)가 경로 의존이므로
+#         시간축만 순회하고 종목축은 벡터 연산 (포지션이 없는 구간은 건너뜀)
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+import config
+
+FEE_RATE = 0.0005  # 업비트 수수료 (OrderManager.simulation_* 의 0.9995 와 동일)
+
+# 청산 사유 코드 -> RiskManager 메시지 머리말
+EXIT_REASONS = {
+    1: "💧 가격 손절",
+    2: "📉 VWAP 지지 붕괴",
+    3: "📉 RSI 급락",
+    4: "⏰ 시간 손절",
+    5: "🎉 트레일링 익절",
+    6: "🍰 1차 목표 달성 (BB중심선)",
+    7: "🚀 2차 목표 달성 (BB상단 터치)",
+    8: "🔥 과매수 도달",
+}
+
+
+def entry_reason(sniper, kimp, rsi_14, rsi_9):
+    """SignalMaker.check_buy_signal 과 같은 진입 사유 문자열 (스나이퍼가 우선)"""
+    if sniper:
+        return f"🔥 역프 스나이퍼 (김프:{kimp:.2f}%, RSI:{rsi_14})"
+    return f"⚡ 골든크로스+VWAP지지 (RSI9:{rsi_9}>14:{rsi_14})"
+
+# 백테스트에서 덮어쓸 수 있는 config 파라미터
+PARAM_NAMES = [
+    "RSI_BUY_THRESHOLD", "MAX_TICKS_FOR_BEP", "MAX_KIMP_THRESHOLD", "REVERSE_KIMP_THRESHOLD",
+    "RSI_REVERSE_OFFSET", "VWAP_BUY_FACTOR", "STOP_LOSS_PCT", "TRAILING_START", "TRAILING_DROP",
+    "VWAP_STOP_FACTOR", "RSI_PANIC_SELL", "TIME_CUT_SECONDS", "TIME_CUT_MIN_PROFIT",
+    "COOLDOWN_STOP_LOSS", "COOLDOWN_VWAP_BREAK", "COOLDOWN_TIME_CUT", "PARTIAL_SELL_RATIO",
+    "PARTIAL_SELL_MIN_PROFIT", "RSI_SELL_THRESHOLD",
+]
+
+
+def _param(params, name):
+    if params and name in params:
+        return params[name]
+    return getattr(config, name)
+
+
+class PriceArrays:
+    """
+    백테스트 입력 - 공통 시간축에 정렬된 (종목 x 캔들) 배열
+    없는 캔들은 NaN (volume 은 0)
+    """
+    def __init__(self, tickers, ts, open_, high, low, close, volume, bar_seconds=60):
+        self.tickers = list(tickers)
+        self.ts = np.asarray(ts, dtype=np.int64)       # epoch 초
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+        self.bar_seconds = bar_seconds
+
+    @property
+    def shape(self):
+        return self.close.shape
+
+    def slice(self, start, stop):
+        """시간축 구간 [start, stop) 만 잘라낸 뷰 (복사 없음)"""
+        return PriceArrays(
+            self.tickers, self.ts[start:stop], self.open[:, start:stop], self.high[:, start:stop],
+            self.low[:, start:stop], self.close[:, start:stop], self.volume[:, start:stop], self.bar_seconds
+        )
+
+    @classmethod
+    def from_frames(cls, frames, bar_seconds=60):
+        """
+        {ticker: pyupbit.get_ohlcv 모양 DataFrame} -> PriceArrays
+        (인덱스는 KST naive datetime, 전 종목 합집합 시간축으로 정렬)
+        """
+        tickers = list(frames.keys())
+        index = None
+        for df in frames.values():
+            index = df.index if index is None else index.union(df.index)
+        ts = (index.values.astype("datetime64[s]").astype(np.int64)) - 9 * 3600
+        cols = {}
+        for col in ("open", "high", "low", "close", "volume"):
+            cols[col] = np.vstack([frames[t][col].reindex(index).to_numpy(dtype=np.float64) for t in tickers])
+        cols["volume"] = np.nan_to_num(cols["volume"])
+        return cls(tickers, ts, cols["open"], cols["high"], cols["low"], cols["close"], cols["volume"], bar_seconds)
+
+
+# -----------------------------------------------------------
+# 📐 벡터화 지표 (TechnicalAnalyzer 와 같은 정의, 최근 window 개 캔들 기준)
+# -----------------------------------------------------------
+def _rolling_sum(x, window):
+    """축 1 기준 이동합 (앞쪽 window-1 칸은 NaN)"""
+    out = np.full(x.shape, np.nan)
+    if x.shape[1] < window: return out
+    c = np.cumsum(x, axis=1)
+    out[:, window - 1] = c[:, window - 1]
+    out[:, window:] = c[:, window:] - c[:, :-window]
+    return out
+
+
+def _rsi(close, period):
+    delta = np.diff(close, axis=1, prepend=np.nan)
+    delta = np.nan_to_num(delta)  # 첫 변화량 NaN -> 0 (pandas where 와 동일)
+    gain = _rolling_sum(np.where(delta > 0, delta, 0.0), period)
+    loss = _rolling_sum(np.where(delta < 0, -delta, 0.0), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + gain / loss)
+    return rsi
+
+
+def compute_indicators(data, window=None):
+    """
+    RSI(14), RSI(9), 볼린저밴드, VWAP 배열 계산
+    :param window: VWAP 누적 구간 (실전의 OHLCV_COUNT 개 캔들과 동일)
+    """
+    window = window or config.OHLCV_COUNT
+    close = data.close
+    n_t, n_b = close.shape
+
+    bb_mid = np.full((n_t, n_b), np.nan)
+    bb_std = np.full((n_t, n_b), np.nan)
+    p = config.BB_PERIOD
+    if n_b >= p:
+        win = sliding_window_view(close, p, axis=1)
+        bb_mid[:, p - 1:] = win.mean(axis=-1)
+        bb_std[:, p - 1:] = win.std(axis=-1, ddof=1)
+
+    tp = (data.high + data.low + close) / 3
+    pv = np.nan_to_num(tp * data.volume)
+    pv_sum = _rolling_sum(pv, window)
+    v_sum = _rolling_sum(data.volume, window)
+    # 캔들 수가 window 미만인 구간은 처음부터 누적
+    head = min(window - 1, n_b)
+    pv_sum[:, :head] = np.cumsum(pv[:, :head], axis=1)
+    v_sum[:, :head] = np.cumsum(data.volume[:, :head], axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = pv_sum / v_sum
+
+    return {
+        "RSI_14": _rsi(close, config.RSI_LONG_PERIOD),
+        "RSI_9": _rsi(close, config.RSI_SHORT_PERIOD),
+        "BB_Upper": bb_mid + bb_std * config.BB_STD_DEV,
+        "BB_Mid": bb_mid,
+        "BB_Lower": bb_mid - bb_std * config.BB_STD_DEV,
+        "VWAP": vwap,
+    }
+
+
+def _tick_size(price):
+    """TickCalculator.get_tick_size 벡터화"""
+    conds = [price >= 2000000, price >= 1000000, price >= 500000, price >= 100000,
+             price >= 10000, price >= 1000, price >= 100, price >= 10]
+    sizes = [1000, 500, 100, 50, 10, 0.5, 0.1, 0.01]
+    return np.select(conds, sizes, default=0.0001)
+
+
+def ticks_to_bep(price, fee_rate=FEE_RATE):
+    """TickCalculator.get_ticks_to_bep 벡터화"""
+    target = price * (1 + fee_rate) / (1 - fee_rate)
+    bep = np.ceil(target / _tick_size(target)) * _tick_size(target)
+    with np.errstate(invalid="ignore"):
+        return np.rint((bep - price) / _tick_size(price))
+
+
+# -----------------------------------------------------------
+# 🎯 진입 신호 (SignalMaker.check_buy_signal)
+# -----------------------------------------------------------
+def entry_signals(data, ind, params=None, kimp=None):
+    """
+    (스나이퍼, 정밀 매수) (종목 x 캔들) bool 배열 2개 리턴 (둘 다 공통 조건 포함, 겹치면 스나이퍼 우선)
+    :param kimp: 김프(%) 배열 (없으면 0 = 김프/역프 조건 비활성)
+    """
+    close = data.close
+    rsi_14 = np.round(ind["RSI_14"], 2)  # 실전도 반올림된 값으로 비교
+    rsi_9 = np.round(ind["RSI_9"], 2)
+    vwap = np.round(ind["VWAP"], 2)
+    kimp = np.zeros_like(close) if kimp is None else kimp
+
+    with np.errstate(invalid="ignore"):
+        base = (kimp <= _param(params, "MAX_KIMP_THRESHOLD")) & \
+               (ticks_to_bep(close) <= _param(params, "MAX_TICKS_FOR_BEP"))
+
+        # [3순위] 역프 스나이퍼
+        sniper = (kimp <= _param(params, "REVERSE_KIMP_THRESHOLD")) & \
+                 (rsi_14 < _param(params, "RSI_BUY_THRESHOLD") + _param(params, "RSI_REVERSE_OFFSET"))
+
+        # 정밀 매수: RSI 과매도 + BB 하단 + RSI 골든크로스 + VWAP 지지
+        precise = (rsi_14 < _param(params, "RSI_BUY_THRESHOLD")) & (close <= ind["BB_Lower"]) & \
+                  (rsi_9 > rsi_14) & (close >= vwap * _param(params, "VWAP_BUY_FACTOR"))
+
+    return base & sniper, base & precise
+
+
+# -----------------------------------------------------------
+# 🔁 시뮬레이션 (RiskManager.check_exit_signal)
+# -----------------------------------------------------------
+class BacktestResult:
+    def __init__(self, trades, rows):
+        self.trades = trades  # 왕복 1회 = 1건 (dict)
+        self.rows = rows      # trade_history.csv 와 같은 모양의 행 (BUY / SELL_HALF / SELL_ALL)
+
+    def to_frame(self):
+        return pd.DataFrame(self.trades)
+
+    def to_history_frame(self):
+        """trade_history.csv 와 같은 컬럼 (Profit_Rate 는 숫자 %)"""
+        return pd.DataFrame(self.rows, columns=[
+            "Timestamp", "Ticker", "Action", "Price", "RSI", "VWAP", "Profit_Rate", "Reason"
+        ])
+
+    def summary(self):
+        if not self.trades:
+            return {"trades": 0, "win_rate": 0.0, "total_pnl_pct": 0.0, "avg_pnl_pct": 0.0}
+        pnl = np.array([t["pnl_pct"] for t in self.trades])
+        return {
+            "trades": len(pnl),
+            "win_rate": round(float((pnl > 0).mean() * 100), 2),
+            "total_pnl_pct": round(float(pnl.sum()), 4),
+            "avg_pnl_pct": round(float(pnl.mean()), 4),
+        }
+
+
+def run_backtest(data, params=None, indicators=None, kimp=None, start=None):
+    """
+    :param params: config 파라미터 덮어쓰기 {이름: 값} (PARAM_NAMES 참고)
+    :param indicators: compute_indicators 결과 재사용 (파라미터 스윕 시)
+    :param start: 이 캔들 번호부터 진입 허용 (앞부분은 지표 워밍업)
+    """
+    ind = indicators if indicators is not None else compute_indicators(data)
+    sniper, precise = entry_signals(data, ind, params, kimp)
+    signal = sniper | precise
+    kimp = np.zeros_like(data.close) if kimp is None else kimp
+    close, ts = data.close, data.ts
+    n_t, n_b = close.shape
+    start = config.BB_PERIOD if start is None else start
+
+    stop_loss = _param(params, "STOP_LOSS_PCT")
+    trail_start = _param(params, "TRAILING_START")
+    trail_drop = _param(params, "TRAILING_DROP")
+    vwap_stop = _param(params, "VWAP_STOP_FACTOR")
+    rsi_panic = _param(params, "RSI_PANIC_SELL")
+    time_cut = _param(params, "TIME_CUT_SECONDS")
+    time_cut_min = _param(params, "TIME_CUT_MIN_PROFIT")
+    cd_stop = _param(params, "COOLDOWN_STOP_LOSS")
+    cd_vwap = _param(params, "COOLDOWN_VWAP_BREAK")
+    cd_time = _param(params, "COOLDOWN_TIME_CUT")
+    half_ratio = _param(params, "PARTIAL_SELL_RATIO")
+    half_min = _param(params, "PARTIAL_SELL_MIN_PROFIT")
+    rsi_sell = _param(params, "RSI_SELL_THRESHOLD")
+
+    rsi_14 = np.round(ind["RSI_14"], 2)
+    rsi_9 = np.round(ind["RSI_9"], 2)
+    vwap = np.round(ind["VWAP"], 2)
+    bb_mid, bb_upper = ind["BB_Mid"], ind["BB_Upper"]
+
+    in_pos = np.zeros(n_t, dtype=bool)
+    entry_idx = np.zeros(n_t, dtype=np.int64)
+    entry_px = np.zeros(n_t)
+    high_mark = np.full(n_t, -100.0)
+    half_done = np.zeros(n_t, dtype=bool)
+    half_px = np.zeros(n_t)
+    cooldown_until = np.full(n_t, np.iinfo(np.int64).min)
+
+    trades, rows = [], []
+    signal_bars = np.flatnonzero(signal[:, start:].any(axis=0)) + start
+    j = start
+    while j < n_b:
+        if not in_pos.any():
+            # 보유 종목이 없으면 다음 진입 신호 캔들로 점프
+            k = np.searchsorted(signal_bars, j)
+            if k >= len(signal_bars): break
+            j = signal_bars[k]
+
+        c = close[:, j]
+        action = np.zeros(n_t, dtype=np.int8)  # 0=HOLD, 1..8=EXIT_REASONS
+
+        if in_pos.any():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                profit = (c - entry_px) / entry_px * 100 - 0.15
+                high_mark = np.where(in_pos, np.fmax(high_mark, profit), high_mark)
+                elapsed = (j - entry_idx) * data.bar_seconds
+                r, vw = rsi_14[:, j], vwap[:, j]
+
+                rules = [
+                    (1, profit <= stop_loss),
+                    (2, (elapsed > 180) & (c < vw * vwap_stop)),
+                    (3, (elapsed > 300) & (r < rsi_panic)),
+                    (4, (elapsed > time_cut) & (profit < time_cut_min)),
+                    (5, (high_mark >= trail_start) & (high_mark - profit >= trail_drop)),
+                    (6, ~half_done & (c >= bb_mid[:, j]) & (profit > half_min)),
+                    (7, c >= bb_upper[:, j]),
+                    (8, r >= rsi_sell),
+                ]
+            for code, mask in reversed(rules):  # 앞 규칙이 우선
+                action = np.where(in_pos & mask, code, action)
+
+            for t in np.flatnonzero(action):
+                code = int(action[t])
+                raw = (c[t] - entry_px[t]) / entry_px[t] * 100
+                if code == 6:
+                    half_done[t] = True
+                    half_px[t] = c[t]
+                    rows.append(_row(ts[j], data.tickers[t], "SELL_HALF", c[t], rsi_14[t, j], vwap[t, j], raw, EXIT_REASONS[code]))
+                    continue
+
+                rows.append(_row(ts[j], data.tickers[t], "SELL_ALL", c[t], rsi_14[t, j], vwap[t, j], raw, EXIT_REASONS[code]))
+                f2 = (1 - FEE_RATE) ** 2
+                if half_done[t]:
+                    gross = half_ratio * half_px[t] + (1 - half_ratio) * c[t]
+                else:
+                    gross = c[t]
+                trades.append({
+                    "ticker": data.tickers[t],
+                    "entry_ts": int(ts[entry_idx[t]]),
+                    "exit_ts": int(ts[j]),
+                    "hold_seconds": int(ts[j] - ts[entry_idx[t]]),
+                    "entry_price": float(entry_px[t]),
+                    "exit_price": float(gross),
+                    "partial": bool(half_done[t]),
+                    "exit_reason": EXIT_REASONS[code],
+                    "pnl_pct": float((gross / entry_px[t] * f2 - 1) * 100),
+                })
+                in_pos[t] = False
+                if code in (1, 3): cooldown_until[t] = ts[j] + cd_stop
+                elif code == 2: cooldown_until[t] = ts[j] + cd_vwap
+                elif code == 4: cooldown_until[t] = ts[j] + cd_time
+
+        # 미보유 종목 진입 (이번 캔들에 청산한 종목은 다음 캔들부터)
+        enter = ~in_pos & (action == 0) & signal[:, j] & (ts[j] >= cooldown_until)
+        for t in np.flatnonzero(enter):
+            in_pos[t] = True
+            entry_idx[t] = j
+            entry_px[t] = c[t]
+            high_mark[t] = -100.0
+            half_done[t] = False
+            reason = entry_reason(sniper[t, j], float(kimp[t, j]), float(rsi_14[t, j]), float(rsi_9[t, j]))
+            rows.append(_row(ts[j], data.tickers[t], "BUY", c[t], rsi_14[t, j], vwap[t, j], None, reason))
+        j += 1
+
+    return BacktestResult(trades, rows)
+
+
+def _row(ts, ticker, action, price, rsi, vwap, profit, reason):
+    stamp = pd.Timestamp(int(ts) + 9 * 3600, unit="s").strftime("%Y-%m-%d %H:%M:%S")
+    return [stamp, ticker, action, float(price), float(rsi), float(vwap),
+            None if profit is None else round(float(profit), 2), reason]
+
+
+if __name__ == "__main__":
+    # 성능 점검: 40종목 x 30일 1분봉 랜덤워크 (python -m backtest.engine)
+    import time
+    rng = np.random.default_rng(0)
+    n_t, n_b = 40, 30 * 24 * 60
+    ret = rng.normal(0, 0.002, (n_t, n_b))
+    close = 10000 * np.exp(np.cumsum(ret, axis=1))
+    close = np.round(close / 10) * 10
+    high = close * (1 + np.abs(rng.normal(0, 0.001, (n_t, n_b))))
+    low = close * (1 - np.abs(rng.normal(0, 0.001, (n_t, n_b))))
+    vol = rng.exponential(100, (n_t, n_b))
+    ts = 1_700_000_000 + np.arange(n_b) * 60
+    data = PriceArrays([f"KRW-C{i}" for i in range(n_t)], ts, close, high, low, close, vol)
+
+    t0 = time.perf_counter()
+    ind = compute_indicators(data)
+    t1 = time.perf_counter()
+    result = run_backtest(data, indicators=ind)
+    t2 = time.perf_counter()
+    print(f"지표 {t1 - t0:.2f}s / 시뮬레이션 {t2 - t1:.2f}s -> {result.summary()}")
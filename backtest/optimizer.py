@@ -0,0 +1,196 @@
+# backtest/optimizer.py
+# [NEW] 전략 파라미터 병렬 탐색기 - 그리드/랜덤 서치 + 워크포워드 검증 (전 코어 프로세스 풀)
+#
+# 사용법: python -m backtest.optimizer --tickers KRW-BTC,KRW-XRP --days 30 [--random 200] [--out optimizer_result.csv]
+# - 가격/지표 배열은 공유 메모리(shared_memory)에 한 번만 올리고, 워커는 이름으로 붙어서 읽기만 함
+#   (작업마다 배열을 pickle 로 넘기지 않음 -> 작업 인자는 파라미터 dict 뿐)
+# - 지표(RSI/BB/VWAP)는 탐색 파라미터와 무관하므로 부모 프로세스에서 한 번만 계산
+
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import config
+from backtest.engine import PriceArrays, compute_indicators, run_backtest
+from data_feed.candle_history import CandleHistory
+
+# 공유 메모리 배열 순서 (종목 x 캔들)
+PRICE_FIELDS = ["open", "high", "low", "close", "volume"]
+IND_FIELDS = ["RSI_14", "RSI_9", "BB_Upper", "BB_Mid", "BB_Lower", "VWAP"]
+
+# 워커 프로세스 전역 (initializer 에서 설정)
+_shm = None
+_data = None
+_ind = None
+_segments = None
+
+
+# -----------------------------------------------------------
+# 🧩 탐색 공간
+# -----------------------------------------------------------
+def grid(space):
+    """{이름: [값...]} -> 모든 조합 리스트"""
+    names = list(space.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def random_grid(space, n, seed=None):
+    """{이름: [값...]} 에서 중복 없이 n개 무작위 조합"""
+    combos = grid(space)
+    if n >= len(combos): return combos
+    return random.Random(seed).sample(combos, n)
+
+
+def split_segments(n_bars, n_splits, warmup=None):
+    """
+    워크포워드 구간 -> [(start, stop), ...] (n_splits + 1 개)
+    split k 는 (학습=구간 k, 검증=구간 k+1) 로 사용
+    """
+    warmup = config.BB_PERIOD if warmup is None else warmup
+    edges = np.linspace(warmup, n_bars, n_splits + 2).astype(int)
+    return [(int(edges[i]), int(edges[i + 1])) for i in range(n_splits + 1)]
+
+
+# -----------------------------------------------------------
+# 👷 워커
+# -----------------------------------------------------------
+def _init_worker(shm_name, shape, tickers, ts, bar_seconds, segments):
+    global _shm, _data, _ind, _segments
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    block.flags.writeable = False
+    arrays = dict(zip(PRICE_FIELDS + IND_FIELDS, block))
+    _data = PriceArrays(tickers, ts, *(arrays[f] for f in PRICE_FIELDS), bar_seconds=bar_seconds)
+    _ind = {f: arrays[f] for f in IND_FIELDS}
+    _segments = segments
+
+
+def _evaluate(params):
+    """파라미터 1세트 -> 구간별 성과 리스트"""
+    out = []
+    for start, stop in _segments:
+        result = run_backtest(
+            _data.slice(start, stop), params,
+            indicators={k: v[:, start:stop] for k, v in _ind.items()}, start=0
+        )
+        out.append(result.summary())
+    return out
+
+
+# -----------------------------------------------------------
+# 🚀 탐색 실행
+# -----------------------------------------------------------
+def optimize(data, candidates, n_splits=None, workers=None, indicators=None):
+    """
+    :param candidates: 파라미터 dict 리스트 (grid / random_grid 결과)
+    :return: (랭킹 DataFrame, 워크포워드 DataFrame)
+    구간 경계에서 보유 중인 포지션은 청산 기록 없이 버림 (구간끼리 독립)
+    """
+    n_splits = n_splits or config.OPTIMIZER_SPLITS
+    workers = workers or config.OPTIMIZER_WORKERS or os.cpu_count()
+    ind = indicators if indicators is not None else compute_indicators(data)
+    segments = split_segments(data.shape[1], n_splits)
+
+    fields = [getattr(data, f) for f in PRICE_FIELDS] + [ind[f] for f in IND_FIELDS]
+    shape = (len(fields),) + data.shape
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        for i, arr in enumerate(fields):
+            block[i] = arr
+        del block
+
+        init_args = (shm.name, shape, data.tickers, data.ts, data.bar_seconds, segments)
+        chunk = max(1, len(candidates) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            results = list(pool.map(_evaluate, candidates, chunksize=chunk))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return _rank(candidates, results), _walk_forward(candidates, results)
+
+
+def _rank(candidates, results):
+    """파라미터별 학습(구간 0..n-1) / 검증(구간 1..n) 성과 표 - 학습 수익 순 (검증 수익은 참고용, 선택에 쓰지 않음)"""
+    rows = []
+    for params, segs in zip(candidates, results):
+        train, test = segs[:-1], segs[1:]
+        trades = sum(s["trades"] for s in test)
+        wins = sum(s["trades"] * s["win_rate"] / 100 for s in test)
+        rows.append({
+            **params,
+            "train_pnl": round(sum(s["total_pnl_pct"] for s in train) / len(train), 4),
+            "test_pnl": round(sum(s["total_pnl_pct"] for s in test) / len(test), 4),
+            "test_trades": trades,
+            "test_win_rate": round(wins / trades * 100, 2) if trades else 0.0,
+            "positive_splits": sum(1 for s in test if s["total_pnl_pct"] > 0),
+        })
+    df = pd.DataFrame(rows).sort_values("train_pnl", ascending=False, kind="stable")
+    return df.reset_index(drop=True)
+
+
+def _walk_forward(candidates, results):
+    """split 마다 학습 구간 최고 파라미터를 골라 다음 구간에서 검증한 결과"""
+    rows = []
+    for k in range(len(results[0]) - 1):
+        best = max(range(len(candidates)), key=lambda i: results[i][k]["total_pnl_pct"])
+        rows.append({
+            "split": k,
+            **candidates[best],
+            "train_pnl": results[best][k]["total_pnl_pct"],
+            "test_pnl": results[best][k + 1]["total_pnl_pct"],
+            "test_trades": results[best][k + 1]["trades"],
+        })
+    return pd.DataFrame(rows)
+
+
+def load_arrays(tickers, days):
+    """로컬 캔들 저장소에서 1분봉 days 일치 -> PriceArrays (빠진 캔들만 REST 조회)"""
+    history = CandleHistory()
+    for t in tickers:
+        history.update(t, "minute1")
+        history.fill_gaps(t, "minute1") # 실시간 시딩이 건너뛴 구간 (남아 있으면 앞뒤 봉이 이어진 것으로 계산됨)
+        history.backfill(t, "minute1", days * 1440)
+    return history.get_arrays(tickers, "minute1", since=time.time() - days * 86400)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="전략 파라미터 병렬 탐색 (워크포워드)")
+    parser.add_argument("--tickers", default="", help="종목 (예: KRW-BTC,KRW-XRP). 생략 시 config.TARGET_COINS")
+    parser.add_argument("--days", type=int, default=30, help="1분봉 기간 (일)")
+    parser.add_argument("--random", type=int, default=0, help="랜덤 서치 조합 수 (0=전체 그리드)")
+    parser.add_argument("--splits", type=int, default=None, help="워크포워드 split 수")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 수 (기본: 전 코어)")
+    parser.add_argument("--out", default="optimizer_result.csv", help="랭킹 결과 파일")
+    args = parser.parse_args()
+
+    tickers = [t.strip() for t in args.tickers.split(",") if t.strip()] or list(config.TARGET_COINS.keys())
+    print(f"📥 [Optimizer] {len(tickers)}개 종목 x {args.days}일 1분봉 로딩...")
+    data = load_arrays(tickers, args.days)
+    if data is None:
+        print("⚠️ [Optimizer] 캔들 데이터가 없습니다.")
+        return
+
+    space = config.OPTIMIZER_GRID
+    candidates = random_grid(space, args.random, seed=0) if args.random else grid(space)
+    print(f"🔍 [Optimizer] {len(candidates)}개 조합 탐색 (배열 {data.shape[0]}x{data.shape[1]})")
+
+    started = time.perf_counter()
+    ranked, wf = optimize(data, candidates, args.splits, args.workers)
+    print(f"⏱️ [Optimizer] 완료 {time.perf_counter() - started:.1f}초")
+
+    ranked.to_csv(args.out, index=False, encoding="utf-8-sig")
+    print(ranked.head(10).to_string())
+    print("\n🚶 [Walk-Forward]")
+    print(wf.to_string(index=False))
+    print(f"📝 랭킹 저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+# backtest/report.py
+# [NEW] 매매 기록 성과 분석 - BUY 와 SELL 을 한 거래(라운드)로 묶어서 실현 손익/승률/보유시간/MDD
+#
+# 사용법: python -m backtest.report [trade_history.db | trade_history.csv] [--amount 10000]
+# - 입력: TradeLogger DB / trade_history.csv / BacktestResult.to_history_frame() 모두 가능
+# - 라운드: 종목별로 SELL_ALL 이 나올 때까지의 BUY/SELL_HALF 묶음 (물타기 BUY 는 같은 라운드)
+# - SELL_HALF 는 남은 수량의 PARTIAL_SELL_RATIO 만큼, SELL_ALL 은 나머지 전부로 보고 손익 가중
+# - 전부 groupby/벡터 연산 (행 단위 파이썬 루프 없음)
+
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+import pandas as pd
+import config
+from backtest.engine import FEE_RATE
+
+ROUND_TRIP_FEE_PCT = FEE_RATE * 2 * 100  # 매수+매도 수수료 (%)
+
+# 입력 컬럼 (trade_history.csv / to_history_frame) -> 내부 이름
+_COLUMNS = {"Timestamp": "ts", "Ticker": "ticker", "Action": "action", "Price": "price",
+            "Profit_Rate": "profit_rate", "Reason": "reason"}
+
+
+def load_history(path=None):
+    """매매 기록 파일 -> 표준 DataFrame (ts, ticker, action, price, profit_rate, reason)"""
+    path = path or config.TRADE_DB_FILE
+    if os.path.splitext(path)[1] == ".db":
+        conn = sqlite3.connect(path)
+        try:
+            df = pd.read_sql_query(
+                "SELECT ts, ticker, action, price, profit_rate, reason FROM trades ORDER BY epoch, id", conn)
+        finally:
+            conn.close()
+        return normalize(df)
+    df = pd.read_csv(path, encoding="utf-8-sig", thousands=",", dtype={"Profit_Rate": str})
+    return normalize(df)
+
+
+def normalize(df):
+    """CSV 문자열("131,400", "-0.61%") / to_history_frame 숫자 모두 float 로"""
+    df = df.rename(columns=_COLUMNS)[list(_COLUMNS.values())].copy()
+    df["ts"] = pd.to_datetime(df["ts"])
+    df["price"] = pd.to_numeric(df["price"].astype(str).str.replace(",", ""), errors="coerce")
+    df["profit_rate"] = pd.to_numeric(df["profit_rate"].astype(str).str.rstrip("%"), errors="coerce")
+    df["reason"] = df["reason"].fillna("").astype(str)
+    df["category"] = reason_category(df["reason"]).astype("category")
+    # 반복 문자열은 범주형으로 (정렬/그룹 키를 정수 코드로 처리)
+    df["ticker"] = df["ticker"].astype("category")
+    df["action"] = df["action"].astype("category")
+    return df
+
+
+def reason_category(reasons):
+    """'⏰ 시간 손절 (181초 지체)' -> '⏰ 시간 손절' (괄호/화살표 뒤 상세값 제거)"""
+    head = np.char.partition(reasons.to_numpy(dtype=str), "(")[:, 0]
+    head = np.char.partition(head, "->")[:, 0]
+    return pd.Series(np.char.strip(head), index=reasons.index)
+
+
+def link_trades(df, amount=None, ratio=None):
+    """
+    BUY/SELL 행을 라운드로 연결
+    Return: (legs, rounds)
+      legs   - 매도 1건당 1행 (fraction=라운드 수량 중 매도 비율, pnl_pct/pnl_krw 수수료 차감)
+      rounds - 라운드 1개당 1행 (closed=SELL_ALL 로 끝났는지)
+    """
+    amount = amount or config.TRADE_AMOUNT
+    ratio = config.PARTIAL_SELL_RATIO if ratio is None else ratio
+    df = df.sort_values(["ticker", "ts"], kind="stable").reset_index(drop=True)
+    if "category" not in df:
+        df["category"] = reason_category(df["reason"])
+
+    acode, acts = pd.factorize(df["action"])
+    acts = np.asarray(acts, dtype=str)
+    action = acts[acode]
+    is_buy = np.char.startswith(acts, "BUY")[acode]
+    is_all = (acts == "SELL_ALL")[acode]
+    is_half = (acts == "SELL_HALF")[acode]
+    price = df["price"].to_numpy(dtype="float64")
+
+    tcode, tickers = pd.factorize(df["ticker"])
+    tickers = np.asarray(tickers, dtype=object)
+    ccode, cats = pd.factorize(df["category"])
+    category = np.asarray(cats, dtype=object)[ccode]
+    ts = df["ts"].to_numpy()
+
+    # 정렬 후 라운드는 연속 구간: 종목이 바뀌거나 직전 행이 SELL_ALL 이면 새 라운드
+    n = len(df)
+    new_ticker = np.r_[True, tcode[1:] != tcode[:-1]] if n else np.zeros(0, bool)
+    new_round = new_ticker | np.r_[False, is_all[:-1]] if n else new_ticker
+    key = np.cumsum(new_round) - 1  # 라운드 번호 (전체)
+    n_keys = int(key[-1]) + 1 if n else 0
+    rnd = key - np.maximum.accumulate(np.where(new_ticker, key, 0)) if n else key  # 종목 내 라운드 번호
+
+    # 진입: 매번 같은 금액 매수 -> 평단 = 조화평균
+    buys = np.bincount(key, weights=is_buy, minlength=n_keys)
+    inv = np.bincount(key, weights=np.where(is_buy, 1.0 / price, 0.0), minlength=n_keys)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        entry_by_key = buys / inv
+    entry_px = entry_by_key[key]
+
+    # 매도 비중: k 번째 SELL_HALF = r(1-r)^(k-1), SELL_ALL = (1-r)^(앞선 SELL_HALF 수)
+    cum_half = np.cumsum(is_half)
+    halves = cum_half - np.maximum.accumulate(np.where(new_round, cum_half - is_half, 0)) if n else cum_half
+    fraction = np.where(is_half, ratio * (1 - ratio) ** (halves - 1), (1 - ratio) ** halves)
+    logged = df["profit_rate"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gross = np.where(np.isnan(logged), (price / entry_px - 1) * 100, logged)
+
+    sells = (is_all | is_half) & (buys[key] > 0)  # 매수 기록 없는 매도(기록 잘림)는 제외
+    pnl_pct = gross - ROUND_TRIP_FEE_PCT
+    pnl_krw = fraction * buys[key] * amount * pnl_pct / 100
+    legs = pd.DataFrame({
+        "ts": ts[sells], "ticker": tickers[tcode[sells]], "round": rnd[sells],
+        "action": action[sells], "exit_reason": category[sells], "price": price[sells],
+        "entry_price": entry_px[sells], "fraction": fraction[sells], "gross_pct": gross[sells],
+        "pnl_pct": pnl_pct[sells], "pnl_krw": pnl_krw[sells],
+    })
+
+    # 라운드: 첫 매수 행 / 마지막 SELL_ALL 행 (키별 첫 등장 위치)
+    buy_idx = np.flatnonzero(is_buy)
+    first = buy_idx[np.unique(key[buy_idx], return_index=True)[1]]
+    all_idx = np.flatnonzero(is_all)
+    exit_at = np.full(n_keys, -1)
+    exit_at[key[all_idx]] = all_idx
+    exit_row = exit_at[key[first]]
+    closed = exit_row >= 0
+
+    rounds = pd.DataFrame({
+        "ticker": tickers[tcode[first]],
+        "round": rnd[first],
+        "entry_ts": ts[first],
+        "entry_reason": category[first],
+        "buys": buys[key[first]].astype(int),
+        "entry_price": entry_by_key[key[first]],
+        "pnl_krw": np.bincount(key[sells], weights=pnl_krw[sells], minlength=n_keys)[key[first]],
+        "exit_ts": np.where(closed, ts[exit_row], np.datetime64("NaT")),
+        "exit_reason": np.where(closed, category[exit_row], None),
+        "closed": closed,
+    })
+    rounds["pnl_pct"] = rounds["pnl_krw"] / (rounds["buys"] * amount) * 100
+    rounds["hold_sec"] = (rounds["exit_ts"] - rounds["entry_ts"]).dt.total_seconds()
+    return legs, rounds
+
+
+def max_drawdown(pnl):
+    """누적 손익 곡선의 최대 낙폭 (양수, 같은 단위)"""
+    if len(pnl) == 0: return 0.0
+    equity = np.concatenate([[0.0], np.cumsum(pnl)])
+    return float((np.maximum.accumulate(equity) - equity).max())
+
+
+def _breakdown(frame, key, pnl_col="pnl_krw"):
+    g = frame.groupby(key)[pnl_col]
+    out = pd.DataFrame({
+        "count": g.size(),
+        "pnl_krw": g.sum().round(0),
+        "avg_pnl_pct": frame.groupby(key)["pnl_pct"].mean().round(3),
+        "win_rate": ((frame[pnl_col] > 0).groupby(frame[key]).mean() * 100).round(1),
+    })
+    return out.sort_values("pnl_krw")
+
+
+def performance_report(df, amount=None):
+    """
+    Return: {"summary": dict, "by_ticker", "by_exit", "by_entry", "rounds", "legs": DataFrame}
+    (미청산 라운드는 실현 손익 집계에서 제외, summary 의 open 에만 표시)
+    """
+    legs, rounds = link_trades(df, amount)
+    closed = rounds[rounds["closed"]].sort_values("exit_ts")
+    pnl = closed["pnl_krw"].to_numpy()
+    summary = {
+        "rounds": int(len(closed)),
+        "open": int((~rounds["closed"]).sum()),
+        "win_rate": round(float((pnl > 0).mean() * 100), 2) if len(pnl) else 0.0,
+        "pnl_krw": round(float(pnl.sum()), 0),
+        "avg_pnl_pct": round(float(closed["pnl_pct"].mean()), 3) if len(pnl) else 0.0,
+        "avg_hold_sec": round(float(closed["hold_sec"].mean()), 1) if len(pnl) else 0.0,
+        "max_drawdown_krw": round(max_drawdown(pnl), 0),
+    }
+    by_ticker = _breakdown(closed, "ticker")
+    by_ticker["avg_hold_sec"] = closed.groupby("ticker")["hold_sec"].mean().round(1)
+    return {
+        "summary": summary,
+        "by_ticker": by_ticker,
+        "by_exit": _breakdown(legs, "exit_reason"),  # 매도 건별 (분할 익절 포함)
+        "by_entry": _breakdown(closed, "entry_reason"),
+        "rounds": rounds,
+        "legs": legs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="매매 기록 성과 분석")
+    parser.add_argument("path", nargs="?", default=None, help="TradeLogger DB 또는 trade_history.csv (기본 TRADE_DB_FILE)")
+    parser.add_argument("--amount", type=float, default=None, help="1회 진입 금액 (기본 TRADE_AMOUNT)")
+    args = parser.parse_args()
+
+    df = load_history(args.path)
+    started = time.perf_counter()
+    report = performance_report(df, args.amount)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f"📊 [Report] 기록 {len(df):,}건 -> 라운드 {report['summary']['rounds']:,}개 ({elapsed:.1f}ms)")
+    for k, v in report["summary"].items():
+        print(f"   {k}: {v}")
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        for title, key in (("종목별", "by_ticker"), ("청산 사유별", "by_exit"), ("진입 사유별", "by_entry")):
+            print(f"\n📌 {title}\n{report[key]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# clock.py
+# [NEW] 시계 주입 - 실전은 시스템 시계, 리플레이는 시뮬레이션 시계를 사용
+# (time.time() / datetime.now() / asyncio.sleep 을 직접 부르지 말고 이 모듈을 거칠 것)
+
+import asyncio
+import time as _time
+from datetime import datetime
+
+
+class SystemClock:
+    """실전용 - 실제 시스템 시계"""
+    def time(self):
+        return _time.time()
+
+    def now(self):
+        return datetime.now()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class SimClock:
+    """
+    리플레이용 - 외부(리플레이 드라이버)가 advance_to 로 시간을 밀어줌
+    sleep 은 시간을 흘려보내지 않고 이벤트 루프 양보만 함 (시간은 녹화 데이터 기준으로만 진행)
+    """
+    def __init__(self, start=0.0):
+        self.t = float(start)
+
+    def time(self):
+        return self.t
+
+    def now(self):
+        return datetime.fromtimestamp(self.t)
+
+    def advance_to(self, t):
+        if t > self.t:
+            self.t = float(t)
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(0)
+
+
+_clock = SystemClock()
+
+
+def set_clock(c):
+    global _clock
+    _clock = c
+
+
+def get_clock():
+    return _clock
+
+
+def time():
+    """현재 시각 (epoch 초)"""
+    return _clock.time()
+
+
+def now():
+    """현재 시각 (datetime)"""
+    return _clock.now()
+
+
+async def sleep(seconds):
+    await _clock.sleep(seconds)
@@ -9,14 +9,64 @@ except Exception:
 # [1. 시스템 및 API 설정]
 # =========================================================
 IS_SIMULATION = False  # 실전 여부 (True=가상매매) (False=실전매매)
+OFFLINE_MODE = False   # True=REST 시세 조회 금지 (리플레이 전용 - 녹화 데이터만 사용)
 UPBIT_ACCESS_KEY = os.getenv("UPBIT_ACCESS_KEY", "")
 UPBIT_SECRET_KEY = os.getenv("UPBIT_SECRET_KEY", "")
 
 # 루프 딜레이 및 데이터 설정
 LOOP_DELAY = 1              # 메인 루프 대기 시간 (초)
+EVENT_DRIVEN = False        # True=시세 갱신이 온 종목만 즉시 평가 (LOOP_DELAY 는 공통 점검 주기로만 사용)
+EVENT_DEBOUNCE_SEC = 0.2    # 종목별 평가 최소 간격 (이 안에 온 갱신은 한 번으로 합침)
+EVENT_HEARTBEAT_SEC = 1.0   # 갱신이 없어도 이 간격마다 평가 (시간 기반 청산용)
 OHLCV_INTERVAL = "minute1"  # 캔들 조회 기준
 OHLCV_COUNT = 200           # 캔들 조회 개수
 MIN_ORDER_VALUE = 5005       # 최소 주문 가능 금액 (업비트 5000원 + 여유분)
+FEED_QUEUE_SIZE = 10000      # 웹소켓 수신 -> 처리 사이 큐 크기 (trade/orderbook 보존용)
+LATENCY_SAMPLE_SIZE = 1000   # 피드 지연 통계용 최근 샘플 수 (거래소별/종목별)
+MAX_PRICE_AGE_SEC = 10       # 시세가 이 시간(초)보다 오래됐으면 신규 진입 거부 (0=끄기)
+
+# 원본 시세 녹화 (사후 분석/리플레이용)
+ENABLE_FEED_RECORDER = False # True 시 웹소켓 수신 원본을 RECORDER_DIR 에 저장
+RECORDER_DIR = "recordings"
+RECORDER_ROTATE_MB = 256     # 파일 1개 최대 크기 (매 정시에도 새 파일)
+
+# 매매 기록 (백그라운드 스레드가 모아서 저장)
+TRADE_DB_FILE = "trade_history.db" # SQLite(WAL) 기록 저장소 ("" 이면 DB 저장 안 함)
+TRADE_LOG_CSV_MIRROR = True  # 기존 trade_history.csv 에도 같이 기록 (호환용)
+TRADE_LOG_BATCH = 50         # 한 번에 저장할 최대 건수
+TRADE_LOG_FLUSH_SEC = 1.0    # 기록이 더 오길 기다리는 최대 시간 (초)
+
+# 과거 캔들 로컬 저장소 (스캐너/백테스트/시작 시 시딩 공용 - 빠진 캔들만 REST 조회)
+CANDLE_HISTORY_DIR = "candle_history"
+
+# 시장 스캐너 (30분마다 타겟 선정)
+SCAN_UNIVERSE = 40           # 거래대금 상위 N개 스캔 (0=KRW 전체 마켓)
+SCAN_WORKERS = 8             # 동시 조회 스레드 수
+SCAN_MAX_RETRY = 3           # 캔들 조회 실패 시 재시도 횟수
+
+# 업비트 REST 공용 클라이언트 (연결 재사용 + 초당 요청 한도 버킷)
+UPBIT_QUOTATION_RPS = 10     # 시세 API (캔들/호가/현재가)
+UPBIT_EXCHANGE_RPS = 30      # 거래 API - 잔고/주문 조회
+UPBIT_ORDER_RPS = 8          # 거래 API - 주문 생성/취소
+REST_POOL_SIZE = 16          # 유지할 HTTP 연결 수 (스캐너 동시 조회 수 이상)
+REST_TIMEOUT = 5             # 요청 타임아웃 (초)
+REST_MAX_RETRY = 3           # 429/연결 오류 시 재시도 횟수
+
+# 비동기 주문 체결 확인 (백그라운드 폴링)
+ORDER_POLL_INTERVAL = 0.5    # 체결 조회 간격 (초)
+ORDER_FILL_TIMEOUT_BUY = 2.0 # 매수 지정가 미체결 시 취소까지 (초)
+ORDER_FILL_TIMEOUT_SELL = 1.5 # 매도 지정가 미체결 시 취소까지 (초)
+
+# 실전 잔고 장부 (매매 루프는 장부만 조회, 거래소 잔고와는 백그라운드 대조)
+LEDGER_RECONCILE_SEC = 10    # 정기 대조 주기 (get_balances 1회, 초)
+LEDGER_DIRTY_DELAY = 0.3     # 주문 접수/체결 후 대조까지 대기 (연속 이벤트 합치기, 초)
+
+# 핫패스 계측 (단계별 지연 분포 / 카운터 - metrics.py)
+METRICS_PORT = 0             # 로컬 HTTP 엔드포인트 포트 (/metrics, /json / 0=끄기)
+METRICS_HOST = "127.0.0.1"
+METRICS_JSON_FILE = "metrics.json" # 주기적 JSON 스냅샷 ("" 이면 저장 안 함)
+METRICS_DUMP_SEC = 10        # JSON 스냅샷 주기 (초, 0=끄기)
+METRICS_LAG_INTERVAL = 0.5   # 이벤트 루프 지연 측정 간격 (초)
 
 # [가상 매매 설정]
 SIMULATION_BALANCE = 1_000_000_000 # 모의 투자 시작 금액
@@ -94,6 +144,11 @@ RSI_SELL_THRESHOLD = 70      # 과매수 매도 기준
 OB_DEPTH_COUNT = 5           # 분석할 호가 단계 수 (1~5호가)
 OB_BAD_RATIO = 3.0           # 매도벽이 매수벽의 3배면 나쁨 (시장가 매도)
 OB_GOOD_RATIO = 2.0          # 매수벽이 매도벽의 2배면 좋음
+ORDERBOOK_MAX_AGE = 3        # 로컬 호가창 유효 시간 (초) - 초과 시 REST로 재조회
+
+# 체결 테이프 (허매수 판독용)
+TRADE_TAPE_CAPACITY = 2000   # 종목별 최대 보관 체결 수 (급등 시 잘림 방지)
+TRADE_TAPE_WINDOWS = [3, 10, 60]  # 누적합을 상시 유지할 시간 구간 (초)
 
 # =========================================================
 # [7. 기타 필터 (Macro & Binance)]
@@ -124,7 +179,57 @@ MODEL_CHAIRMAN = "gpt-4o"            # 의장 (GPT-4o)
 MODEL_BULL = "gemini-2.5-flash"     # 공격수 (Gemini Flash - 무료/저렴)
 MODEL_BEAR = "claude-haiku-4-5" # 수비수 (Claude Haiku - 저렴)
 
+# 3. 응답 마감 시간 (공격수/수비수 동시 호출 -> 의장)
+AI_CALL_TIMEOUT = 10          # 모델 1회 호출 타임아웃 (초)
+AI_CHART_DEADLINE_SEC = 8     # 매수 검증 1건 전체 마감 (초)
+AI_MACRO_DEADLINE_SEC = 60    # 거시 전략 수립 전체 마감 (초)
+AI_DEADLINE_FALLBACK = "REJECT" # 마감 초과 시: REJECT(거부) / APPROVE(승인) / PARTIAL(받은 의견으로 결정)
+
+# 4. 차트 판정 캐시 (같은 종목 + 같은 가격대 차트 재검증 방지)
+AI_VERDICT_TTL = 1800          # 판정 유효 시간 (초)
+AI_VERDICT_PRICE_STEP_PCT = 0.3 # 지문 가격 눈금 (%) - 이 안의 움직임은 같은 차트로 봄
+AI_VERDICT_CACHE_SIZE = 512    # 최대 보관 건수 (초과 시 오래 안 쓴 것부터 삭제)
+AI_VERDICT_CACHE_FILE = "ai_verdict_cache.json" # 저장 파일 ("" 이면 저장 안 함)
+
+# 5. 뉴스/공포탐욕지수 캐시 + 거시 전략 재사용
+NEWS_TTL = 600                 # 뉴스 유효 시간 (초)
+FNG_TTL = 3600                 # 공포탐욕지수 유효 시간 (초, 하루 1회 갱신되는 지표)
+NEWS_REFRESH_SEC = 60          # 백그라운드 갱신 점검 주기 (초)
+NEWS_CACHE_FILE = "news_cache.json"
+AI_CONSENSUS_FILE = "ai_consensus.json" # 마지막 거시 전략 + 입력 해시 ("" 이면 저장 안 함)
+AI_CONSENSUS_MAX_AGE = 21600   # 입력이 같아도 이 시간(초)이 지나면 다시 회의
+
+# 6. 차트 프롬프트 형식 + 호출 계측
+AI_CHART_FORMAT = "compact"    # compact(상대 변화 bp + 지표 요약) / table(기존 전체 정밀도 표)
+AI_CHART_BARS = 30             # 프롬프트에 넣을 1분봉 수
+AI_TELEMETRY_FILE = "ai_calls.csv" # 호출별 토큰/지연 로그 ("" 이면 기록 안 함)
+
+# 7. 공급자 서킷 브레이커 (느리거나 자주 실패하는 AI 는 잠시 호출 중단)
+AI_BREAKER_WINDOW = 20         # 최근 호출 몇 회로 판단할지
+AI_BREAKER_MIN_CALLS = 5       # 최소 호출 수 (이보다 적으면 판단 안 함)
+AI_BREAKER_P95_MS = 6000       # p95 지연이 이 값(ms)을 넘으면 차단
+AI_BREAKER_ERROR_RATE = 0.5    # 오류율이 이 값을 넘으면 차단
+AI_BREAKER_COOLDOWN_SEC = 300  # 차단 후 시험 호출까지 대기 (초)
+AI_REDUCED_MODE = "PARTIAL"    # 차단 중: PARTIAL(남은 위원만으로 결정) / REJECT(매수 거부, 거시 전략은 기본값)
+AI_PRICE_PER_MTOK = {          # 비용 추정용 100만 토큰당 USD (입력, 출력)
+    "gemini": (0.30, 2.50),
+    "claude": (1.00, 5.00),
+    "openai": (2.50, 10.00),
+}
+
 # =========================================================
 # [9. 계좌 보호 설정 (Circuit Breaker)] ✅ 신규 추가
 # =========================================================
-MAX_GLOBAL_LOSS_PCT = 3.0  # 원금 대비 3% 손실 시 봇 강제 종료
\ No newline at end of file
+MAX_GLOBAL_LOSS_PCT = 3.0  # 원금 대비 3% 손실 시 봇 강제 종료
+
+# =========================================================
+# [10. 파라미터 최적화 (Backtest Optimizer)]
+# =========================================================
+OPTIMIZER_SPLITS = 3         # 워크포워드 split 수 (학습/검증 구간 쌍)
+OPTIMIZER_WORKERS = 0        # 프로세스 수 (0=전 코어)
+OPTIMIZER_GRID = {           # 탐색 공간 (AI 튜너가 정하는 값들 / 김프는 백테스트에 이력이 없어 제외)
+    "RSI_BUY_THRESHOLD": [20, 25, 30, 35],
+    "STOP_LOSS_PCT": [-1.0, -1.5, -2.0, -3.0],
+    "PARTIAL_SELL_MIN_PROFIT": [0.2, 0.3, 0.5],
+    "TRAILING_START": [0.3, 0.5, 0.8, 1.0],
+}
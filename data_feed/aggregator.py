@@ -4,16 +4,34 @@
 
 import asyncio
 import json
-import time
 import websockets
 from collections import deque
+import clock
 import config
+from data_feed.candle_store import CandleStore
+from data_feed.candle_history import CandleHistory
+from data_feed.orderbook import OrderBookStore
+from data_feed.trade_tape import TradeTape
+from data_feed.subscription import SubscriptionManager
+from data_feed.feed_queue import FeedQueue
+from data_feed.latency import FeedLatency
+from data_feed.recorder import FeedRecorder, KIND_UPBIT, KIND_BINANCE
+from metrics import get_metrics
+
+def _new_market_entry():
+    # *_ts: 거래소 이벤트 시각, *_recv: 로컬 수신 시각 (epoch 초)
+    return {
+        "upbit": None, "binance": None, "kimp": None,
+        "upbit_ts": None, "upbit_recv": None,
+        "binance_ts": None, "binance_recv": None,
+        "stale": True,
+    }
 
 class DataAggregator:
     def __init__(self):
         # 초기화 시점에만 config 참조 (이후 loop에서 갱신됨)
         self.market_data = {
-            ticker: {"upbit": None, "binance": None, "kimp": None} 
+            ticker: _new_market_entry()
             for ticker in config.TARGET_COINS.keys()
         }
         self.binance_map = {v: k for k, v in config.TARGET_COINS.items()}
@@ -23,75 +41,182 @@ class DataAggregator:
         self.surge_detected = False
         self.surge_info = ""
 
-        # ✅ [신규] 체결 내역 저장소 (종목별 최근 100개 저장)
+        # ✅ [신규] 체결 테이프 (종목별 배열 링버퍼, 시간 구간 누적합)
         self.trade_history = {
-            ticker: deque(maxlen=100) 
+            ticker: TradeTape()
             for ticker in config.TARGET_COINS.keys()
         }
 
+        # ✅ [신규] 체결 기반 로컬 1분봉 저장소 (REST 시딩 1회 + 웹소켓 갱신)
+        self.candles = CandleStore(history=CandleHistory())
+
+        # ✅ [신규] 종목별 로컬 호가창 (orderbook 웹소켓)
+        self.orderbooks = OrderBookStore()
+
+        # ✅ [신규] 구독 관리자 (타겟 변경 시 끊지 않고 재구독)
+        self.upbit_subs = SubscriptionManager("upbit")
+        self.binance_subs = SubscriptionManager("binance")
+        self._binance_req_id = 0
+
+        # ✅ [신규] 수신/처리 분리 큐 (수신부는 디코딩 후 투입만, 처리는 consume_feed)
+        self.feed = None
+
+        # ✅ [신규] 거래소 -> 로컬 지연 통계
+        self.latency = FeedLatency()
+
+        # ✅ [신규] 원본 시세 녹화기 (별도 스레드에서 압축/기록)
+        self.recorder = FeedRecorder() if config.ENABLE_FEED_RECORDER else None
+
+        # ✅ [신규] 갱신 알림 구독자 (이벤트 기반 매매 판단용) - callback(ticker, kind)
+        self.listeners = []
+
+    def subscribe(self, callback):
+        """현재가/체결/바이낸스 시세 갱신 시 callback(ticker, kind) 호출"""
+        self.listeners.append(callback)
+
+    def _notify(self, ticker, kind):
+        for callback in self.listeners:
+            try:
+                callback(ticker, kind)
+            except Exception as e:
+                print(f"⚠️ [Feed] 알림 오류: {e}")
+
+    def _sync_targets(self, tickers):
+        """타겟 종목별 저장소(딕셔너리) 동기화"""
+        for ticker in tickers:
+            if ticker not in self.market_data:
+                self.market_data[ticker] = _new_market_entry()
+            # ✅ [신규] 체결 저장소 동기화
+            if ticker not in self.trade_history:
+                self.trade_history[ticker] = TradeTape()
+
+    def _upbit_subscription(self, codes):
+        return [
+            {"ticket": "octopus-bot"},
+            {"type": "ticker", "codes": codes},
+            {"type": "trade", "codes": codes}, # ✅ [신규] 체결 내용 구독 추가
+            {"type": "orderbook", "codes": codes} # ✅ [신규] 호가창 구독 추가
+        ]
+
     async def connect_upbit(self):
-        """업비트 웹소켓 (Ticker + Trade 구독)"""
+        """업비트 웹소켓 (Ticker + Trade + Orderbook 구독)"""
         uri = "wss://api.upbit.com/websocket/v1"
         
         while True:
             try:
                 current_target_keys = list(config.TARGET_COINS.keys())
-                
-                # 딕셔너리 동기화
+                self._sync_targets(current_target_keys)
+
+                # ✅ [신규] 1분봉 저장소 시딩 (시작 시/재접속 시에만 REST 호출)
                 for ticker in current_target_keys:
-                    if ticker not in self.market_data:
-                        self.market_data[ticker] = {"upbit": None, "binance": None, "kimp": None}
-                    # ✅ [신규] 체결 저장소 동기화
-                    if ticker not in self.trade_history:
-                        self.trade_history[ticker] = deque(maxlen=100)
+                    if not self.candles.is_ready(ticker):
+                        if await asyncio.to_thread(self.candles.seed, ticker):
+                            asyncio.create_task(asyncio.to_thread(self.candles.fill_gaps, ticker)) # 접속을 막지 않음
 
                 async with websockets.connect(uri) as websocket:
-                    subscribe_fmt = [
-                        {"ticket": "octopus-bot"},
-                        {"type": "ticker", "codes": current_target_keys},
-                        {"type": "trade", "codes": current_target_keys} # ✅ [신규] 체결 내용 구독 추가
-                    ]
-                    await websocket.send(json.dumps(subscribe_fmt))
-                    print(f"✅ [Upbit] Ticker & Trade 구독 시작 ({len(current_target_keys)}개)")
+                    await websocket.send(json.dumps(self._upbit_subscription(current_target_keys)))
+                    self.upbit_subs.on_connect()
+                    self.upbit_subs.commit(current_target_keys)
+                    print(f"✅ [Upbit] Ticker & Trade & Orderbook 구독 시작 ({len(current_target_keys)}개)")
 
                     while True:
-                        data = await websocket.recv()
-                        data = json.loads(data)
-                        code = data['code']
-                        dtype = data['type'] # ticker or trade
-
-                        if code not in config.TARGET_COINS: continue
-
-                        # 1. 현재가(Ticker) 처리
-                        if dtype == 'ticker':
-                            price = float(data['trade_price'])
-                            self.market_data[code]['upbit'] = price
-                            self.calculate_kimp(code)
-                        
-                        # ✅ 2. [신규] 체결(Trade) 처리
-                        elif dtype == 'trade':
-                            # (시간, 가격, 볼륨, 매수/매도주체)
-                            # ask_bid: ASK=매도체결(파란색), BID=매수체결(빨간색)
-                            trade_info = {
-                                'timestamp': time.time(),
-                                'price': float(data['trade_price']),
-                                'volume': float(data['trade_volume']),
-                                'side': data['ask_bid'] 
-                            }
-                            self.trade_history[code].append(trade_info)
-                        
-                        # 설정 변경 감지 (타겟 개수 변경 시 재접속)
-                        if len(current_target_keys) != len(config.TARGET_COINS):
-                            print("🔄 [Upbit] 타겟 변경 감지 -> 재구독 시도")
-                            break 
+                        try:
+                            data = await asyncio.wait_for(websocket.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            data = None # 조용한 구간에도 타겟 변경은 감지
+                        if data is not None:
+                            recv_ts = clock.time()
+                            if self.recorder: self.recorder.record(KIND_UPBIT, recv_ts, data)
+                            data = json.loads(data)
+                            await self.feed.put("upbit_" + data['type'], data['code'], data, recv_ts)
+
+                        # 설정 변경 감지 (집합 비교 -> 접속 유지한 채 재구독)
+                        if self.upbit_subs.has_changed(config.TARGET_COINS.keys()):
+                            await self._resubscribe_upbit(websocket)
 
             except Exception as e:
                 print(f"⚠️ [Upbit] Error: {e}")
+                self.upbit_subs.on_disconnect()
+                self.candles.mark_stale() # 끊긴 동안의 체결 누락 -> 재접속 시 재시딩
                 await asyncio.sleep(2)
 
-    # ... (binance 및 기타 메서드는 기존과 동일하므로 유지) ...
+    async def _resubscribe_upbit(self, websocket):
+        """
+        같은 연결에 새 구독 요청 전송 (업비트는 마지막 요청 기준으로 구독 갱신)
+        -> 양쪽 타겟에 모두 있는 종목은 데이터 끊김 없음
+        """
+        keys = list(config.TARGET_COINS.keys())
+        added, removed = self.upbit_subs.diff(keys)
+        self._sync_targets(keys)
+        await websocket.send(json.dumps(self._upbit_subscription(keys)))
+        self.upbit_subs.commit(keys, resubscribe=True)
+        print(f"🔄 [Upbit] 타겟 변경 -> 재구독 (+{len(added)} / -{len(removed)}, 유지 {len(keys) - len(added)}개)")
+
+        # 신규 종목만 백그라운드 시딩 (수신 루프는 멈추지 않음)
+        for ticker in added:
+            if not self.candles.is_ready(ticker):
+                asyncio.create_task(asyncio.to_thread(self.candles.seed, ticker))
+
+    async def consume_feed(self):
+        """처리부: 큐에서 꺼내 market_data / 체결 테이프 / 캔들 / 호가창 갱신"""
+        metrics = get_metrics()
+        while True:
+            kind, _, msg, recv_ts = await self.feed.get()
+            metrics.observe("ws_queue", max(clock.time() - recv_ts, 0.0)) # 수신 -> 처리 시작 대기
+            metrics.inc(f"feed_{kind}")
+            try:
+                with metrics.timer("market_data"):
+                    if kind == "binance_ticker":
+                        self.handle_binance_message(msg, recv_ts)
+                    else:
+                        self.handle_upbit_message(msg, recv_ts)
+            except Exception as e:
+                metrics.inc("feed_errors")
+                print(f"⚠️ [Feed] 처리 오류({kind}): {e}")
+            # 큐가 계속 차 있어도 메인 루프가 돌 수 있도록 주기적으로 양보
+            if self.feed.processed % 100 == 0:
+                await asyncio.sleep(0)
+
+    def handle_upbit_message(self, data, recv_ts=None):
+        """업비트 메시지 1건 처리 (ticker / trade / orderbook)"""
+        code = data['code']
+        dtype = data['type'] # ticker, trade or orderbook
+
+        if code not in config.TARGET_COINS: return
+
+        # 거래소 이벤트 시각(ms) 기준 지연 기록
+        exchange_ms = data.get('timestamp')
+        if recv_ts is not None and exchange_ms:
+            self.latency.record("upbit", code, exchange_ms / 1000, recv_ts)
+
+        # 1. 현재가(Ticker) 처리
+        if dtype == 'ticker':
+            price = float(data['trade_price'])
+            entry = self.market_data[code]
+            entry['upbit'] = price
+            entry['upbit_ts'] = exchange_ms / 1000 if exchange_ms else recv_ts
+            entry['upbit_recv'] = recv_ts
+            self.calculate_kimp(code)
+            self._notify(code, dtype)
+        
+        # ✅ 2. [신규] 체결(Trade) 처리
+        elif dtype == 'trade':
+            # (시간, 가격, 볼륨, 매수/매도주체)
+            # ask_bid: ASK=매도체결(파란색), BID=매수체결(빨간색)
+            now = recv_ts if recv_ts is not None else clock.time()
+            price = float(data['trade_price'])
+            volume = float(data['trade_volume'])
+            self.trade_history[code].append(now, price, volume, data['ask_bid'])
+            # 로컬 1분봉 갱신 (체결 시각은 거래소 기준 ms)
+            trade_ts = data.get('trade_timestamp')
+            self.candles.update_trade(code, price, volume, trade_ts / 1000 if trade_ts else now)
+            self._notify(code, dtype)
+
+        # ✅ 3. [신규] 호가창(Orderbook) 처리 - 전체 스냅샷 교체
+        elif dtype == 'orderbook':
+            self.orderbooks.update(code, data, recv_ts)
+
     async def connect_binance(self):
-        # (기존 코드 유지)
         while True:
             try:
                 current_symbols = list(config.TARGET_COINS.values())
@@ -100,27 +225,107 @@ class DataAggregator:
                 self.binance_map = {v: k for k, v in config.TARGET_COINS.items()}
                 print(f"✅ [Binance] 리더-팔로워 엔진 가동 ({len(current_symbols)}개)")
                 async with websockets.connect(uri) as websocket:
+                    self.binance_subs.on_connect()
+                    self.binance_subs.commit(current_symbols)
                     while True:
-                        resp = await websocket.recv()
-                        resp = json.loads(resp)
-                        stream_name = resp['stream'] 
-                        symbol = stream_name.split('@')[0]
-                        price = float(resp['data']['c'])
-                        if symbol in self.binance_map:
-                            upbit_code = self.binance_map[symbol]
-                            if upbit_code in self.market_data:
-                                self.market_data[upbit_code]['binance'] = price
-                                self.calculate_kimp(upbit_code)
-                        if symbol == "btcusdt":
-                            self.detect_btc_surge(price)
-                        if len(current_symbols) != len(config.TARGET_COINS):
-                            break
+                        try:
+                            resp = await asyncio.wait_for(websocket.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            resp = None
+                        if resp is not None:
+                            recv_ts = clock.time()
+                            resp_raw = resp
+                            resp = json.loads(resp)
+                            # SUBSCRIBE/UNSUBSCRIBE 응답({"result":null,"id":n})은 건너뜀
+                            if 'stream' in resp:
+                                if self.recorder: self.recorder.record(KIND_BINANCE, recv_ts, resp_raw)
+                                await self.feed.put("binance_ticker", resp['stream'], resp, recv_ts)
+
+                        if self.binance_subs.has_changed(config.TARGET_COINS.values()):
+                            await self._resubscribe_binance(websocket)
             except Exception as e:
                 print(f"⚠️ [Binance] Error: {e}")
+                self.binance_subs.on_disconnect()
                 await asyncio.sleep(2)
 
+    async def _resubscribe_binance(self, websocket):
+        """바이낸스 combined stream 에 추가/제거분만 SUBSCRIBE/UNSUBSCRIBE"""
+        symbols = list(config.TARGET_COINS.values())
+        added, removed = self.binance_subs.diff(symbols)
+        if added:
+            self._binance_req_id += 1
+            await websocket.send(json.dumps({
+                "method": "SUBSCRIBE", "params": [f"{sym}@ticker" for sym in added], "id": self._binance_req_id
+            }))
+        if removed:
+            self._binance_req_id += 1
+            await websocket.send(json.dumps({
+                "method": "UNSUBSCRIBE", "params": [f"{sym}@ticker" for sym in removed], "id": self._binance_req_id
+            }))
+        self.binance_map = {v: k for k, v in config.TARGET_COINS.items()}
+        self.binance_subs.commit(symbols, resubscribe=True)
+        print(f"🔄 [Binance] 타겟 변경 -> 재구독 (+{len(added)} / -{len(removed)})")
+
+    def handle_binance_message(self, resp, recv_ts=None):
+        """바이낸스 ticker 메시지 1건 처리"""
+        stream_name = resp['stream'] 
+        symbol = stream_name.split('@')[0]
+        price = float(resp['data']['c'])
+        event_ms = resp['data'].get('E') # 바이낸스 이벤트 시각 (ms)
+        if symbol in self.binance_map:
+            upbit_code = self.binance_map[symbol]
+            if recv_ts is not None and event_ms:
+                self.latency.record("binance", upbit_code, event_ms / 1000, recv_ts)
+            if upbit_code in self.market_data:
+                entry = self.market_data[upbit_code]
+                entry['binance'] = price
+                entry['binance_ts'] = event_ms / 1000 if event_ms else recv_ts
+                entry['binance_recv'] = recv_ts
+                self.calculate_kimp(upbit_code)
+                self._notify(upbit_code, "binance")
+        if symbol == "btcusdt":
+            self.detect_btc_surge(price)
+
+    # -----------------------------------------------------------
+    # ⏱️ 시세 신선도 (Staleness)
+    # -----------------------------------------------------------
+    def price_age(self, ticker, venue="upbit", now=None):
+        """
+        시세 나이(초) = 수신 후 경과 시간 + 거래소->로컬 지연
+        (시계 오차로 지연이 음수면 0으로 간주) / 시세 없으면 None
+        """
+        entry = self.market_data.get(ticker)
+        if not entry or entry[f'{venue}_recv'] is None: return None
+        now = clock.time() if now is None else now
+        recv, exch = entry[f'{venue}_recv'], entry[f'{venue}_ts']
+        return (now - recv) + max(recv - exch, 0.0)
+
+    def is_stale(self, ticker, max_age=None):
+        """업비트 시세가 max_age(초)보다 오래됐으면 True (market_data['stale'] 도 갱신)"""
+        max_age = config.MAX_PRICE_AGE_SEC if max_age is None else max_age
+        age = self.price_age(ticker)
+        stale = age is None or (bool(max_age) and age > max_age)
+        if ticker in self.market_data:
+            self.market_data[ticker]['stale'] = stale
+        return stale
+
+    def refresh_staleness(self):
+        """모든 종목의 stale 플래그 갱신"""
+        for ticker in self.market_data:
+            self.is_stale(ticker)
+
+    def get_feed_stats(self):
+        """웹소켓 구독/재접속/공백 통계"""
+        return {
+            "upbit": self.upbit_subs.stats(),
+            "binance": self.binance_subs.stats(),
+            "queue": self.feed.stats() if self.feed else None,
+            "latency": self.latency.summary(),
+            "recorder": self.recorder.stats() if self.recorder else None,
+        }
+
     def detect_btc_surge(self, current_price):
-        now = time.time()
+        now = clock.time()
         self.btc_history.append((now, current_price))
         prev_price = None
         while self.btc_history and self.btc_history[0][0] < now - 2.0:
@@ -141,7 +346,9 @@ class DataAggregator:
             self.market_data[code]['kimp'] = ((u_price - b_krw) / b_krw) * 100
 
     async def run(self):
+        self.feed = FeedQueue() # 실행 중인 이벤트 루프에서 생성
         await asyncio.gather(
             self.connect_upbit(),
-            self.connect_binance()
+            self.connect_binance(),
+            self.consume_feed()
         )
\ No newline at end of file
@@ -0,0 +1,288 @@
+# data_feed/candle_history.py
+# [NEW] 로컬 과거 캔들 저장소 - 종목/주기별 .npy 컬럼 배열 + 증분 수집
+#
+# 파일: {CANDLE_HISTORY_DIR}/{interval}/{ticker}.npy
+#   shape (7, N) float64 / 행 순서 = candle_store 의 TS, OPEN, HIGH, LOW, CLOSE, VOLUME, VALUE
+#   (컬럼별로 연속 메모리 -> mmap 으로 열어서 파싱 없이 close 등 한 줄만 바로 사용)
+# - 완성된 캔들만 저장 (진행 중인 캔들은 self.partial 에 따로 보관)
+# - update: 마지막 저장 시각 이후 빠진 캔들만 조회
+# - backfill: to= 로 가장 오래된 캔들 이전을 페이지 단위로 더 받아옴
+# - 공백: update 가 max_bars 로 잘려 못 받은 구간은 {ticker}.gaps.json 에 기록 -> fill_gaps 로 채움
+#   (업비트는 거래 없는 분봉을 만들지 않으므로 시각 차이만으로는 공백을 알 수 없어 따로 기록)
+
+import json
+
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+import config
+from data_feed.rest_client import get_client
+from data_feed.candle_store import TS, OPEN, HIGH, LOW, CLOSE, VOLUME, VALUE, KST_OFFSET
+
+INTERVAL_SECONDS = {
+    "minute1": 60, "minute3": 180, "minute5": 300, "minute10": 600, "minute15": 900,
+    "minute30": 1800, "minute60": 3600, "minute240": 14400, "day": 86400,
+}
+PAGE_SIZE = 200      # 업비트 캔들 API 1회 최대 개수 (요청 간격은 REST 클라이언트 버킷이 관리)
+
+
+# 같은 (종목, 주기) 파일을 읽고-고치고-교체하는 작업은 하나씩 (시딩/공백 채우기/스캐너 스레드 동시 실행)
+# 인스턴스가 달라도 같은 파일이므로 프로세스 공용, backfill -> update 재진입 때문에 RLock
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(ticker, interval):
+    with _file_locks_guard:
+        lock = _file_locks.get((ticker, interval))
+        if lock is None:
+            lock = _file_locks[(ticker, interval)] = threading.RLock()
+        return lock
+
+
+def _empty():
+    return np.empty((7, 0), dtype=np.float64)
+
+
+class CandleHistory:
+    def __init__(self, directory=None, client=None):
+        self.directory = directory or config.CANDLE_HISTORY_DIR
+        self.client = client or get_client()
+        self.partial = {}  # {(ticker, interval): 진행 중인 마지막 캔들 [ts, o, h, l, c, v, value]}
+        self.requests = 0  # REST 호출 수 (통계용)
+        self._requests_lock = threading.Lock() # 스캐너 스레드 풀에서 동시에 증가
+
+    def path(self, ticker, interval):
+        return os.path.join(self.directory, interval, f"{ticker}.npy")
+
+    def gaps_path(self, ticker, interval):
+        return os.path.join(self.directory, interval, f"{ticker}.gaps.json")
+
+    def load_gaps(self, ticker, interval):
+        """못 받은 구간 [(이후 ts, 이전 ts)] - 양 끝 캔들은 저장돼 있고 그 사이가 비어 있음"""
+        path = self.gaps_path(ticker, interval)
+        if not os.path.exists(path): return []
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return [tuple(g) for g in json.load(f)]
+        except Exception as e:
+            print(f"⚠️ [History] {ticker} {interval} 공백 기록 손상: {e}")
+            return []
+
+    def _save_gaps(self, ticker, interval, gaps):
+        path = self.gaps_path(ticker, interval)
+        if not gaps:
+            if os.path.exists(path): os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(sorted(gaps), f)
+        os.replace(tmp, path)
+
+    # -----------------------------------------------------------
+    # 📂 읽기 (파싱 없음)
+    # -----------------------------------------------------------
+    def load(self, ticker, interval, mmap=True):
+        """저장된 (7, N) 배열 (없으면 빈 배열)"""
+        path = self.path(ticker, interval)
+        if not os.path.exists(path): return _empty()
+        try:
+            return np.load(path, mmap_mode="r" if mmap else None)
+        except Exception as e:
+            print(f"⚠️ [History] {ticker} {interval} 파일 손상: {e}")
+            return _empty()
+
+    def get_ohlcv(self, ticker, interval, count=None, with_partial=False):
+        """pyupbit.get_ohlcv 모양 DataFrame (KST 인덱스) - 최근 count 개"""
+        arr = self.load(ticker, interval)
+        if count: arr = arr[:, -count:]
+        last = self.partial.get((ticker, interval))
+        if with_partial and last and (arr.shape[1] == 0 or last[TS] > arr[TS, -1]):
+            arr = np.hstack([arr, np.asarray(last).reshape(7, 1)])
+            if count: arr = arr[:, -count:]
+        if arr.shape[1] == 0: return None
+        index = pd.to_datetime(arr[TS].astype(np.int64) + KST_OFFSET, unit="s")
+        return pd.DataFrame({
+            "open": arr[OPEN], "high": arr[HIGH], "low": arr[LOW], "close": arr[CLOSE],
+            "volume": arr[VOLUME], "value": arr[VALUE],
+        }, index=index)
+
+    def get_arrays(self, tickers, interval="minute1", since=None):
+        """여러 종목 -> 백테스트용 PriceArrays (공통 시간축 정렬, 빈 칸은 NaN)"""
+        from backtest.engine import PriceArrays
+        loaded = {}
+        for t in tickers:
+            arr = self.load(t, interval)
+            if since is not None:
+                arr = arr[:, np.searchsorted(arr[TS], since):]
+            if arr.shape[1]:
+                loaded[t] = arr
+        if not loaded: return None
+
+        ts = np.unique(np.concatenate([a[TS] for a in loaded.values()])).astype(np.int64)
+        shape = (len(loaded), len(ts))
+        cols = {c: np.full(shape, np.nan) for c in (OPEN, HIGH, LOW, CLOSE)}
+        cols[VOLUME] = np.zeros(shape)
+        for i, arr in enumerate(loaded.values()):
+            pos = np.searchsorted(ts, arr[TS].astype(np.int64))
+            for c in cols:
+                cols[c][i, pos] = arr[c]
+        return PriceArrays(list(loaded.keys()), ts, cols[OPEN], cols[HIGH], cols[LOW], cols[CLOSE],
+                           cols[VOLUME], bar_seconds=INTERVAL_SECONDS[interval])
+
+    # -----------------------------------------------------------
+    # 🌐 수집
+    # -----------------------------------------------------------
+    def _fetch_page(self, ticker, interval, count, to_ts=None):
+        """to_ts(epoch 초, 미포함) 이전 캔들 최대 count 개 -> (7, k) 배열"""
+        to = None
+        if to_ts is not None:
+            to = pd.Timestamp(int(to_ts), unit="s").strftime("%Y-%m-%d %H:%M:%S")  # UTC 기준
+        with self._requests_lock:
+            self.requests += 1
+        df = self.client.get_ohlcv(ticker, interval=interval, count=count, to=to)
+        if df is None or df.empty: return _empty()
+        ts = df.index.values.astype("datetime64[s]").astype(np.int64) - KST_OFFSET
+        return np.vstack([ts, df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(),
+                          df["close"].to_numpy(), df["volume"].to_numpy(), df["value"].to_numpy()]).astype(np.float64)
+
+    def _save(self, ticker, interval, arr):
+        path = self.path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp.npy"
+        np.save(tmp, np.ascontiguousarray(arr))
+        os.replace(tmp, path)
+
+    @staticmethod
+    def _merge(a, b):
+        """시각 기준 합치기 (겹치면 b 우선)"""
+        both = np.hstack([b, a])
+        _, idx = np.unique(both[TS], return_index=True)  # 첫 등장(b) 유지 + 정렬
+        return both[:, idx]
+
+    def update(self, ticker, interval, min_bars=None, max_bars=None):
+        """
+        마지막 저장 시각 이후 빠진 캔들만 받아 저장 -> 새로 추가된 완성 캔들 수
+        :param min_bars: 저장소가 비어있을 때 처음 받아올 개수 (기본 PAGE_SIZE)
+        :param max_bars: 한 번에 받아올 최대 개수 (초과분은 공백으로 기록 -> fill_gaps 로 채움, 시작 지연 방지용)
+        """
+        with _file_lock(ticker, interval):
+            return self._update(ticker, interval, min_bars=min_bars, max_bars=max_bars)
+
+    def _update(self, ticker, interval, min_bars=None, max_bars=None):
+        if config.OFFLINE_MODE: return 0
+        step = INTERVAL_SECONDS[interval]
+        old = self.load(ticker, interval, mmap=False)
+        now = time.time()
+
+        if old.shape[1]:
+            missing = int((now - old[TS, -1]) // step) + 1  # +1 = 진행 중인 캔들
+        else:
+            missing = max(min_bars or PAGE_SIZE, 1)
+        if max_bars:
+            missing = min(missing, max_bars)
+
+        pages, to_ts, capped = [], None, False
+        while missing > 0:
+            page = self._fetch_page(ticker, interval, min(PAGE_SIZE, missing), to_ts)
+            if page.shape[1] == 0: break
+            pages.append(page)
+            missing -= page.shape[1]
+            to_ts = page[TS, 0]
+            if old.shape[1] and to_ts <= old[TS, -1]: break
+            capped = missing <= 0
+        if not pages: return 0
+
+        # max_bars 로 잘려 기존 마지막 캔들까지 닿지 못했으면 그 사이를 공백으로 기록
+        if capped and old.shape[1] and to_ts > old[TS, -1] + step:
+            gaps = self.load_gaps(ticker, interval)
+            gaps.append((float(old[TS, -1]), float(to_ts)))
+            self._save_gaps(ticker, interval, gaps)
+
+        new = np.hstack(pages[::-1])
+        # 진행 중인 캔들은 저장하지 않음
+        done = new[TS] + step <= now
+        if not done[-1]:
+            self.partial[(ticker, interval)] = new[:, -1].tolist()
+        else:
+            self.partial.pop((ticker, interval), None)
+        new = new[:, done]
+        if new.shape[1] == 0: return 0
+
+        merged = self._merge(old, new)
+        added = merged.shape[1] - old.shape[1]
+        if added > 0 or merged.shape != old.shape:
+            self._save(ticker, interval, merged)
+        return max(added, 0)
+
+    def fill_gaps(self, ticker, interval, max_pages=None):
+        """
+        기록된 공백을 최근 쪽부터 페이지 단위로 채움 (백그라운드 호출용)
+        :param max_pages: 이번에 쓸 최대 요청 수 (다 못 채우면 남은 구간만 다시 기록)
+        Return: 채운 캔들 수
+        """
+        with _file_lock(ticker, interval):
+            return self._fill_gaps(ticker, interval, max_pages=max_pages)
+
+    def _fill_gaps(self, ticker, interval, max_pages=None):
+        if config.OFFLINE_MODE: return 0
+        gaps = self.load_gaps(ticker, interval)
+        if not gaps: return 0
+        arr = self.load(ticker, interval, mmap=False)
+        before, pages, remaining = arr.shape[1], 0, []
+        for lo, hi in sorted(gaps, reverse=True):
+            to_ts = hi
+            while max_pages is None or pages < max_pages:
+                page = self._fetch_page(ticker, interval, PAGE_SIZE, to_ts)
+                pages += 1
+                if page.shape[1]:
+                    arr = self._merge(arr, page[:, page[TS] > lo])
+                if page.shape[1] == 0 or page[TS, 0] <= lo:
+                    to_ts = None  # 다 채움
+                    break
+                to_ts = page[TS, 0]
+            if to_ts is not None:
+                remaining.append((lo, to_ts))
+
+        if arr.shape[1] > before:
+            self._save(ticker, interval, arr)
+        self._save_gaps(ticker, interval, remaining)
+        return arr.shape[1] - before
+
+    def backfill(self, ticker, interval, bars, max_pages=None):
+        """저장된 캔들이 bars 개가 될 때까지 가장 오래된 캔들 이전을 페이지 단위로 수집"""
+        with _file_lock(ticker, interval):
+            return self._backfill(ticker, interval, bars, max_pages=max_pages)
+
+    def _backfill(self, ticker, interval, bars, max_pages=None):
+        if config.OFFLINE_MODE: return 0
+        arr = self.load(ticker, interval, mmap=False)
+        if arr.shape[1] == 0:
+            self.update(ticker, interval)
+            arr = self.load(ticker, interval, mmap=False)
+            if arr.shape[1] == 0: return 0
+
+        before, pages = arr.shape[1], 0
+        while arr.shape[1] < bars and (max_pages is None or pages < max_pages):
+            page = self._fetch_page(ticker, interval, min(PAGE_SIZE, bars - arr.shape[1]), arr[TS, 0])
+            pages += 1
+            if page.shape[1] == 0: break  # 상장 이전
+            merged = self._merge(arr, page)
+            if merged.shape[1] == arr.shape[1]: break
+            arr = merged
+
+        if arr.shape[1] > before:
+            self._save(ticker, interval, arr)
+        return arr.shape[1] - before
+
+
+if __name__ == "__main__":
+    h = CandleHistory()
+    for interval in ("minute15", "minute1"):
+        t0 = time.perf_counter()
+        added = h.update("KRW-BTC", interval)
+        print(f"📥 {interval}: +{added}개 ({time.perf_counter() - t0:.2f}초, 요청 {h.requests}회)")
+    print(h.get_ohlcv("KRW-BTC", "minute1", count=5, with_partial=True))
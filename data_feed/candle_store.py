@@ -0,0 +1,115 @@
+# data_feed/candle_store.py
+# [NEW] 웹소켓 체결(Trade)로 1분봉을 로컬에서 직접 생성 (REST get_ohlcv 반복 호출 제거)
+
+from collections import deque
+import pandas as pd
+import clock
+import config
+from data_feed.rest_client import get_client
+
+# 캔들 한 개 = [분 시작 시각(epoch 초), open, high, low, close, volume, value]
+TS, OPEN, HIGH, LOW, CLOSE, VOLUME, VALUE = range(7)
+KST_OFFSET = 9 * 3600
+
+
+class CandleStore:
+    def __init__(self, maxlen=None, history=None):
+        self.maxlen = maxlen or config.OHLCV_COUNT
+        self.history = history  # CandleHistory (있으면 로컬 저장소 + 빠진 캔들만 REST 조회)
+        self.candles = {}     # {ticker: deque([candle, ...])}
+        self.seeded = set()   # REST 시딩이 끝난 종목
+        self.generation = {}  # {ticker: 시딩 횟수} -> 지표 엔진 재구성 판단용
+
+    # -----------------------------------------------------------
+    # 🌱 시딩 (시작 시 1회 REST 조회)
+    # -----------------------------------------------------------
+    def seed(self, ticker):
+        """REST로 최근 캔들을 한 번 받아와 저장소를 채움"""
+        if config.OFFLINE_MODE: return False
+        try:
+            if self.history is not None:
+                self.history.update(ticker, "minute1", min_bars=self.maxlen, max_bars=self.maxlen)
+                df = self.history.get_ohlcv(ticker, "minute1", count=self.maxlen, with_partial=True)
+            else:
+                df = get_client().get_ohlcv(ticker, interval="minute1", count=self.maxlen)
+        except Exception:
+            df = None
+        if df is None or df.empty:
+            return False
+
+        rows = deque(maxlen=self.maxlen)
+        for idx, row in df.iterrows():
+            # pyupbit 인덱스는 KST naive datetime -> epoch 초로 변환
+            ts = int(pd.Timestamp(idx).timestamp()) - KST_OFFSET
+            rows.append([ts, float(row['open']), float(row['high']), float(row['low']),
+                         float(row['close']), float(row['volume']), float(row.get('value', 0.0))])
+        self.candles[ticker] = rows
+        self.seeded.add(ticker)
+        self.generation[ticker] = self.generation.get(ticker, 0) + 1
+        return True
+
+    def fill_gaps(self, ticker):
+        """오래 꺼져 있던 동안 시딩(max_bars)이 건너뛴 과거 구간 채우기 (시딩 후 백그라운드)"""
+        if self.history is None: return 0
+        try:
+            return self.history.fill_gaps(ticker, "minute1")
+        except Exception as e:
+            print(f"⚠️ [CandleStore] {ticker} 공백 채우기 실패: {e}")
+            return 0
+
+    def mark_stale(self):
+        """웹소켓 끊김 등으로 공백이 생기면 다음 접속 때 재시딩하도록 표시"""
+        self.seeded.clear()
+
+    def is_ready(self, ticker):
+        # 오프라인(리플레이)에서는 체결로만 만든 캔들도 사용
+        return (config.OFFLINE_MODE or ticker in self.seeded) and bool(self.candles.get(ticker))
+
+    # -----------------------------------------------------------
+    # ⚡ 체결 반영 (웹소켓 trade 메시지마다 호출)
+    # -----------------------------------------------------------
+    def update_trade(self, ticker, price, volume, ts=None):
+        """
+        체결 1건을 해당 분봉에 반영
+        :param ts: 체결 시각 (epoch 초). 없으면 현재 시각 사용
+        """
+        if ts is None:
+            ts = clock.time()
+        minute = int(ts // 60) * 60
+
+        rows = self.candles.get(ticker)
+        if rows is None:
+            rows = self.candles[ticker] = deque(maxlen=self.maxlen)
+
+        if rows and rows[-1][TS] == minute:
+            c = rows[-1]
+            if price > c[HIGH]: c[HIGH] = price
+            if price < c[LOW]: c[LOW] = price
+            c[CLOSE] = price
+            c[VOLUME] += volume
+            c[VALUE] += price * volume
+        elif not rows or minute > rows[-1][TS]:
+            rows.append([minute, price, price, price, price, volume, price * volume])
+        # (지난 분봉으로 늦게 도착한 체결은 무시)
+
+    # -----------------------------------------------------------
+    # 📊 조회 (네트워크 호출 없음)
+    # -----------------------------------------------------------
+    def get_rows(self, ticker):
+        """내부 캔들 deque 그대로 리턴 (읽기 전용으로 사용할 것)"""
+        return self.candles.get(ticker)
+
+    def get_ohlcv(self, ticker, count=None):
+        """pyupbit.get_ohlcv 와 같은 모양의 DataFrame 리턴 (준비 안 됐으면 None)"""
+        if not self.is_ready(ticker):
+            return None
+        rows = list(self.candles[ticker])
+        if count:
+            rows = rows[-count:]
+
+        index = pd.to_datetime([r[TS] + KST_OFFSET for r in rows], unit='s')
+        return pd.DataFrame(
+            [r[OPEN:] for r in rows],
+            index=index,
+            columns=['open', 'high', 'low', 'close', 'volume', 'value']
+        )
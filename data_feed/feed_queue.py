@@ -0,0 +1,59 @@
+# data_feed/feed_queue.py
+# [NEW] 웹소켓 수신부와 처리부 사이의 bounded 큐
+# - ticker: 종목별 최신값만 유지 (밀린 가격은 덮어씀 = coalescing)
+# - trade / orderbook: 한 건도 버리지 않음 (큐가 차면 수신부가 대기)
+
+import asyncio
+import config
+
+COALESCE_KINDS = ("upbit_ticker", "binance_ticker")
+
+
+class FeedQueue:
+    def __init__(self, maxsize=None):
+        self.queue = asyncio.Queue(maxsize=maxsize or config.FEED_QUEUE_SIZE)
+        self.latest = {}        # {(kind, key): (msg, recv_ts)} 처리 대기 중인 최신 ticker
+        self.enqueued = 0       # 큐에 들어간 건수
+        self.processed = 0      # 소비부가 꺼내간 건수
+        self.coalesced = 0      # 새 값에 덮여 버려진 ticker 건수
+        self.blocked = 0        # 큐가 가득 차서 수신부가 기다린 횟수
+        self.max_depth = 0
+
+    async def put(self, kind, key, msg, recv_ts):
+        """수신부: 디코딩된 메시지 1건 투입"""
+        if kind in COALESCE_KINDS:
+            slot = (kind, key)
+            pending = slot in self.latest
+            self.latest[slot] = (msg, recv_ts)
+            if pending:
+                self.coalesced += 1  # 이미 대기 중인 자리만 최신값으로 교체
+                return
+            item = (kind, key, None, None)
+        else:
+            item = (kind, key, msg, recv_ts)
+
+        if self.queue.full():
+            self.blocked += 1
+        await self.queue.put(item)
+        self.enqueued += 1
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    async def get(self):
+        """소비부: (kind, key, msg, recv_ts) 꺼내기"""
+        kind, key, msg, recv_ts = await self.queue.get()
+        if msg is None:
+            msg, recv_ts = self.latest.pop((kind, key))
+        self.processed += 1
+        return kind, key, msg, recv_ts
+
+    def stats(self):
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+        }
@@ -0,0 +1,50 @@
+# data_feed/latency.py
+# [NEW] 거래소 이벤트 시각 -> 로컬 수신 시각 지연(feed lag) 측정 (거래소별 / 종목별 p50, p99)
+
+from collections import deque
+import config
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values: return None
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class FeedLatency:
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen or config.LATENCY_SAMPLE_SIZE
+        self.samples = {}  # {"upbit": deque, "upbit:KRW-BTC": deque, ...} 단위 ms
+
+    def _bucket(self, key):
+        q = self.samples.get(key)
+        if q is None:
+            q = self.samples[key] = deque(maxlen=self.maxlen)
+        return q
+
+    def record(self, venue, ticker, exchange_ts, recv_ts):
+        """
+        지연 1건 기록
+        :param exchange_ts: 거래소 이벤트 시각 (epoch 초)
+        :param recv_ts: 로컬 수신 시각 (epoch 초)
+        Return: 지연(ms)
+        """
+        lag_ms = (recv_ts - exchange_ts) * 1000
+        self._bucket(venue).append(lag_ms)
+        self._bucket(f"{venue}:{ticker}").append(lag_ms)
+        return lag_ms
+
+    def percentiles(self, key):
+        q = self.samples.get(key)
+        if not q: return None
+        values = sorted(q)
+        return {
+            "p50": round(_percentile(values, 50), 1),
+            "p99": round(_percentile(values, 99), 1),
+            "max": round(values[-1], 1),
+            "n": len(values),
+        }
+
+    def summary(self):
+        """{venue 또는 venue:ticker: {p50, p99, max, n}}"""
+        return {key: self.percentiles(key) for key in self.samples}
@@ -3,8 +3,9 @@ import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
-import time
 import logging
+import clock
+import config
 
 class MacroClient:
     def __init__(self):
@@ -16,8 +17,10 @@ class MacroClient:
 
     def fetch_events(self):
         """경제 캘린더 데이터를 가져와서 중요 이벤트(USD, High Impact)만 필터링"""
+        if config.OFFLINE_MODE: return # 리플레이 중에는 외부 호출 금지
+
         # 하루에 한 번만 업데이트 (API 호출 제한 방지)
-        if self.last_update and datetime.now() - self.last_update < timedelta(hours=6):
+        if self.last_update and clock.now() - self.last_update < timedelta(hours=6):
             return
 
         try:
@@ -45,7 +48,7 @@ class MacroClient:
                         # self.events.append(parsed_datetime)
                         pass
                 
-                self.last_update = datetime.now()
+                self.last_update = clock.now()
                 print(f"📅 [Macro] 경제지표 데이터 업데이트 완료 (이벤트 {len(self.events)}개)")
                 
         except Exception as e:
@@ -60,7 +63,7 @@ class MacroClient:
         if not self.events:
             self.fetch_events()
             
-        now = datetime.now()
+        now = clock.now()
         
         # 나스닥 개장 시간 (한국 시간 23:30 / 썸머타임 22:30) 회피
         # 간단하게 23:20 ~ 23:40 사이를 위험 구간으로 설정
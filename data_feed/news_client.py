@@ -0,0 +1,171 @@
+# data_feed/news_client.py
+# [NEW] 뉴스(CryptoPanic) / 공포탐욕지수(FNG) 수집기 - 백그라운드 갱신 + TTL 캐시
+#
+# - requests.Session 으로 연결 재사용
+# - 조건부 요청: ETag / Last-Modified 를 기억했다가 304(변경 없음)면 캐시 값 유지
+# - 백그라운드 스레드가 TTL 이 끝나기 전에 미리 갱신 -> 튜너는 대기 없이 캐시 값 사용
+# - 마지막 값은 파일에 저장 (재시작 직후에도 바로 사용)
+
+import json
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+import clock
+import config
+
+NEWS_URL = "https://cryptopanic.com/api/developer/v2/posts/"
+FNG_URL = "https://api.alternative.me/fng/"
+
+
+def _parse_news(data):
+    if 'results' not in data: return None
+    news_list = [post['title'] for post in data['results']]
+    if not news_list: return "No news found."
+    return "\n".join(news_list)
+
+
+def _parse_fng(data):
+    return int(data['data'][0]['value'])
+
+
+class NewsClient:
+    def __init__(self, path=None):
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.path = config.NEWS_CACHE_FILE if path is None else path
+        self.interval = config.NEWS_REFRESH_SEC
+
+        # {이름: (URL, 파라미터 함수, 파서, TTL, 타임아웃)}
+        self.sources = {
+            "news": (NEWS_URL, self._news_params, _parse_news, config.NEWS_TTL, 10),
+            "fng": (FNG_URL, lambda: None, _parse_fng, config.FNG_TTL, 5),
+        }
+        self.cache = {}  # {이름: {"value", "fetched", "etag", "modified"}}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.fetches = 0
+        self.not_modified = 0
+        self.errors = 0
+        self.load()
+
+    @staticmethod
+    def _news_params():
+        return {"auth_token": config.CRYPTOPANIC_API_KEY, "public": "true", "filter": "hot", "kind": "news"}
+
+    # -----------------------------------------------------------
+    # 🌐 조건부 요청
+    # -----------------------------------------------------------
+    def refresh(self, name):
+        """원격에서 갱신 (304 면 기존 값 유지). 성공하면 True"""
+        if config.OFFLINE_MODE: return False # 리플레이 중에는 외부 호출 금지
+        url, params, parser, _, timeout = self.sources[name]
+        with self._lock:
+            entry = dict(self.cache.get(name, {}))
+
+        headers = {}
+        if entry.get("value") is not None:
+            if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+            if entry.get("modified"): headers["If-Modified-Since"] = entry["modified"]
+        try:
+            resp = self.session.get(url, params=params(), headers=headers, timeout=timeout)
+            if resp.status_code == 304:
+                self.not_modified += 1
+            elif resp.status_code == 200:
+                value = parser(resp.json())
+                if value is None: raise ValueError("unexpected response")
+                entry.update(value=value, etag=resp.headers.get("ETag"), modified=resp.headers.get("Last-Modified"))
+                self.fetches += 1
+            else:
+                raise ValueError(f"HTTP {resp.status_code}")
+        except Exception as e:
+            self.errors += 1
+            print(f"⚠️ [News] {name} 갱신 실패: {e}")
+            return False
+
+        entry["fetched"] = clock.time()
+        with self._lock:
+            self.cache[name] = entry
+        self.save()
+        return True
+
+    def _age(self, name):
+        entry = self.cache.get(name)
+        if not entry or entry.get("value") is None: return float("inf")
+        return clock.time() - entry["fetched"]
+
+    def get(self, name):
+        """캐시 값 (만료됐으면 즉시 갱신 시도, 실패하면 이전 값 / 없으면 None)"""
+        if self._age(name) >= self.sources[name][3]:
+            self.refresh(name)
+        with self._lock:
+            entry = self.cache.get(name)
+        return entry.get("value") if entry else None
+
+    def get_news(self):
+        return self.get("news")
+
+    def get_fng(self):
+        return self.get("fng")
+
+    # -----------------------------------------------------------
+    # 🔄 백그라운드 갱신
+    # -----------------------------------------------------------
+    def start(self):
+        if self._thread is not None or config.OFFLINE_MODE: return
+        self._thread = threading.Thread(target=self._run, name="news-refresher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            for name, source in self.sources.items():
+                # 다음 점검 전에 만료될 항목은 미리 갱신
+                if name == "news" and not config.CRYPTOPANIC_API_KEY: continue
+                if self._age(name) >= source[3] - self.interval:
+                    self.refresh(name)
+            time.sleep(self.interval)
+
+    # -----------------------------------------------------------
+    # 💾 파일 저장 / 불러오기
+    # -----------------------------------------------------------
+    def save(self):
+        if not self.path: return
+        try:
+            with self._lock:
+                snapshot = dict(self.cache)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"⚠️ [News] 캐시 저장 실패: {e}")
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path): return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.cache = {k: v for k, v in json.load(f).items() if k in self.sources}
+        except Exception as e:
+            print(f"⚠️ [News] 캐시 불러오기 실패: {e}")
+
+    def stats(self):
+        return {
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "age": {name: round(self._age(name), 1) for name in self.sources},
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_news_client():
+    """프로세스 공용 수집기 (처음 호출 시 생성)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = NewsClient()
+        return _client
@@ -0,0 +1,63 @@
+# data_feed/orderbook.py
+# [NEW] 업비트 orderbook 웹소켓으로 유지하는 종목별 로컬 호가창 (REST get_orderbook 대체)
+
+import clock
+import config
+
+
+# -----------------------------------------------------------
+# 호가창 dict(pyupbit.get_orderbook 모양) 공용 계산 함수
+# -----------------------------------------------------------
+def depth_sums(orderbook, n):
+    """상위 n호가 잔량 합 -> (ask_size, bid_size)"""
+    units = orderbook['orderbook_units'][:n]
+    return sum(u['ask_size'] for u in units), sum(u['bid_size'] for u in units)
+
+
+def ask_notional(orderbook, n):
+    """상위 n호가 매도 잔량 금액 합 (원)"""
+    return sum(u['ask_size'] * u['ask_price'] for u in orderbook['orderbook_units'][:n])
+
+
+def best_bid_ask(orderbook):
+    """최우선 (매수호가, 매도호가)"""
+    top = orderbook['orderbook_units'][0]
+    return top['bid_price'], top['ask_price']
+
+
+class OrderBookStore:
+    def __init__(self, max_age=None):
+        self.max_age = config.ORDERBOOK_MAX_AGE if max_age is None else max_age
+        self.books = {}  # {ticker: {"market", "timestamp", "received", "orderbook_units"}}
+
+    def update(self, code, data, recv_ts=None):
+        """웹소켓 orderbook 메시지(전체 스냅샷) 반영"""
+        units = data.get('orderbook_units')
+        if not units: return
+        self.books[code] = {
+            "market": code,
+            "timestamp": data.get('timestamp'),
+            "received": recv_ts if recv_ts is not None else clock.time(),
+            "total_ask_size": data.get('total_ask_size'),
+            "total_bid_size": data.get('total_bid_size'),
+            "orderbook_units": units,
+        }
+
+    def get(self, ticker, max_age=None):
+        """최신 호가창 리턴 (없거나 max_age 초보다 오래됐으면 None)"""
+        book = self.books.get(ticker)
+        if book is None: return None
+        limit = self.max_age if max_age is None else max_age
+        if limit and clock.time() - book['received'] > limit:
+            return None
+        return book
+
+    def depth_sums(self, ticker, n=None):
+        book = self.get(ticker)
+        if book is None: return None
+        return depth_sums(book, n or config.OB_DEPTH_COUNT)
+
+    def best_bid_ask(self, ticker):
+        book = self.get(ticker)
+        if book is None: return None
+        return best_bid_ask(book)
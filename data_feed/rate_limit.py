@@ -0,0 +1,74 @@
+# data_feed/rate_limit.py
+# [NEW] 토큰 버킷 요청 제한기 - 업비트 초당 요청 한도를 여러 스레드가 공유
+# (실제 시간 기준이므로 clock 모듈이 아닌 time.monotonic 사용)
+
+import threading
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        :param rate: 초당 충전 토큰 수 (= 초당 허용 요청 수)
+        :param capacity: 최대 누적 토큰 (순간 허용량, 기본 rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.penalties = 0
+        self.priority_waiting = 0  # 대기 중인 우선(주문) 요청 수 - 있으면 일반 요청은 양보
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, n=1, priority=False):
+        """
+        토큰 n개를 얻을 때까지 대기 -> 대기한 시간(초)
+        :param priority: True 면 우선 요청 (대기 중에는 일반 요청이 토큰을 가져가지 못함)
+        """
+        waited = 0.0
+        if priority:
+            with self.lock:
+                self.priority_waiting += 1
+        try:
+            while True:
+                with self.lock:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self.tokens >= n and (priority or self.priority_waiting == 0):
+                        self.tokens -= n
+                        self.acquired += 1
+                        if waited:
+                            self.waits += 1
+                            self.wait_seconds += waited
+                        return waited
+                    delay = max((n - self.tokens) / self.rate, 0.005)
+                time.sleep(delay)
+                waited += delay
+        finally:
+            if priority:
+                with self.lock:
+                    self.priority_waiting -= 1
+
+    def penalize(self, seconds):
+        """429(요청 초과) 응답 시 버킷을 비워 모든 사용자가 seconds 초 쉬도록 함"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+            self.penalties += 1
+
+    def stats(self):
+        return {
+            "rate": self.rate,
+            "acquired": self.acquired,
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "penalties": self.penalties,
+            "tokens": round(self.tokens, 2),
+        }
@@ -0,0 +1,170 @@
+# data_feed/recorder.py
+# [NEW] 원본 시세 녹화기 - 웹소켓 수신 메시지를 압축 append-only 바이너리 파일로 저장
+#
+# 파일 구조 (*.rec)
+#   [MAGIC 8바이트] + 레코드 반복
+#   레코드 = [헤더 13바이트: recv_ts(double) / kind(uint8) / 길이(uint32)] + [zlib 압축 payload]
+# 헤더는 압축하지 않으므로 mmap 으로 열어 헤더만 건너뛰며 하루치도 빠르게 훑을 수 있음
+
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+import config
+
+MAGIC = b"OCTREC1\n"
+HEADER = struct.Struct("<dBI")
+
+KIND_UPBIT = 1     # 업비트 ticker / trade / orderbook 원본 JSON
+KIND_BINANCE = 2   # 바이낸스 ticker 원본 JSON
+
+# 레코드별 압축률을 높이기 위한 공용 사전 (자주 나오는 키 모음 - 바꾸면 기존 파일을 못 읽음)
+ZDICT = (
+    b'{"type":"orderbook","code":"KRW-","timestamp":,"total_ask_size":,"total_bid_size":,'
+    b'"orderbook_units":[{"ask_price":,"bid_price":,"ask_size":,"bid_size":},'
+    b'{"type":"trade","code":"KRW-","trade_price":,"trade_volume":,"ask_bid":"BID","ASK",'
+    b'"prev_closing_price":,"change":"RISE","FALL","EVEN","change_price":,"trade_date":,"trade_time":,'
+    b'"trade_timestamp":,"sequential_id":,"stream_type":"REALTIME","SNAPSHOT",'
+    b'{"type":"ticker","code":"KRW-","opening_price":,"high_price":,"low_price":,"trade_price":,'
+    b'"acc_trade_volume_24h":,"acc_trade_price_24h":,"signed_change_rate":,'
+    b'{"stream":"usdt@ticker","data":{"e":"24hrTicker","E":,"s":"USDT","p":,"P":,"w":,"c":,"Q":,"o":,"h":,"l":,"v":,"q":'
+)
+
+
+class FeedRecorder:
+    def __init__(self, directory=None, rotate_mb=None):
+        self.directory = directory or config.RECORDER_DIR
+        self.rotate_bytes = int((rotate_mb or config.RECORDER_ROTATE_MB) * 1024 * 1024)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._queue = queue.SimpleQueue()
+        self._file = None
+        self._path = None
+        self._hour = None
+        self.records = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.errors = 0
+
+        self._thread = threading.Thread(target=self._writer, name="feed-recorder", daemon=True)
+        self._thread.start()
+
+    # -----------------------------------------------------------
+    # 🎙️ 녹화 (라이브 루프에서 호출 - 큐에 넣기만 함)
+    # -----------------------------------------------------------
+    def record(self, kind, recv_ts, raw):
+        """수신 원본 메시지(bytes 또는 str) 1건 녹화 요청"""
+        self._queue.put((recv_ts, kind, raw))
+
+    def close(self):
+        """남은 레코드를 모두 기록한 뒤 종료"""
+        self._queue.put(None)
+        self._thread.join()
+
+    # -----------------------------------------------------------
+    # 💾 백그라운드 기록 스레드
+    # -----------------------------------------------------------
+    def _open(self, now):
+        if self._file:
+            self._file.close()
+        stamp = datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S")
+        self._path = os.path.join(self.directory, f"feed_{stamp}.rec")
+        self._file = open(self._path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        self._hour = int(now // 3600)
+
+    def _writer(self):
+        last_flush = time.time()
+        while True:
+            try:
+                item = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                item = False
+            now = time.time()
+
+            if item is None:
+                break
+            if item:
+                recv_ts, kind, raw = item
+                try:
+                    if isinstance(raw, str):
+                        raw = raw.encode("utf-8")
+                    # 시간(hour)이 바뀌거나 파일이 커지면 새 파일로 교체
+                    if self._file is None or int(recv_ts // 3600) != self._hour or self._file.tell() >= self.rotate_bytes:
+                        self._open(recv_ts)
+                    comp = zlib.compressobj(level=1, zdict=ZDICT)
+                    payload = comp.compress(raw) + comp.flush()
+                    self._file.write(HEADER.pack(recv_ts, kind, len(payload)))
+                    self._file.write(payload)
+                    self.records += 1
+                    self.raw_bytes += len(raw)
+                    self.written_bytes += HEADER.size + len(payload)
+                except Exception as e:
+                    self.errors += 1
+                    if self.errors <= 3:
+                        print(f"⚠️ [Recorder] 기록 실패: {e}")
+
+            if self._file and now - last_flush >= 1.0:
+                self._file.flush()
+                last_flush = now
+
+        if self._file:
+            self._file.close()
+
+    def stats(self):
+        return {
+            "file": self._path,
+            "records": self.records,
+            "pending": self._queue.qsize(),
+            "raw_bytes": self.raw_bytes,
+            "written_bytes": self.written_bytes,
+            "errors": self.errors,
+        }
+
+
+# -----------------------------------------------------------
+# 📼 읽기 (mmap)
+# -----------------------------------------------------------
+def iter_records(path, kinds=None, decode=True):
+    """
+    녹화 파일 1개 순회 -> (recv_ts, kind, payload)
+    :param kinds: 특정 kind 만 (None=전체). 헤더만 보고 건너뛰므로 압축 해제 비용 없음
+    :param decode: False 면 압축된 payload 그대로 리턴
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= len(MAGIC):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"녹화 파일 형식 아님: {path}")
+            pos, end = len(MAGIC), len(mm)
+            while pos + HEADER.size <= end:
+                recv_ts, kind, length = HEADER.unpack_from(mm, pos)
+                pos += HEADER.size
+                if pos + length > end:
+                    break  # 기록 중이던 마지막 레코드 (불완전)
+                if kinds is None or kind in kinds:
+                    payload = mm[pos:pos + length]
+                    if decode:
+                        d = zlib.decompressobj(zdict=ZDICT)
+                        payload = d.decompress(payload) + d.flush()
+                    yield recv_ts, kind, payload
+                pos += length
+
+
+def list_recordings(directory=None):
+    """녹화 파일 목록 (시간순)"""
+    directory = directory or config.RECORDER_DIR
+    if not os.path.isdir(directory): return []
+    return sorted(os.path.join(directory, n) for n in os.listdir(directory) if n.endswith(".rec"))
+
+
+def iter_recordings(paths=None, kinds=None):
+    """여러 녹화 파일을 순서대로 순회"""
+    for path in (paths if paths is not None else list_recordings()):
+        yield from iter_records(path, kinds)
@@ -0,0 +1,265 @@
+# data_feed/rest_client.py
+# [NEW] 업비트 REST 공용 클라이언트 - 커넥션 유지(Session) + 전역 요청 한도 관리(governor)
+#
+# - 시세(quotation) API: requests.Session 으로 직접 호출 (연결 재사용)
+# - 거래(exchange) API: 같은 Session 으로 직접 호출 + 버킷 (JWT 서명만 pyupbit 의 _request_headers 사용)
+# - 버킷: quotation(시세) / exchange(잔고·주문조회) / order(주문 생성·취소)
+#   주문 경로 호출은 priority=True -> 같은 버킷을 기다리는 데이터 조회보다 먼저 토큰을 받음
+# - 429 응답 시 버킷을 비우고 재시도 (시세/거래 API 모두), 엔드포인트별 지연(p50/p99)·429 횟수 집계
+
+import threading
+import time
+from collections import deque
+import pandas as pd
+import pyupbit
+import requests
+from requests.adapters import HTTPAdapter
+import config
+from data_feed.latency import _percentile
+from data_feed.rate_limit import TokenBucket
+
+BASE_URL = "https://api.upbit.com/v1"
+
+# pyupbit 주문 메서드 -> order 버킷 (나머지 거래 메서드는 exchange 버킷)
+ORDER_METHODS = {"buy_limit_order", "sell_limit_order", "buy_market_order", "sell_market_order", "cancel_order"}
+
+# 직접 호출하는 거래 API: pyupbit 메서드 이름 -> (HTTP 메서드, 경로, 인자 -> 요청 파라미터)
+EXCHANGE_API = {
+    "get_balances": ("GET", "/accounts", lambda: None),
+    "get_order": ("GET", "/order", lambda uuid: {"uuid": uuid}),
+    "cancel_order": ("DELETE", "/order", lambda uuid: {"uuid": uuid}),
+    "buy_limit_order": ("POST", "/orders", lambda ticker, price, volume: {
+        "market": ticker, "side": "bid", "volume": str(volume), "price": str(price), "ord_type": "limit"}),
+    "sell_limit_order": ("POST", "/orders", lambda ticker, price, volume: {
+        "market": ticker, "side": "ask", "volume": str(volume), "price": str(price), "ord_type": "limit"}),
+    "buy_market_order": ("POST", "/orders", lambda ticker, price: {
+        "market": ticker, "side": "bid", "price": str(price), "ord_type": "price"}),
+    "sell_market_order": ("POST", "/orders", lambda ticker, volume: {
+        "market": ticker, "side": "ask", "volume": str(volume), "ord_type": "market"}),
+}
+
+
+def _candle_path(interval):
+    """pyupbit interval 이름 -> 캔들 API 경로"""
+    if interval.startswith("minute"):
+        return f"/candles/minutes/{interval[6:] or 1}"
+    if interval in ("day", "days"): return "/candles/days"
+    if interval in ("week", "weeks"): return "/candles/weeks"
+    if interval in ("month", "months"): return "/candles/months"
+    raise ValueError(f"지원하지 않는 interval: {interval}")
+
+
+class UpbitRestClient:
+    def __init__(self, access_key=None, secret_key=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=config.REST_POOL_SIZE)
+        self.session.mount("https://", adapter)
+
+        self.quotation = TokenBucket(config.UPBIT_QUOTATION_RPS)
+        self.exchange_bucket = TokenBucket(config.UPBIT_EXCHANGE_RPS)
+        self.order_bucket = TokenBucket(config.UPBIT_ORDER_RPS)
+
+        self.upbit = None
+        if access_key and secret_key:
+            self.upbit = pyupbit.Upbit(access_key, secret_key)
+
+        self._lock = threading.Lock()
+        self.endpoints = {}  # {이름: {"calls", "errors", "throttled", "latency": deque(ms)}}
+
+    # -----------------------------------------------------------
+    # 📊 통계
+    # -----------------------------------------------------------
+    def _record(self, name, elapsed, error=False, throttled=False):
+        with self._lock:
+            ep = self.endpoints.get(name)
+            if ep is None:
+                ep = self.endpoints[name] = {
+                    "calls": 0, "errors": 0, "throttled": 0,
+                    "latency": deque(maxlen=config.LATENCY_SAMPLE_SIZE),
+                }
+            ep["calls"] += 1
+            if error: ep["errors"] += 1
+            if throttled: ep["throttled"] += 1
+            ep["latency"].append(elapsed * 1000)
+
+    def stats(self):
+        """{엔드포인트: {calls, errors, throttled, p50, p99}} + 버킷 상태"""
+        with self._lock:
+            endpoints = {}
+            for name, ep in self.endpoints.items():
+                values = sorted(ep["latency"])
+                endpoints[name] = {
+                    "calls": ep["calls"],
+                    "errors": ep["errors"],
+                    "throttled": ep["throttled"],
+                    "p50": round(_percentile(values, 50), 1) if values else None,
+                    "p99": round(_percentile(values, 99), 1) if values else None,
+                }
+        return {
+            "endpoints": endpoints,
+            "buckets": {
+                "quotation": self.quotation.stats(),
+                "exchange": self.exchange_bucket.stats(),
+                "order": self.order_bucket.stats(),
+            },
+        }
+
+    # -----------------------------------------------------------
+    # 🌐 시세 API (Session 직접 호출)
+    # -----------------------------------------------------------
+    def _get(self, name, path, params=None, priority=False):
+        """시세 GET -> JSON (실패 시 None). 429 는 버킷을 비우고 재시도"""
+        for attempt in range(config.REST_MAX_RETRY + 1):
+            self.quotation.acquire(priority=priority)
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(BASE_URL + path, params=params, timeout=config.REST_TIMEOUT)
+            except requests.RequestException:
+                self._record(name, time.perf_counter() - started, error=True)
+                continue
+            elapsed = time.perf_counter() - started
+
+            if resp.status_code == 429:
+                self._record(name, elapsed, throttled=True)
+                self.quotation.penalize(0.5 * (attempt + 1))
+                continue
+            if resp.status_code != 200:
+                self._record(name, elapsed, error=True)
+                return None
+
+            self._record(name, elapsed)
+            # 남은 요청 수가 0 이면 이번 초는 더 보내지 않음
+            remain = resp.headers.get("Remaining-Req", "")
+            if "sec=0" in remain.replace(" ", ""):
+                self.quotation.penalize(0)
+            try:
+                return resp.json()
+            except ValueError:
+                return None
+        return None
+
+    def get_ohlcv(self, ticker, interval="minute1", count=200, to=None, priority=False):
+        """pyupbit.get_ohlcv 와 같은 모양 DataFrame (KST 인덱스, 없으면 None)"""
+        path = _candle_path(interval)
+        frames, remain = [], max(int(count), 1)
+        while remain > 0:
+            params = {"market": ticker, "count": min(200, remain)}
+            if to is not None:
+                params["to"] = to
+            data = self._get("candles", path, params, priority)
+            if not data: break
+            frames.append(pd.DataFrame({
+                "open": [c["opening_price"] for c in data],
+                "high": [c["high_price"] for c in data],
+                "low": [c["low_price"] for c in data],
+                "close": [c["trade_price"] for c in data],
+                "volume": [c["candle_acc_trade_volume"] for c in data],
+                "value": [c["candle_acc_trade_price"] for c in data],
+            }, index=pd.to_datetime([c["candle_date_time_kst"] for c in data])))
+            remain -= len(data)
+            if len(data) < params["count"]: break
+            to = data[-1]["candle_date_time_utc"].replace("T", " ")
+        if not frames: return None
+        df = pd.concat(frames).sort_index()
+        return df[~df.index.duplicated(keep="last")]
+
+    def get_orderbook(self, ticker, priority=False):
+        """호가창 1종목 (pyupbit.get_orderbook 모양 dict, 실패 시 None)"""
+        data = self._get("orderbook", "/orderbook", {"markets": ticker}, priority)
+        return data[0] if data else None
+
+    def get_tickers(self, fiat="KRW"):
+        data = self._get("market_all", "/market/all")
+        if not data: return []
+        return [m["market"] for m in data if m["market"].startswith(f"{fiat}-")]
+
+    def get_ticker(self, markets):
+        """현재가 스냅샷 리스트 (/ticker)"""
+        return self._get("ticker", "/ticker", {"markets": ",".join(markets)}) or []
+
+    # -----------------------------------------------------------
+    # 💳 거래 API (pyupbit.Upbit 경유)
+    # -----------------------------------------------------------
+    def exchange(self, method, *args, priority=False, **kwargs):
+        """
+        거래 API 호출 (pyupbit.Upbit 메서드 이름/인자 그대로)
+        EXCHANGE_API 에 있는 메서드는 공용 Session 으로 직접 호출 (서명만 pyupbit 의 _request_headers 사용)
+        -> pyupbit 가 삼키던 429/네트워크 오류를 상태 코드로 보고 _get 과 같이 버킷을 비우고 재시도
+        주문 생성/취소는 order 버킷 + 항상 우선, 나머지는 exchange 버킷
+        연결 오류 재시도는 조회 메서드만 (주문은 접수됐을 수 있으므로 재전송 안 함)
+        Return: 응답 JSON (4xx 는 {"error": {...}}), 연결 실패/5xx 는 None
+        """
+        if self.upbit is None:
+            raise RuntimeError("업비트 API 키가 없습니다.")
+        if method in ORDER_METHODS:
+            bucket, priority = self.order_bucket, True
+        else:
+            bucket = self.exchange_bucket
+        if method not in EXCHANGE_API:
+            return self._exchange_pyupbit(method, bucket, priority, *args, **kwargs)
+
+        verb, path, build = EXCHANGE_API[method]
+        query = build(*args, **kwargs)
+        for attempt in range(config.REST_MAX_RETRY + 1):
+            bucket.acquire(priority=priority)
+            headers = self.upbit._request_headers(query)  # nonce 가 매번 달라야 하므로 시도마다 서명
+            started = time.perf_counter()
+            try:
+                if verb == "POST":
+                    resp = self.session.post(BASE_URL + path, json=query, headers=headers, timeout=config.REST_TIMEOUT)
+                else:
+                    resp = self.session.request(verb, BASE_URL + path, params=query, headers=headers,
+                                                timeout=config.REST_TIMEOUT)
+            except requests.RequestException:
+                self._record(method, time.perf_counter() - started, error=True)
+                if method in ORDER_METHODS: return None
+                continue
+            elapsed = time.perf_counter() - started
+
+            if resp.status_code == 429:
+                self._record(method, elapsed, throttled=True)
+                bucket.penalize(0.5 * (attempt + 1))
+                continue
+            remain = resp.headers.get("Remaining-Req", "")
+            if "sec=0" in remain.replace(" ", ""):
+                bucket.penalize(0)
+            try:
+                data = resp.json()
+            except ValueError:
+                data = None
+            if resp.status_code >= 500:
+                self._record(method, elapsed, error=True)
+                if method in ORDER_METHODS: return None
+                continue
+            self._record(method, elapsed, error=resp.status_code >= 400)
+            if resp.status_code >= 400 and not (isinstance(data, dict) and "error" in data):
+                data = {"error": {"name": str(resp.status_code), "message": resp.text[:200]}}
+            return data
+        return None
+
+    def _exchange_pyupbit(self, method, bucket, priority, *args, **kwargs):
+        """EXCHANGE_API 에 없는 메서드 - pyupbit 그대로 (오류를 None 으로 삼키므로 None 은 오류로 집계)"""
+        bucket.acquire(priority=priority)
+        started = time.perf_counter()
+        try:
+            result = getattr(self.upbit, method)(*args, **kwargs)
+        except Exception:
+            self._record(method, time.perf_counter() - started, error=True)
+            raise
+        error = result is None or (isinstance(result, dict) and "error" in result)
+        self._record(method, time.perf_counter() - started, error=error)
+        return result
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """프로세스 공용 클라이언트 (처음 호출 시 생성)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            keys = (config.UPBIT_ACCESS_KEY, config.UPBIT_SECRET_KEY) if not config.IS_SIMULATION else (None, None)
+            _client = UpbitRestClient(*keys)
+        return _client
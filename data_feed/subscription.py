@@ -0,0 +1,61 @@
+# data_feed/subscription.py
+# [NEW] 웹소켓 구독 관리자 - 타겟 집합 비교(diff) 후 끊지 않고 재구독 + 재접속/공백 통계
+
+import time
+
+
+class SubscriptionManager:
+    def __init__(self, venue):
+        self.venue = venue
+        self.active = set()       # 현재 구독 중인 코드(심볼)
+        self.connects = 0         # 총 접속 횟수
+        self.reconnects = 0       # 끊긴 뒤 재접속한 횟수
+        self.resubscribes = 0     # 접속 유지한 채 구독만 바꾼 횟수
+        self.gaps = 0             # 데이터 공백(끊김) 발생 횟수
+        self.gap_seconds = 0.0    # 공백 누적 시간
+        self._down_since = None
+
+    # -----------------------------------------------------------
+    # 🔍 타겟 변경 감지
+    # -----------------------------------------------------------
+    def diff(self, targets):
+        """새 타겟과 현재 구독 비교 -> (추가된 코드, 제거된 코드)"""
+        new = set(targets)
+        return sorted(new - self.active), sorted(self.active - new)
+
+    def has_changed(self, targets):
+        return set(targets) != self.active
+
+    def commit(self, targets, resubscribe=False):
+        """구독 요청을 보낸 뒤 현재 구독 상태 확정"""
+        self.active = set(targets)
+        if resubscribe:
+            self.resubscribes += 1
+
+    # -----------------------------------------------------------
+    # 🔌 접속 상태 기록
+    # -----------------------------------------------------------
+    def on_connect(self):
+        if self.connects > 0:
+            self.reconnects += 1
+        self.connects += 1
+        if self._down_since is not None:
+            self.gaps += 1
+            self.gap_seconds += time.time() - self._down_since
+            self._down_since = None
+
+    def on_disconnect(self):
+        if self._down_since is None:
+            self._down_since = time.time()
+        self.active = set()
+
+    def stats(self):
+        return {
+            "venue": self.venue,
+            "subscribed": len(self.active),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "resubscribes": self.resubscribes,
+            "gaps": self.gaps,
+            "gap_seconds": round(self.gap_seconds, 3),
+        }
@@ -0,0 +1,157 @@
+# data_feed/trade_tape.py
+# [NEW] 종목별 체결 테이프 - 배열 기반 링버퍼 + 시간 구간별 누적합 (O(1) 조회)
+
+from array import array
+import clock
+import config
+
+SIDE_BID = 1    # 매수 체결 (빨간색)
+SIDE_ASK = -1   # 매도 체결 (파란색)
+
+
+class _Window:
+    """최근 N초 구간 누적합 (tail = 구간에 포함된 가장 오래된 체결 번호)"""
+    __slots__ = ("seconds", "tail", "count", "buy_notional", "sell_notional", "buy_volume", "sell_volume")
+
+    def __init__(self, seconds, tail):
+        self.seconds = seconds
+        self.tail = tail
+        self.count = 0
+        self.buy_notional = 0.0
+        self.sell_notional = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+
+
+class TradeTape:
+    def __init__(self, capacity=None, windows=None):
+        self.capacity = capacity or config.TRADE_TAPE_CAPACITY
+        n = self.capacity
+        # struct-of-arrays (체결 시각, 가격, 수량, 주체)
+        self.ts = array('d', bytes(8 * n))
+        self.price = array('d', bytes(8 * n))
+        self.volume = array('d', bytes(8 * n))
+        self.side = array('b', bytes(n))
+        self.head = 0  # 지금까지 들어온 체결 수 (다음 기록 위치 = head % capacity)
+
+        self.windows = {}
+        for seconds in (windows if windows is not None else config.TRADE_TAPE_WINDOWS):
+            self.windows[float(seconds)] = _Window(float(seconds), 0)
+
+    def __len__(self):
+        return min(self.head, self.capacity)
+
+    # -----------------------------------------------------------
+    # ✍️ 기록
+    # -----------------------------------------------------------
+    def append(self, ts, price, volume, side):
+        """
+        체결 1건 기록
+        :param side: 'BID'/'ASK' 문자열 또는 SIDE_BID/SIDE_ASK
+        """
+        if isinstance(side, str):
+            side = SIDE_BID if side == 'BID' else SIDE_ASK
+
+        idx = self.head
+        # 버퍼가 꽉 찼으면 덮어쓸 체결을 모든 구간에서 먼저 제거
+        if idx >= self.capacity:
+            oldest = idx - self.capacity
+            for w in self.windows.values():
+                if w.tail <= oldest:
+                    self._evict_until(w, oldest + 1)
+
+        pos = idx % self.capacity
+        self.ts[pos] = ts
+        self.price[pos] = price
+        self.volume[pos] = volume
+        self.side[pos] = side
+        self.head = idx + 1
+
+        notional = price * volume
+        for w in self.windows.values():
+            w.count += 1
+            if side == SIDE_BID:
+                w.buy_notional += notional
+                w.buy_volume += volume
+            else:
+                w.sell_notional += notional
+                w.sell_volume += volume
+            self._expire(w, ts)
+
+    def _evict_until(self, w, stop):
+        """w.tail 부터 stop 직전까지의 체결을 구간 누적합에서 제외"""
+        cap = self.capacity
+        while w.tail < stop:
+            pos = w.tail % cap
+            notional = self.price[pos] * self.volume[pos]
+            if self.side[pos] == SIDE_BID:
+                w.buy_notional -= notional
+                w.buy_volume -= self.volume[pos]
+            else:
+                w.sell_notional -= notional
+                w.sell_volume -= self.volume[pos]
+            w.count -= 1
+            w.tail += 1
+        if w.count == 0:
+            w.buy_notional = w.sell_notional = w.buy_volume = w.sell_volume = 0.0
+
+    def _expire(self, w, now):
+        """구간(now - seconds) 밖으로 밀려난 체결 제거 (분할상환 O(1))"""
+        limit = now - w.seconds
+        cap = self.capacity
+        stop = w.tail
+        while stop < self.head and self.ts[stop % cap] < limit:
+            stop += 1
+        if stop != w.tail:
+            self._evict_until(w, stop)
+
+    # -----------------------------------------------------------
+    # 📊 조회
+    # -----------------------------------------------------------
+    def _window(self, seconds):
+        seconds = float(seconds)
+        w = self.windows.get(seconds)
+        if w is None:
+            # 처음 보는 구간은 버퍼 전체를 한 번 훑어서 등록 (이후로는 O(1) 유지)
+            w = _Window(seconds, max(0, self.head - self.capacity))
+            for i in range(w.tail, self.head):
+                pos = i % self.capacity
+                notional = self.price[pos] * self.volume[pos]
+                w.count += 1
+                if self.side[pos] == SIDE_BID:
+                    w.buy_notional += notional
+                    w.buy_volume += self.volume[pos]
+                else:
+                    w.sell_notional += notional
+                    w.sell_volume += self.volume[pos]
+            self.windows[seconds] = w
+        return w
+
+    def window_stats(self, seconds, now=None):
+        """
+        최근 N초 집계 -> {buy_notional, sell_notional, buy_volume, sell_volume, count}
+        (now 는 단조 증가 가정 - 한 번 구간 밖으로 밀려난 체결은 다시 포함되지 않음)
+        """
+        w = self._window(seconds)
+        self._expire(w, clock.time() if now is None else now)
+        return {
+            "buy_notional": w.buy_notional,
+            "sell_notional": w.sell_notional,
+            "buy_volume": w.buy_volume,
+            "sell_volume": w.sell_volume,
+            "count": w.count,
+        }
+
+    def buy_notional(self, seconds, now=None):
+        """최근 N초 매수(BID) 체결 금액 합"""
+        return self.window_stats(seconds, now)["buy_notional"]
+
+    def sell_notional(self, seconds, now=None):
+        """최근 N초 매도(ASK) 체결 금액 합"""
+        return self.window_stats(seconds, now)["sell_notional"]
+
+    def last_trade(self):
+        """가장 최근 체결 (ts, price, volume, side) / 없으면 None"""
+        if self.head == 0: return None
+        pos = (self.head - 1) % self.capacity
+        return self.ts[pos], self.price[pos], self.volume[pos], self.side[pos]
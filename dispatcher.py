@@ -0,0 +1,109 @@
+# dispatcher.py
+# [NEW] 이벤트 기반 매매 판단 - 시세/체결 갱신이 온 종목만 즉시 평가 (config.EVENT_DRIVEN)
+#
+# - DataAggregator.subscribe 로 갱신 알림을 받아 종목별 태스크를 깨움
+# - 종목별 디바운스: 직전 평가 후 EVENT_DEBOUNCE_SEC 안에 온 갱신은 한 번으로 합침
+# - 하트비트: 갱신이 없어도 EVENT_HEARTBEAT_SEC 마다 평가 (시간 손절/트레일링 등 시간 기반 청산)
+# - 보유 종목(청산 판단)이 진행 중이면 신규 진입 판단은 끝날 때까지 대기
+
+import asyncio
+import clock
+import config
+
+
+class EventDispatcher:
+    def __init__(self, trading_loop, debounce=None, heartbeat=None):
+        self.loop = trading_loop
+        self.debounce = config.EVENT_DEBOUNCE_SEC if debounce is None else debounce
+        self.heartbeat = heartbeat or config.EVENT_HEARTBEAT_SEC
+
+        self.events = {}     # {ticker: asyncio.Event} - 갱신 알림
+        self.tasks = {}      # {ticker: 종목별 평가 태스크}
+        self.last_eval = {}  # {ticker: 마지막 평가 시각}
+
+        self.exits_running = 0
+        self.exit_idle = asyncio.Event()
+        self.exit_idle.set()
+
+        self.triggers = 0
+        self.coalesced = 0
+        self.evaluations = 0
+        self.heartbeats = 0
+
+    # -----------------------------------------------------------
+    # 📨 알림 (DataAggregator 처리부에서 동기 호출)
+    # -----------------------------------------------------------
+    def on_update(self, ticker, kind):
+        if ticker not in config.TARGET_COINS: return
+        self.triggers += 1
+        event = self._ensure(ticker)
+        if event.is_set():
+            self.coalesced += 1
+        event.set()
+
+    def ensure(self, tickers):
+        """갱신이 없는 종목도 하트비트 평가가 돌도록 태스크 생성"""
+        for ticker in tickers:
+            self._ensure(ticker)
+
+    def _ensure(self, ticker):
+        event = self.events.get(ticker)
+        if event is None:
+            event = self.events[ticker] = asyncio.Event()
+            self.tasks[ticker] = asyncio.create_task(self._worker(ticker))
+        return event
+
+    # -----------------------------------------------------------
+    # 🔁 종목별 평가 태스크
+    # -----------------------------------------------------------
+    def _is_exit(self, ticker):
+        return ticker in self.loop.holdings or self.loop.order_manager.has_pending(ticker)
+
+    async def _worker(self, ticker):
+        event = self.events[ticker]
+        try:
+            while ticker in config.TARGET_COINS:
+                try:
+                    await asyncio.wait_for(event.wait(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    self.heartbeats += 1
+
+                # 디바운스: 직전 평가 직후면 잠시 모았다가 한 번만 평가
+                wait = self.last_eval.get(ticker, 0.0) + self.debounce - clock.time()
+                if wait > 0:
+                    await clock.sleep(wait)
+                event.clear()
+                if self.loop.paused: continue
+
+                is_exit = self._is_exit(ticker)
+                if is_exit:
+                    self.exits_running += 1
+                    self.exit_idle.clear()
+                else:
+                    await self.exit_idle.wait()  # 청산 판단 우선
+                try:
+                    held = await self.loop.evaluate_ticker(ticker)
+                    if held: self.loop.holdings.add(ticker)
+                    else: self.loop.holdings.discard(ticker)
+                except Exception as e:
+                    print(f"\n⚠️ [Dispatch] {ticker} 평가 오류: {e}")
+                finally:
+                    if is_exit:
+                        self.exits_running -= 1
+                        if self.exits_running == 0:
+                            self.exit_idle.set()
+                self.last_eval[ticker] = clock.time()
+                self.evaluations += 1
+        finally:
+            self.events.pop(ticker, None)
+            self.tasks.pop(ticker, None)
+            self.loop.holdings.discard(ticker)
+
+    def stats(self):
+        return {
+            "tickers": len(self.tasks),
+            "triggers": self.triggers,
+            "coalesced": self.coalesced,
+            "evaluations": self.evaluations,
+            "heartbeats": self.heartbeats,
+        }
@@ -0,0 +1,172 @@
+# execution/ledger.py
+# [NEW] 로컬 포지션/현금 장부 - 매매 루프는 장부만 읽음 (종목마다 잔고 REST 조회 X)
+#
+# - 우리 주문 체결(get_order 결과)로 즉시 갱신
+# - 백그라운드 대조: LEDGER_RECONCILE_SEC 마다 get_balances 1회로 거래소 잔고와 맞춤
+#   (체결 반영/취소/시장가 주문 직후에는 mark_dirty 로 바로 대조)
+#   지정가 주문의 체결분은 apply_order 한 곳에서만 더함 (접수 시점 대조 X -> 같은 체결 이중 반영 방지)
+#   체결 확인 중인 주문이 있으면 정기 대조는 미룸 + 조회 중에 apply_order 가 끼어들면 그 스냅샷은 버림
+# - 프라이빗 웹소켓 myAsset 이벤트를 받으면 apply_assets 로 바로 반영 가능
+
+import asyncio
+import threading
+import time
+import config
+
+
+class PositionLedger:
+    def __init__(self, client):
+        self.client = client
+        self._lock = threading.Lock()
+        self.cash = 0.0          # KRW 주문 가능
+        self.cash_locked = 0.0   # KRW 주문 중 묶인 금액
+        self.positions = {}      # {ticker: {"vol", "locked", "avg"}}
+        self.synced_at = None    # 마지막 대조 시각 (time.monotonic)
+        self.reconciles = 0
+        self.drifts = 0          # 대조 시 장부와 거래소가 달랐던 횟수
+        self.deferred = 0        # 체결 확인 중인 주문 때문에 미루거나 버린 대조 횟수
+        self.applied = 0         # apply_order 반영 횟수 (대조 스냅샷이 그 사이 낡았는지 판단)
+        self.in_flight = lambda: False  # 체결 확인 중인 주문 여부 (OrderManager 가 연결)
+        self._dirty = None       # asyncio.Event (run 시작 시 생성)
+
+    # -----------------------------------------------------------
+    # 📖 조회 (매매 루프 - REST 호출 없음)
+    # -----------------------------------------------------------
+    def get_balance(self, ticker="KRW"):
+        with self._lock:
+            if ticker == "KRW": return self.cash
+            return self.positions.get(ticker, {}).get("vol", 0.0)
+
+    def get_avg_buy_price(self, ticker):
+        with self._lock:
+            return self.positions.get(ticker, {}).get("avg", 0.0)
+
+    def total_assets(self, current_prices):
+        with self._lock:
+            total = self.cash + self.cash_locked
+            for ticker, pos in self.positions.items():
+                price = current_prices.get(ticker)
+                if price: total += (pos["vol"] + pos["locked"]) * price
+            return total
+
+    # -----------------------------------------------------------
+    # ✍️ 체결 반영
+    # -----------------------------------------------------------
+    def apply_order(self, order_info):
+        """
+        get_order 응답(체결 내역 포함) 반영 -> 체결 수량/평균가/수수료로 장부 갱신
+        (부분 체결 후 취소도 executed_volume 만큼 반영)
+        """
+        if not order_info: return
+        try:
+            ticker, side = order_info['market'], order_info['side']
+            volume = float(order_info.get('executed_volume') or 0)
+            if volume <= 0: return
+            trades = order_info.get('trades') or []
+            funds = sum(float(t['funds']) for t in trades) if trades else volume * float(order_info.get('price') or 0)
+            fee = float(order_info.get('paid_fee') or 0)
+        except (KeyError, TypeError, ValueError):
+            return
+
+        with self._lock:
+            self.applied += 1
+            pos = self.positions.setdefault(ticker, {"vol": 0.0, "locked": 0.0, "avg": 0.0})
+            if side == "bid":
+                total = pos["vol"] * pos["avg"] + funds
+                pos["vol"] += volume
+                pos["avg"] = total / pos["vol"]
+                self.cash -= funds + fee
+            else:
+                pos["vol"] = max(pos["vol"] - volume, 0.0)
+                self.cash += funds - fee
+                if pos["vol"] <= 0 and pos["locked"] <= 0:
+                    del self.positions[ticker]
+        self.mark_dirty()
+
+    def apply_assets(self, assets, replace=True, applied=None):
+        """
+        잔고 목록 반영 (get_balances 응답 / 웹소켓 myAsset 의 assets)
+        :param replace: True 면 목록에 없는 종목은 보유 0 으로 간주 (전체 잔고 조회 결과)
+        :param applied: 조회 직전의 self.applied - 그 사이 apply_order 가 있었으면 반영하지 않음
+        Return: 장부와 달랐던 항목 수 (반영 안 했으면 None)
+        """
+        cash, cash_locked, positions = self.cash, self.cash_locked, {} if replace else dict(self.positions)
+        for b in assets:
+            currency = b['currency']
+            balance, locked = float(b['balance']), float(b['locked'])
+            if currency == "KRW":
+                cash, cash_locked = balance, locked
+                continue
+            ticker = f"{b.get('unit_currency', 'KRW')}-{currency}"
+            if balance + locked <= 0:
+                positions.pop(ticker, None)
+                continue
+            avg = b.get('avg_buy_price')
+            prev = self.positions.get(ticker, {})
+            positions[ticker] = {
+                "vol": balance,
+                "locked": locked,
+                "avg": float(avg) if avg is not None else prev.get("avg", 0.0),
+            }
+
+        with self._lock:
+            if applied is not None and applied != self.applied:
+                return None  # 스냅샷이 체결 반영 전/후 어느 쪽인지 알 수 없음 -> 버리고 다시 대조
+            drift = sum(1 for t in set(positions) | set(self.positions)
+                        if abs(positions.get(t, {}).get("vol", 0.0) - self.positions.get(t, {}).get("vol", 0.0)) > 1e-8)
+            if abs(cash - self.cash) >= 1: drift += 1
+            self.cash, self.cash_locked, self.positions = cash, cash_locked, positions
+        return drift
+
+    # -----------------------------------------------------------
+    # 🔄 거래소 대조 (백그라운드)
+    # -----------------------------------------------------------
+    def reconcile(self, force=False):
+        """
+        get_balances 1회로 장부 전체 갱신 (실패하면 장부 유지)
+        :param force: 체결 확인 중인 주문이 있어도 대조 (그 주문의 체결분을 이미 apply_order 한 직후)
+        """
+        if not force and self.in_flight():
+            self.deferred += 1
+            self.mark_dirty()  # 주문 추적이 끝나면 바로 다시 대조 (대기 중에는 REST 호출 없음)
+            return False
+        applied = self.applied
+        try:
+            balances = self.client.exchange("get_balances")
+        except Exception as e:
+            print(f"⚠️ [Ledger] 잔고 대조 실패: {e}")
+            return False
+        if not isinstance(balances, list): return False
+
+        drift = self.apply_assets(balances, applied=applied)
+        if drift is None:
+            self.deferred += 1
+            self.mark_dirty()
+            return False
+        first = self.synced_at is None
+        self.synced_at = time.monotonic()
+        self.reconciles += 1
+        if drift and not first:
+            self.drifts += 1
+            print(f"\n📒 [Ledger] 거래소 잔고와 {drift}건 차이 -> 장부 보정")
+        return True
+
+    def mark_dirty(self):
+        """곧바로 대조 요청 (체결 반영/취소 직후)"""
+        if self._dirty is not None:
+            self._dirty.set()
+
+    async def run(self):
+        self._dirty = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=config.LEDGER_RECONCILE_SEC)
+                await asyncio.sleep(config.LEDGER_DIRTY_DELAY) # 체결 직후 잔고 반영 지연 + 연속 이벤트 합치기
+            except asyncio.TimeoutError:
+                pass
+            self._dirty.clear()
+            await asyncio.to_thread(self.reconcile)
+
+    def stats(self):
+        return {"positions": len(self.positions), "reconciles": self.reconciles, "drifts": self.drifts,
+                "deferred": self.deferred}
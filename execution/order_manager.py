@@ -1,34 +1,59 @@
 # execution/order_manager.py
 # [최종] 호가창 분석 + 분할 매도 + 안전 금액 + [NEW] 허매수(Spoofing) 판독
 
-import pyupbit
-import time
+import asyncio
+import clock
 import config
+from data_feed.rest_client import get_client
+from data_feed.orderbook import depth_sums, ask_notional, best_bid_ask
+from execution.ledger import PositionLedger
 
 class OrderManager:
-    def __init__(self):
-        self.upbit = None
+    def __init__(self, orderbook_store=None):
+        # ✅ [신규] 공용 REST 클라이언트 (연결 재사용 + 요청 한도 관리, 주문 호출 우선)
+        self.client = get_client()
+        # ✅ [신규] 웹소켓 로컬 호가창 (DataAggregator.orderbooks). 없거나 오래되면 REST 사용
+        self.orderbooks = orderbook_store
         self.sim_holdings = {} 
+        # ✅ [신규] 체결 확인 중인 주문 {ticker: {"side", "uuid", "task", "amount"}} (비동기 주문 경로)
+        self.pending = {}
         self.sim_krw = config.SIMULATION_BALANCE 
+        # ✅ [신규] 실전 잔고 장부 (체결로 갱신 + 주기적 get_balances 대조, 매매 루프는 장부만 조회)
+        self.ledger = None
         
         if not config.IS_SIMULATION:
-            self.upbit = pyupbit.Upbit(config.UPBIT_ACCESS_KEY, config.UPBIT_SECRET_KEY)
             print("💳 [OrderManager] 실전 매매 모드")
+            self.ledger = PositionLedger(self.client)
+            self.ledger.in_flight = lambda: bool(self.pending) # 체결 확인 중에는 정기 대조 보류
+            self.ledger.reconcile()
         else:
             print(f"🧪 [OrderManager] 모의 투자 모드 (시작 금액: {self.sim_krw:,.0f}원)")
 
+    # -----------------------------------------------------------
+    # 📚 [호가창 조회] 로컬 호가창 우선
+    # -----------------------------------------------------------
+    def get_orderbook(self, ticker, priority=False):
+        """
+        로컬 호가창(웹소켓) 우선 -> 없거나 ORDERBOOK_MAX_AGE 초과 시 REST 1회
+        :param priority: 주문 직전 조회면 True (REST 요청 한도에서 데이터 조회보다 먼저 처리)
+        """
+        if self.orderbooks is not None:
+            book = self.orderbooks.get(ticker)
+            if book: return book
+        if config.OFFLINE_MODE: return None
+        return self.client.get_orderbook(ticker, priority=priority)
+
     # -----------------------------------------------------------
     # 🛡️ [안전 금액] 자산 25% + 호가창 10% 룰
     # -----------------------------------------------------------
     def calculate_safe_buy_amount(self, ticker, target_amount):
-        krw_balance = self.get_balance("KRW")
+        krw_balance = self.available_krw()
         max_by_asset = krw_balance * config.MAX_ASSET_RATIO
         max_by_orderbook = float('inf') 
         try:
-            ob = pyupbit.get_orderbook(ticker)
+            ob = self.get_orderbook(ticker)
             if ob:
-                asks = ob['orderbook_units'][:5]
-                total_ask_value = sum([u['ask_size'] * u['ask_price'] for u in asks])
+                total_ask_value = ask_notional(ob, 5)
                 max_by_orderbook = total_ask_value * config.MAX_OB_RATIO
         except: pass
         
@@ -44,19 +69,18 @@ class OrderManager:
     # -----------------------------------------------------------
     # 🕵️ [신규] 체결 속도 기반 허매수 판독 (Advanced Tape Reading)
     # -----------------------------------------------------------
-    def check_fake_buy(self, ticker, trade_history_deque):
+    def check_fake_buy(self, ticker, trade_tape):
         """
         호가창은 매수 우위인데, 실제 체결이 안 일어나면 '허매수'로 판단
+        :param trade_tape: DataAggregator.trade_history[ticker] (TradeTape)
         Return: True(허매수 의심), False(정상)
         """
         try:
             # 1. 호가창 조회
-            orderbook = pyupbit.get_orderbook(ticker)
+            orderbook = self.get_orderbook(ticker)
             if not orderbook: return False
 
-            units = orderbook['orderbook_units'][:5] # 5호가만 봄
-            ask_size = sum([u['ask_size'] for u in units])
-            bid_size = sum([u['bid_size'] for u in units])
+            ask_size, bid_size = depth_sums(orderbook, 5) # 5호가만 봄
 
             # 매수벽이 매도벽보다 2배 이상 두꺼운지 확인 (매수 우위 상태)
             is_bid_strong = bid_size > (ask_size * 2.0)
@@ -65,16 +89,10 @@ class OrderManager:
                 return False # 매수벽이 안 두꺼우면 허매수 논할 필요 없음
 
             # 2. 최근 체결 내역 분석 (Tape Reading)
-            now = time.time()
+            # 최근 3초간의 'BID'(매수 주도) 체결 금액 합산 (테이프 누적합 O(1) 조회)
             recent_buy_vol = 0.0
-            
-            # 최근 3초간의 'BID'(매수 주도) 체결량 합산
-            if trade_history_deque:
-                for trade in list(trade_history_deque)[-20:]: # 뒤에서 20개만 확인
-                    if now - trade['timestamp'] > 3.0: continue # 3초 지난건 무시
-                    
-                    if trade['side'] == 'BID': # 매수 체결(빨간불)
-                        recent_buy_vol += trade['volume'] * trade['price']
+            if trade_tape is not None:
+                recent_buy_vol = trade_tape.buy_notional(3.0)
 
             # 3. 판독: 매수벽은 빵빵한데(is_bid_strong), 실제 매수는 쥐꼬리(100만원 미만)인가?
             if recent_buy_vol < 1_000_000: # 기준: 최근 3초간 매수체결액 100만원 미만
@@ -88,12 +106,9 @@ class OrderManager:
     # --- [호가창 분석] ---
     def analyze_orderbook_health(self, ticker):
         try:
-            orderbook = pyupbit.get_orderbook(ticker)
+            orderbook = self.get_orderbook(ticker)
             if not orderbook: return "NORMAL"
-            units = orderbook['orderbook_units']
-            depth = units[:config.OB_DEPTH_COUNT]
-            ask_size = sum([u['ask_size'] for u in depth])
-            bid_size = sum([u['bid_size'] for u in depth])
+            ask_size, bid_size = depth_sums(orderbook, config.OB_DEPTH_COUNT)
             if ask_size > bid_size * config.OB_BAD_RATIO: return "BAD"
             elif bid_size > ask_size * config.OB_GOOD_RATIO: return "GOOD"
             return "NORMAL"
@@ -104,14 +119,12 @@ class OrderManager:
         if config.IS_SIMULATION:
             if ticker == "KRW": return self.sim_krw
             return self.sim_holdings.get(ticker, {}).get("vol", 0.0)
-        try: return self.upbit.get_balance(ticker)
-        except: return 0.0
+        return self.ledger.get_balance(ticker)
 
     def get_avg_buy_price(self, ticker):
         if config.IS_SIMULATION:
             return self.sim_holdings.get(ticker, {}).get("avg", 0.0)
-        try: return self.upbit.get_avg_buy_price(ticker)
-        except: return 0.0
+        return self.ledger.get_avg_buy_price(ticker)
     
     def get_total_assets(self, current_prices):
         total = 0.0
@@ -121,85 +134,171 @@ class OrderManager:
                 if t in current_prices and current_prices[t]:
                     total += info['vol'] * current_prices[t]
         else:
-            try:
-                balances = self.upbit.get_balances()
-                for b in balances:
-                    if b['currency'] == 'KRW':
-                        total += float(b['balance']) + float(b['locked'])
-                    else:
-                        ticker = f"KRW-{b['currency']}"
-                        vol = float(b['balance']) + float(b['locked'])
-                        if ticker in current_prices and current_prices[ticker]:
-                            total += vol * current_prices[ticker]
-            except: pass
+            total = self.ledger.total_assets(current_prices)
         return total
 
-    # --- [매수] ---
-    def buy_limit_safe(self, ticker, amount_krw):
-        safe_amount = self.calculate_safe_buy_amount(ticker, amount_krw)
-        if safe_amount <= 0:
-            print(f"   🚫 [Buy Cancel] 안전 주문 가능액 부족 (0원)")
+    # --- [매도] ---
+    def sell_market_order(self, ticker, volume):
+        if config.IS_SIMULATION: return {"uuid": "sim-sell", "state": "done"}
+        try: return self.client.exchange("sell_market_order", ticker, volume)
+        except Exception as e:
+            print(f"❌ 시장가 매도 실패: {e}")
             return None
 
-        if config.IS_SIMULATION: return {"uuid": "sim-buy", "state": "done"}
+    # -----------------------------------------------------------
+    # ⚡ [신규] 비동기 주문 - 주문 접수 후 바로 리턴, 체결 확인/미체결 취소는 백그라운드 태스크
+    # (time.sleep 으로 이벤트 루프를 멈추지 않으므로 다른 종목 손절이 대기하지 않음)
+    # 동기(블로킹) 주문 함수는 없음 - 주문은 반드시 buy_limit_async / sell_percentage_async 로
+    # -----------------------------------------------------------
+    def has_pending(self, ticker):
+        """체결 확인 중인 주문이 있는지"""
+        return ticker in self.pending
+
+    def available_krw(self):
+        """주문 가능 원화 - 체결 확인 중인 매수 주문 금액은 미리 뺌 (장부는 체결 시점에 갱신되므로)"""
+        reserved = sum(p.get("amount", 0.0) for p in self.pending.values() if p["side"] == "BUY")
+        return self.get_balance("KRW") - reserved
+
+    def _fire(self, on_fill, order_info):
+        if on_fill is None: return
         try:
-            orderbook = pyupbit.get_orderbook(ticker)
-            best_ask = orderbook['orderbook_units'][0]['ask_price']
-            
-            volume = safe_amount / best_ask
-            
-            ret = self.upbit.buy_limit_order(ticker, best_ask, volume)
-            if not ret or 'uuid' not in ret: return None
-            
-            uuid = ret['uuid']
-            time.sleep(2)
-            
-            order_info = self.upbit.get_order(uuid)
-            if order_info and order_info['state'] == 'wait':
-                self.upbit.cancel_order(uuid)
-                return None 
-            return order_info
+            on_fill(order_info)
         except Exception as e:
-            print(f"❌ 매수 에러: {e}")
+            print(f"❌ 체결 처리 에러: {e}")
+
+    def _track(self, ticker, side, uuid, timeout, on_fill, amount=0.0):
+        task = asyncio.create_task(self._track_fill(ticker, side, uuid, timeout, on_fill))
+        self.pending[ticker] = {"side": side, "uuid": uuid, "task": task, "amount": amount}
+        # 접수 시점에는 대조하지 않음 (곧 체결된 잔고를 대조로 먼저 반영하면 apply_order 가 한 번 더 더함)
+
+    async def _get_order(self, uuid):
+        """체결 조회 1회 (실패/스로틀은 None - 일시 오류로 보고 호출한 쪽이 다시 조회)"""
+        try:
+            order_info = await asyncio.to_thread(self.client.exchange, "get_order", uuid, priority=True)
+        except Exception as e:
+            print(f"\n   ⚠️ 체결 조회 실패({e}) -> 재조회")
             return None
+        return order_info if isinstance(order_info, dict) and 'state' in order_info else None
 
-    # --- [매도] ---
-    def sell_percentage(self, ticker, ratio, strategy="LIMIT"):
-        current_vol = self.get_balance(ticker)
-        sell_vol = current_vol * ratio
-        if sell_vol == 0: return None
-        print(f"   📉 [매도 실행] {ratio*100}% 처분 진행 ({strategy})")
-        if strategy == "MARKET": return self.sell_market_order(ticker, sell_vol)
-        else: return self.sell_limit_safe(ticker, sell_vol)
+    async def _cancel_until_closed(self, ticker, uuid, last_info):
+        """
+        마감 후 uuid 로 취소 -> 주문이 닫힌 것(wait 아님)을 확인할 때까지 반복
+        (조회/취소가 계속 실패해도 주문이 살아 있을 수 있으므로 추적을 놓지 않음)
+        Return: 마지막 주문 정보 (체결분 포함)
+        """
+        attempt = 0
+        while True:
+            try:
+                await asyncio.to_thread(self.client.exchange, "cancel_order", uuid)
+            except Exception as e:
+                print(f"\n   ⚠️ [{ticker}] 주문 취소 실패({e}) -> 재시도")
+            await clock.sleep(config.ORDER_POLL_INTERVAL * min(attempt + 1, 10))
+            order_info = await self._get_order(uuid)
+            if order_info is not None:
+                last_info = order_info
+                if order_info.get('state') != 'wait': return order_info
+            attempt += 1
+            if attempt == config.REST_MAX_RETRY:
+                print(f"\n   🚨 [{ticker}] 주문 {uuid} 취소 확인 지연 -> 확인될 때까지 계속 추적")
 
-    def sell_limit_safe(self, ticker, volume):
-        if config.IS_SIMULATION: return {"uuid": "sim-sell", "state": "done"}
+    async def _track_fill(self, ticker, side, uuid, timeout, on_fill):
+        """ORDER_POLL_INTERVAL 마다 체결 조회 -> timeout 까지 미체결이면 취소 (조회 실패는 마감까지 재조회)"""
         try:
-            orderbook = pyupbit.get_orderbook(ticker)
-            best_bid = orderbook['orderbook_units'][0]['bid_price']
-            ret = self.upbit.sell_limit_order(ticker, best_bid, volume)
-            if not ret or 'uuid' not in ret: return self.sell_market_order(ticker, volume)
-            uuid = ret['uuid']
-            time.sleep(1.5)
-            order_info = self.upbit.get_order(uuid)
-            if order_info and order_info['state'] == 'wait':
-                self.upbit.cancel_order(uuid)
-                time.sleep(0.5)
+            deadline = clock.time() + timeout
+            order_info = None
+            while True:
+                await clock.sleep(config.ORDER_POLL_INTERVAL)
+                info = await self._get_order(uuid)
+                if info is not None:
+                    order_info = info
+                    if info.get('state') != 'wait': break
+                if clock.time() >= deadline: break
+
+            cancelled = order_info is None or order_info.get('state') == 'wait'
+            if cancelled:
+                # 미체결 잔량 취소 -> 닫힌 뒤의 최종 체결분으로 반영 (취소 직전 체결 누락 방지)
+                order_info = await self._cancel_until_closed(ticker, uuid, order_info)
+
+            self.ledger.apply_order(order_info) # 체결분(부분 체결 포함) 장부 반영
+            if cancelled:
+                if side == "BUY":
+                    print(f"\n   ⌛ [{ticker}] 매수 미체결 -> 주문 취소")
+                    return
+                await clock.sleep(0.5)
+                await asyncio.to_thread(self.ledger.reconcile, True) # 취소로 풀린 수량 확인 (체결분은 이미 반영)
                 remain = self.get_balance(ticker)
                 if remain > 0:
-                    print("   ⚠️ 지정가 미체결 -> 주문 취소 (다음 턴에 재시도)")
-                    return None 
-            return order_info
+                    print(f"\n   ⚠️ [{ticker}] 지정가 미체결 -> 주문 취소 (다음 턴에 재시도)")
+                    return
+            self._fire(on_fill, order_info)
         except Exception as e:
-            print(f"❌ 지정가 매도 에러: {e}")
-            return None
+            print(f"❌ [{ticker}] 주문 추적 에러: {e}")
+        finally:
+            self.pending.pop(ticker, None)
 
-    def sell_market_order(self, ticker, volume):
-        if config.IS_SIMULATION: return {"uuid": "sim-sell", "state": "done"}
-        try: return self.upbit.sell_market_order(ticker, volume)
+    async def buy_limit_async(self, ticker, amount_krw, on_fill=None):
+        """
+        최우선 매도호가 지정가 매수 (체결 확인은 백그라운드)
+        :param on_fill: 체결 시 호출되는 함수 on_fill(order_info)
+        Return: 주문 접수 여부 (체결 여부는 on_fill 로 전달)
+        """
+        if self.has_pending(ticker): return False
+        safe_amount = await asyncio.to_thread(self.calculate_safe_buy_amount, ticker, amount_krw)
+        if safe_amount <= 0:
+            print(f"   🚫 [Buy Cancel] 안전 주문 가능액 부족 (0원)")
+            return False
+
+        if config.IS_SIMULATION:
+            self._fire(on_fill, {"uuid": "sim-buy", "state": "done"})
+            return True
+        try:
+            book = await asyncio.to_thread(self.get_orderbook, ticker, True)
+            _, best_ask = best_bid_ask(book)
+            volume = safe_amount / best_ask
+            ret = await asyncio.to_thread(self.client.exchange, "buy_limit_order", ticker, best_ask, volume)
+            if not ret or 'uuid' not in ret: return False
         except Exception as e:
-            print(f"❌ 시장가 매도 실패: {e}")
-            return None
+            print(f"❌ 매수 에러: {e}")
+            return False
+
+        self._track(ticker, "BUY", ret['uuid'], config.ORDER_FILL_TIMEOUT_BUY, on_fill, safe_amount)
+        return True
+
+    async def sell_percentage_async(self, ticker, ratio, strategy="LIMIT", on_fill=None):
+        """
+        보유 수량의 ratio 만큼 매도
+        MARKET/LIMIT 모두 백그라운드에서 체결 확인 후 장부 반영 + on_fill (지정가 접수 실패 시 시장가)
+        Return: 주문 접수 여부
+        """
+        if self.has_pending(ticker): return False
+        current_vol = self.get_balance(ticker) # 장부 조회 (REST 없음)
+        sell_vol = current_vol * ratio
+        if sell_vol == 0: return False
+        print(f"   📉 [매도 실행] {ratio*100}% 처분 진행 ({strategy})")
+
+        if config.IS_SIMULATION:
+            self._fire(on_fill, {"uuid": "sim-sell", "state": "done"})
+            return True
+
+        if strategy != "MARKET":
+            try:
+                book = await asyncio.to_thread(self.get_orderbook, ticker, True)
+                best_bid, _ = best_bid_ask(book)
+                ret = await asyncio.to_thread(self.client.exchange, "sell_limit_order", ticker, best_bid, sell_vol)
+                if ret and 'uuid' in ret:
+                    self._track(ticker, "SELL", ret['uuid'], config.ORDER_FILL_TIMEOUT_SELL, on_fill)
+                    return True
+            except Exception as e:
+                print(f"❌ 지정가 매도 에러: {e}")
+                return False
+
+        ret = await asyncio.to_thread(self.sell_market_order, ticker, sell_vol)
+        if not ret or 'uuid' not in ret:
+            print(f"❌ [{ticker}] 시장가 매도 접수 실패: {ret}")
+            return False
+        # 시장가도 체결 조회로 장부에 반영될 때까지 pending 유지 (그 사이 같은 종목 재매도 방지)
+        self._track(ticker, "SELL", ret['uuid'], config.ORDER_FILL_TIMEOUT_SELL, on_fill)
+        return True
 
     # --- [모의투자] ---
     def simulation_buy(self, ticker, amount, current_price):
@@ -1,7 +1,7 @@
 # execution/risk_manager.py
 # [최종] 지표 기반 손절(VWAP) + 분할 익절(50%) 로직 추가
 
-import time
+import clock
 import config
 
 class RiskManager:
@@ -13,12 +13,12 @@ class RiskManager:
 
     def register_buy(self, ticker):
         self.trailing_highs[ticker] = -100.0
-        self.entry_times[ticker] = time.time()
+        self.entry_times[ticker] = clock.time()
         self.partial_sold[ticker] = False # 매수 시 초기화
 
     def is_in_cooldown(self, ticker):
         if ticker in self.cooldowns:
-            if time.time() < self.cooldowns[ticker]:
+            if clock.time() < self.cooldowns[ticker]:
                 return True
             else:
                 del self.cooldowns[ticker]
@@ -37,7 +37,7 @@ class RiskManager:
         # 진입 후 경과 시간 계산 (안전장치용)
         elapsed_time = 0
         if ticker in self.entry_times:
-            elapsed_time = time.time() - self.entry_times[ticker]
+            elapsed_time = clock.time() - self.entry_times[ticker]
 
         # 고점 갱신 (트레일링 스탑용)
         if ticker not in self.trailing_highs: self.trailing_highs[ticker] = profit_pct
@@ -49,7 +49,7 @@ class RiskManager:
         # ====================================================
         # 1-1. 수익률 손절 (이건 무조건 실행)
         if profit_pct <= config.STOP_LOSS_PCT:
-            self.cooldowns[ticker] = time.time() + config.COOLDOWN_STOP_LOSS
+            self.cooldowns[ticker] = clock.time() + config.COOLDOWN_STOP_LOSS
             return "SELL_ALL", f"💧 가격 손절 ({profit_pct:.2f}%)"
 
         # 1-2. 지표 손절 (VWAP 붕괴 or RSI 급락)
@@ -59,18 +59,18 @@ class RiskManager:
             
             # [VWAP] 지지선 붕괴 (진입 후 3분은 유예 - 흔들기 방지)
             if elapsed_time > 180 and current_price < vwap * config.VWAP_STOP_FACTOR:
-                self.cooldowns[ticker] = time.time() + config.COOLDOWN_VWAP_BREAK
+                self.cooldowns[ticker] = clock.time() + config.COOLDOWN_VWAP_BREAK
                 return "SELL_ALL", f"📉 VWAP 지지 붕괴 (현재 {current_price} < VWAP {vwap})"
             
             # [RSI] 투매 감지 (🔥🔥 수정된 핵심 로직 🔥🔥)
             # 진입 후 5분(300초) 동안은 RSI 손절 금지 (매수 시점 자체가 RSI가 낮으므로)
             if elapsed_time > 300 and rsi < config.RSI_PANIC_SELL:
-                self.cooldowns[ticker] = time.time() + config.COOLDOWN_STOP_LOSS
+                self.cooldowns[ticker] = clock.time() + config.COOLDOWN_STOP_LOSS
                 return "SELL_ALL", f"📉 RSI 급락 ({rsi}) - 투매 감지"
 
         # 1-3. 시간 손절 (너무 오래 횡보하면 탈출)
         if elapsed_time > config.TIME_CUT_SECONDS and profit_pct < config.TIME_CUT_MIN_PROFIT:
-            self.cooldowns[ticker] = time.time() + config.COOLDOWN_TIME_CUT
+            self.cooldowns[ticker] = clock.time() + config.COOLDOWN_TIME_CUT
             return "SELL_ALL", f"⏰ 시간 손절 ({int(elapsed_time)}초 지체)"
 
         # ... (이하 익절 로직은 기존 유지) ...
@@ -4,7 +4,8 @@
 import asyncio
 import time
 import config
-import pyupbit # 차트 데이터 조회를 위해 필요
+import clock
+from data_feed.rest_client import get_client # 차트 데이터 조회 (공용 REST 클라이언트)
 from data_feed.aggregator import DataAggregator
 from strategy.signal_maker import SignalMaker
 from execution.order_manager import OrderManager
@@ -13,6 +14,9 @@ from data_feed.macro_client import MacroClient
 from trade_logger import TradeLogger
 from market_scanner import get_strategy_recommendation
 from ai_analyst import AIAnalyst # ✅ 직접 임포트
+from dispatcher import EventDispatcher
+from data_feed.news_client import get_news_client
+from metrics import get_metrics
 
 async def auto_tuner_loop():
     """30분마다 거시경제 분석(Macro) -> 전략 업데이트"""
@@ -20,7 +24,8 @@ async def auto_tuner_loop():
     while True:
         print(f"\n🧠 [Auto Tuner] 전략 최적화 수행... ({time.strftime('%H:%M')})")
         try:
-            recommendation = get_strategy_recommendation()
+            # 스캔 + AI 회의는 수십 초 걸리므로 스레드에서 실행 (이벤트 루프 보호)
+            recommendation = await asyncio.to_thread(get_strategy_recommendation)
             new_targets = recommendation.get('TARGET_COINS', {})
             
             if new_targets:
@@ -38,6 +43,269 @@ async def auto_tuner_loop():
 
         await asyncio.sleep(SCAN_INTERVAL)
 
+class TradingLoop:
+    """
+    메인 매매 판단 루프 (1회분 = step)
+    실전(main)과 리플레이(replay.py)가 같은 판단 경로를 공유
+    """
+    def __init__(self, aggregator, signal_maker, order_manager, risk_manager, macro_client, logger, ai_analyst=None):
+        self.aggregator = aggregator
+        self.signal_maker = signal_maker
+        self.order_manager = order_manager
+        self.risk_manager = risk_manager
+        self.macro_client = macro_client
+        self.logger = logger
+        self.ai_analyst = ai_analyst # None 이면 AI 검증 생략 (리플레이)
+
+        self.initial_total_assets = 0.0
+        self.is_circuit_break = False
+        self.paused = False      # 거시경제 필터로 매매 중단 중
+        self.holdings = set()    # 마지막 평가 기준 보유(또는 주문 진행 중) 종목
+        # 종목별 평가가 동시에 돌아도(EVENT_DRIVEN) 잔고 확인 ~ 주문 접수는 한 번에 하나씩 (같은 현금으로 중복 매수 방지)
+        self.buy_lock = asyncio.Lock()
+
+    def _current_prices(self):
+        return {t: d['upbit'] for t, d in self.aggregator.market_data.items() if d['upbit']}
+
+    def init_assets(self):
+        """초기 자산 설정 (서킷 브레이커용)"""
+        self.initial_total_assets = self.order_manager.get_total_assets(self._current_prices())
+        self.is_circuit_break = False
+        print(f"💰 초기 자산: {self.initial_total_assets:,.0f}원")
+
+    async def step(self, sweep=True):
+        """
+        매매 판단 1회 수행
+        :param sweep: False 면 공통 점검(거시/자산/급등)만 하고 종목 평가는 EventDispatcher 에 맡김
+        Return: 다음 step 까지 대기할 시간(초) / None 이면 봇 종료
+        """
+        aggregator = self.aggregator
+        order_manager = self.order_manager
+        risk_manager = self.risk_manager
+        logger = self.logger
+
+        # [0] 거시경제 필터
+        if config.ENABLE_MACRO_FILTER:
+            is_risk, reason = self.macro_client.is_volatility_risk()
+            if is_risk:
+                self.paused = True
+                print(f"\n🚫 [MACRO] {reason} -> 대기")
+                return 60
+        self.paused = False
+
+        print("\r", end="", flush=True) 
+
+        # 자산 현황 및 서킷 브레이커
+        current_total_assets = order_manager.get_total_assets(self._current_prices())
+        pnl_rate = 0.0
+        if self.initial_total_assets > 0:
+            pnl_rate = ((current_total_assets - self.initial_total_assets) / self.initial_total_assets) * 100
+
+        status_icon = "🟢" if not self.is_circuit_break else "🔴"
+        print(f"{status_icon} {current_total_assets:,.0f}원 ({pnl_rate:+.2f}%) | ", end="", flush=True)
+
+        if not self.is_circuit_break and pnl_rate <= -config.MAX_GLOBAL_LOSS_PCT:
+            self.is_circuit_break = True
+            print(f"\n🚨 [Circuit Breaker] 누적 손실 {pnl_rate:.2f}% -> 신규 매수 중단")
+
+        # [1] 긴급 매수 (급등 추격) - 서킷 브레이커 시 중단
+        if not self.is_circuit_break and aggregator.surge_detected:
+            print(f"\n{aggregator.surge_info}")
+            for coin in config.FOLLOWER_COINS:
+                if risk_manager.is_in_cooldown(coin): continue
+                if aggregator.is_stale(coin): continue # 오래된 시세로는 추격 금지
+                if order_manager.get_balance(coin) > 0: continue
+                
+                if order_manager.has_pending(coin): continue
+                
+                price = aggregator.market_data[coin]['upbit']
+                if price:
+                    async with self.buy_lock:
+                        await order_manager.buy_limit_async(
+                            coin, config.TRADE_AMOUNT,
+                            on_fill=self._on_buy_fill(coin, price, None, "BTC 급등 추격", "BUY_URGENT")
+                        )
+            aggregator.surge_detected = False
+
+        # [2] 일반 매매 (Target Coins)
+        aggregator.refresh_staleness()
+        if sweep:
+            for ticker in list(config.TARGET_COINS.keys()):
+                if await self.evaluate_ticker(ticker):
+                    self.holdings.add(ticker)
+                else:
+                    self.holdings.discard(ticker)
+            self.holdings &= set(config.TARGET_COINS)
+
+        if self.is_circuit_break and not self.holdings:
+            print(f"\n🛑 모든 자산 청산 완료. 봇을 종료합니다.")
+            return None
+
+        return config.LOOP_DELAY
+
+    def _on_buy_fill(self, ticker, price, analysis, reason, action="BUY"):
+        """매수 체결 시 처리 (모의 잔고 / 리스크 등록 / 기록)"""
+        decided_at = clock.time()
+        started = time.perf_counter()
+        def on_fill(order_info):
+            metrics = get_metrics()
+            metrics.observe("buy_fill", time.perf_counter() - started) # 판단 -> 체결 확인
+            metrics.inc("fills_buy")
+            self.order_manager.simulation_buy(ticker, config.TRADE_AMOUNT, price)
+            self.risk_manager.register_buy(ticker)
+            self.logger.log(ticker, action, price, analysis, 0.0, reason,
+                            order_info=order_info, fill_ms=(clock.time() - decided_at) * 1000)
+        return on_fill
+
+    def _on_sell_fill(self, ticker, action, price, avg_price, analysis, msg):
+        """매도 체결 시 처리 (모의 잔고 / 기록)"""
+        decided_at = clock.time()
+        def on_fill(order_info):
+            get_metrics().inc("fills_sell")
+            if action == "SELL_ALL":
+                self.order_manager.simulation_sell(ticker, price)
+            p_rate = ((price - avg_price) / avg_price) * 100
+            self.logger.log(ticker, action, price, analysis, p_rate, msg,
+                            order_info=order_info, fill_ms=(clock.time() - decided_at) * 1000)
+        return on_fill
+
+    async def evaluate_ticker(self, ticker):
+        """
+        종목 1개 매도/매수 판단
+        Return: 보유 중이면 True
+        """
+        # evaluate 는 판단만 (매수 잠금 대기 / 주문 / 주문 후 1초 대기는 제외)
+        with get_metrics().timer("evaluate"):
+            holding, entry = await self._evaluate_ticker(ticker)
+        if entry is not None:
+            await self._place_buy(*entry)
+        return holding
+
+    async def _evaluate_ticker(self, ticker):
+        metrics = get_metrics()
+        aggregator = self.aggregator
+        signal_maker = self.signal_maker
+        order_manager = self.order_manager
+        risk_manager = self.risk_manager
+        logger = self.logger
+
+        if ticker not in aggregator.market_data: return False, None
+        
+        data = aggregator.market_data[ticker]
+        price = data['upbit']
+        kimp = data['kimp']
+        if price is None: return False, None 
+
+        # ⏳ 체결 확인 중인 주문이 있으면 결과가 나올 때까지 판단 보류 (보유 중으로 취급)
+        if order_manager.has_pending(ticker):
+            print(f"[{ticker.split('-')[1]} ⏳] ", end="", flush=True)
+            return True, None
+
+        balance = order_manager.get_balance(ticker)
+        has_coin = balance > 0 and (balance * price) >= config.MIN_ORDER_VALUE
+
+        # [A] 보유 중 -> 매도 로직
+        if has_coin:
+            avg_price = order_manager.get_avg_buy_price(ticker)
+            analysis = signal_maker.get_analysis_only(ticker)
+            action, msg = risk_manager.check_exit_signal(ticker, price, avg_price, analysis)
+            
+            if action != "HOLD":
+                print(f"\n{msg}")
+                # 매도 실행 (체결 확인은 백그라운드 - 다른 종목 판단을 막지 않음)
+                strategy = "MARKET" if "손절" in msg else "LIMIT"
+                ratio = 1.0 if action == "SELL_ALL" else config.PARTIAL_SELL_RATIO
+                await order_manager.sell_percentage_async(
+                    ticker, ratio, strategy,
+                    on_fill=self._on_sell_fill(ticker, action, price, avg_price, analysis, msg)
+                )
+            else:
+                print(f"[{ticker.split('-')[1]} {msg}] ", end="", flush=True)
+            return True, None
+
+        # [B] 미보유 -> 매수 로직
+        if self.is_circuit_break: return False, None
+        if risk_manager.is_in_cooldown(ticker): return False, None
+        # ⏱️ 시세가 오래됐으면(피드 지연/끊김) 신규 진입 거부
+        if aggregator.is_stale(ticker): # 읽는 시점에 계산 (이벤트 모드에서는 step 의 일괄 갱신이 최대 LOOP_DELAY 늦음)
+            print(f"[{ticker.split('-')[1]} ⏱️] ", end="", flush=True)
+            return False, None
+        
+        safe_kimp = kimp if kimp is not None else 0.0
+        
+        # 1차: 기술적 지표 (RSI, VWAP 등)
+        with metrics.timer("buy_signal"): # 내부에서 signal_fetch / signal_indicators 로 분리 기록
+            is_buy, reason, analysis = signal_maker.check_buy_signal(ticker, price, safe_kimp)
+        
+        if not is_buy:
+            print(f"[{ticker.split('-')[1]} ⚪] ", end="", flush=True)
+            return False, None
+
+        # 허매수 필터
+        metrics.inc("signals_buy")
+        trades = aggregator.trade_history.get(ticker, None)
+        with metrics.timer("fake_buy"):
+            is_fake = order_manager.check_fake_buy(ticker, trades)
+        if is_fake:
+            metrics.inc("fake_buy_blocked")
+            print(f"\r🚫 {ticker} 허매수 감지 -> 진입 취소")
+            return False, None
+        
+        # =========================================================
+        # 🚀 2차: AI 위원회 차트 검증 (The AI Chartist)
+        # =========================================================
+        if self.ai_analyst is not None:
+            print(f"\n🔎 {ticker} 1차 지표 통과. AI 위원회 검증 요청...")
+            
+            try:
+                # 최근 60분봉 데이터 조회 (로컬 저장소 우선, 없으면 REST)
+                df = aggregator.candles.get_ohlcv(ticker, 60)
+                if df is None and not config.OFFLINE_MODE:
+                    df = get_client().get_ohlcv(ticker, interval="minute1", count=60)
+                if df is not None:
+                    # AI 3대장 회의 소집
+                    with metrics.timer("ai_verify"):
+                        ai_result = await asyncio.to_thread(self.ai_analyst.verify_buy_signal_consensus, ticker, df)
+                    
+                    if ai_result and ai_result.get('decision') == "APPROVE":
+                        ai_reason = ai_result.get('reason', 'Approved')
+                        print(f"   ✅ [Chairman 승인] {ai_reason}")
+                        metrics.inc("ai_approved")
+                        reason += f" / AI:{ai_reason}"
+                    else:
+                        reject_reason = ai_result.get('reason') if ai_result else "No Response"
+                        print(f"   ✋ [Chairman 거부] {reject_reason} -> 진입 보류")
+                        metrics.inc("ai_rejected")
+                        # 3분간 쿨타임 (재요청 방지)
+                        risk_manager.cooldowns[ticker] = clock.time() + 180
+                        return False, None 
+                else:
+                    print("   ⚠️ 차트 데이터 조회 실패 -> AI 패스하고 진입")
+            except Exception as e:
+                print(f"   ⚠️ AI 검증 에러({e}) -> AI 패스하고 진입")
+        # =========================================================
+
+        print(f"🔥 {ticker} 매수 진입! ({reason})")
+        return False, (ticker, price, analysis, reason)
+
+    async def _place_buy(self, ticker, price, analysis, reason):
+        """매수 주문 (잠금 대기는 buy_lock_wait 단계로 따로 기록)"""
+        metrics = get_metrics()
+        waited = time.perf_counter()
+        # AI 검증(수 초) 동안 다른 종목이 같은 현금으로 주문했을 수 있으므로 잠금 안에서 잔고 확인
+        async with self.buy_lock:
+            metrics.observe("buy_lock_wait", time.perf_counter() - waited)
+            placed = False
+            if self.order_manager.available_krw() >= config.TRADE_AMOUNT:
+                with metrics.timer("buy_order"): # 호가 조회 + 주문 접수 (체결은 buy_fill)
+                    placed = await self.order_manager.buy_limit_async(
+                        ticker, config.TRADE_AMOUNT,
+                        on_fill=self._on_buy_fill(ticker, price, analysis, reason)
+                    )
+        if placed:
+            metrics.inc("buy_orders")
+            await clock.sleep(1)
+
 async def main():
     print(f"========================================")
     print(f"   🐙 2026 Octopus Bot - AI Committee")
@@ -46,168 +314,53 @@ async def main():
     
     # 객체 생성
     aggregator = DataAggregator()
-    signal_maker = SignalMaker()
-    order_manager = OrderManager()
+    signal_maker = SignalMaker(aggregator.candles) # ✅ 로컬 1분봉 저장소 사용
+    order_manager = OrderManager(aggregator.orderbooks) # ✅ 로컬 호가창 사용
     risk_manager = RiskManager()
     macro_client = MacroClient()
     logger = TradeLogger()
     ai_analyst = AIAnalyst() # ✅ AI 분석관 생성
 
+    loop = TradingLoop(aggregator, signal_maker, order_manager, risk_manager, macro_client, logger, ai_analyst)
+
     # 태스크 시작
+    get_news_client().start() # 뉴스/FNG 백그라운드 갱신 (튜너는 캐시 값 사용)
     asyncio.create_task(auto_tuner_loop())
     asyncio.create_task(aggregator.run())
 
     print("⏳ 데이터 동기화 중... (3초)")
     await asyncio.sleep(3)
 
-    # 초기 자산 설정 (서킷 브레이커용)
-    current_prices_init = {t: d['upbit'] for t, d in aggregator.market_data.items() if d['upbit']}
-    initial_total_assets = order_manager.get_total_assets(current_prices_init)
-    is_circuit_break = False
+    loop.init_assets()
+    if order_manager.ledger is not None:
+        asyncio.create_task(order_manager.ledger.run()) # 잔고 장부 백그라운드 대조
+
+    # ⚡ 이벤트 모드: 시세 갱신이 온 종목만 즉시 평가 (step 은 공통 점검만)
+    dispatcher = None
+    if config.EVENT_DRIVEN:
+        dispatcher = EventDispatcher(loop)
+        aggregator.subscribe(dispatcher.on_update)
+        print(f"⚡ [Dispatch] 이벤트 기반 평가 (디바운스 {dispatcher.debounce}초 / 하트비트 {dispatcher.heartbeat}초)")
 
-    print(f"💰 초기 자산: {initial_total_assets:,.0f}원")
+    # 📈 핫패스 계측 (단계별 지연 + 각 모듈 통계를 한 곳에서 노출)
+    metrics = get_metrics()
+    metrics.add_source("rest", lambda: get_client().stats())
+    metrics.add_source("feed", aggregator.get_feed_stats)
+    metrics.add_source("ai", ai_analyst.telemetry.stats)
+    metrics.add_source("ai_providers", ai_analyst.telemetry.provider_stats)
+    metrics.add_source("ai_verdicts", ai_analyst.verdicts.stats)
+    metrics.add_source("news", get_news_client().stats)
+    if dispatcher: metrics.add_source("dispatch", dispatcher.stats)
+    if order_manager.ledger is not None: metrics.add_source("ledger", order_manager.ledger.stats)
+    await metrics.start()
 
     while True:
         try:
-            # [0] 거시경제 필터
-            if config.ENABLE_MACRO_FILTER:
-                is_risk, reason = macro_client.is_volatility_risk()
-                if is_risk:
-                    print(f"\n🚫 [MACRO] {reason} -> 대기")
-                    await asyncio.sleep(60)
-                    continue 
-
-            print("\r", end="", flush=True) 
-
-            # 자산 현황 및 서킷 브레이커
-            current_prices = {t: d['upbit'] for t, d in aggregator.market_data.items() if d['upbit']}
-            current_total_assets = order_manager.get_total_assets(current_prices)
-            pnl_rate = 0.0
-            if initial_total_assets > 0:
-                pnl_rate = ((current_total_assets - initial_total_assets) / initial_total_assets) * 100
-
-            status_icon = "🟢" if not is_circuit_break else "🔴"
-            print(f"{status_icon} {current_total_assets:,.0f}원 ({pnl_rate:+.2f}%) | ", end="", flush=True)
-
-            if not is_circuit_break and pnl_rate <= -config.MAX_GLOBAL_LOSS_PCT:
-                is_circuit_break = True
-                print(f"\n🚨 [Circuit Breaker] 누적 손실 {pnl_rate:.2f}% -> 신규 매수 중단")
-
-            # [1] 긴급 매수 (급등 추격) - 서킷 브레이커 시 중단
-            if not is_circuit_break and aggregator.surge_detected:
-                print(f"\n{aggregator.surge_info}")
-                for coin in config.FOLLOWER_COINS:
-                    if risk_manager.is_in_cooldown(coin): continue
-                    if order_manager.get_balance(coin) > 0: continue
-                    
-                    price = aggregator.market_data[coin]['upbit']
-                    if price and order_manager.buy_limit_safe(coin, config.TRADE_AMOUNT):
-                        order_manager.simulation_buy(coin, config.TRADE_AMOUNT, price)
-                        risk_manager.register_buy(coin)
-                        logger.log(coin, "BUY_URGENT", price, None, 0.0, "BTC 급등 추격")
-                aggregator.surge_detected = False
-
-            # [2] 일반 매매 (Target Coins)
-            active_tickers = list(config.TARGET_COINS.keys())
-            holding_count = 0
-
-            for ticker in active_tickers:
-                if ticker not in aggregator.market_data: continue
-                
-                data = aggregator.market_data[ticker]
-                price = data['upbit']
-                kimp = data['kimp']
-                if price is None: continue 
-
-                balance = order_manager.get_balance(ticker)
-                has_coin = balance > 0 and (balance * price) >= config.MIN_ORDER_VALUE
-
-                # [A] 보유 중 -> 매도 로직
-                if has_coin:
-                    holding_count += 1
-                    avg_price = order_manager.get_avg_buy_price(ticker)
-                    analysis = signal_maker.get_analysis_only(ticker)
-                    action, msg = risk_manager.check_exit_signal(ticker, price, avg_price, analysis)
-                    
-                    if action != "HOLD":
-                        print(f"\n{msg}")
-                        # 매도 실행
-                        strategy = "MARKET" if "손절" in msg else "LIMIT"
-                        executed = False
-                        if action == "SELL_ALL":
-                            if order_manager.sell_percentage(ticker, 1.0, strategy):
-                                order_manager.simulation_sell(ticker, price)
-                                executed = True
-                        elif action == "SELL_HALF":
-                            if order_manager.sell_percentage(ticker, config.PARTIAL_SELL_RATIO, strategy):
-                                executed = True
-                        
-                        if executed:
-                            p_rate = ((price - avg_price) / avg_price) * 100
-                            logger.log(ticker, action, price, analysis, p_rate, msg)
-                    else:
-                        print(f"[{ticker.split('-')[1]} {msg}] ", end="", flush=True)
-
-                # [B] 미보유 -> 매수 로직
-                else:
-                    if is_circuit_break: continue
-                    if risk_manager.is_in_cooldown(ticker): continue
-                    
-                    safe_kimp = kimp if kimp is not None else 0.0
-                    
-                    # 1차: 기술적 지표 (RSI, VWAP 등)
-                    is_buy, reason, analysis = signal_maker.check_buy_signal(ticker, price, safe_kimp)
-                    
-                    if is_buy:
-                        # 허매수 필터
-                        trades = aggregator.trade_history.get(ticker, None)
-                        if order_manager.check_fake_buy(ticker, trades):
-                            print(f"\r🚫 {ticker} 허매수 감지 -> 진입 취소")
-                            continue
-                        
-                        # =========================================================
-                        # 🚀 2차: AI 위원회 차트 검증 (The AI Chartist)
-                        # =========================================================
-                        print(f"\n🔎 {ticker} 1차 지표 통과. AI 위원회 검증 요청...")
-                        
-                        try:
-                            # 최근 60분봉 데이터 조회
-                            df = pyupbit.get_ohlcv(ticker, interval="minute1", count=60)
-                            if df is not None:
-                                # AI 3대장 회의 소집
-                                ai_result = ai_analyst.verify_buy_signal_consensus(ticker, df)
-                                
-                                if ai_result and ai_result.get('decision') == "APPROVE":
-                                    ai_reason = ai_result.get('reason', 'Approved')
-                                    print(f"   ✅ [Chairman 승인] {ai_reason}")
-                                    reason += f" / AI:{ai_reason}"
-                                else:
-                                    reject_reason = ai_result.get('reason') if ai_result else "No Response"
-                                    print(f"   ✋ [Chairman 거부] {reject_reason} -> 진입 보류")
-                                    # 3분간 쿨타임 (재요청 방지)
-                                    risk_manager.cooldowns[ticker] = time.time() + 180
-                                    continue 
-                            else:
-                                print("   ⚠️ 차트 데이터 조회 실패 -> AI 패스하고 진입")
-                        except Exception as e:
-                            print(f"   ⚠️ AI 검증 에러({e}) -> AI 패스하고 진입")
-                        # =========================================================
-
-                        print(f"🔥 {ticker} 매수 진입! ({reason})")
-                        if order_manager.get_balance("KRW") >= config.TRADE_AMOUNT:
-                            if order_manager.buy_limit_safe(ticker, config.TRADE_AMOUNT):
-                                order_manager.simulation_buy(ticker, config.TRADE_AMOUNT, price)
-                                risk_manager.register_buy(ticker)
-                                logger.log(ticker, "BUY", price, analysis, 0.0, reason)
-                                await asyncio.sleep(1)
-                    else:
-                        print(f"[{ticker.split('-')[1]} ⚪] ", end="", flush=True)
-
-            if is_circuit_break and holding_count == 0:
-                print(f"\n🛑 모든 자산 청산 완료. 봇을 종료합니다.")
-                break
-
-            await asyncio.sleep(config.LOOP_DELAY)
+            if dispatcher: dispatcher.ensure(list(config.TARGET_COINS.keys()))
+            with metrics.timer("loop_step"):
+                delay = await loop.step(sweep=dispatcher is None)
+            if delay is None: break
+            await asyncio.sleep(delay)
 
         except Exception as e:
             print(f"\n⚠️ Main Error: {e}")
@@ -1,10 +1,12 @@
 # market_scanner.py
 # [V3 Integrated] 차트 분석 + AI 위원회(Ensemble) 통합 전략
 
-import pyupbit
+import threading
 import time
-import requests
+from concurrent.futures import ThreadPoolExecutor
 from strategy.indicators import TechnicalAnalyzer
+from data_feed.candle_history import CandleHistory
+from data_feed.rest_client import get_client
 import config
 from ai_analyst import AIAnalyst # ✅ 신규 모듈 임포트
 
@@ -12,9 +14,13 @@ class MarketScanner:
     def __init__(self):
         self.analyzer = TechnicalAnalyzer()
         self.ai_analyst = AIAnalyst() # AI 객체 생성
+        self.client = get_client() # ✅ 공용 REST 클라이언트 (연결 재사용 + 초당 한도 공유)
+        self.history = CandleHistory(client=self.client) # ✅ 로컬 캔들 저장소 (지난 스캔 이후 캔들만 조회)
+        self.retries = 0
+        self._retries_lock = threading.Lock() # 스캔 스레드 풀에서 동시에 증가
 
     def get_all_krw_tickers(self):
-        try: return pyupbit.get_tickers(fiat="KRW")
+        try: return self.client.get_tickers(fiat="KRW")
         except: return []
 
     def get_top_volume_coins(self, limit=30):
@@ -22,38 +28,72 @@ class MarketScanner:
         try:
             tickers = self.get_all_krw_tickers()
             if not tickers: return []
-            url = "https://api.upbit.com/v1/ticker"
-            params = {"markets": ",".join(tickers)}
-            resp = requests.get(url, params=params).json()
+            resp = self.client.get_ticker(tickers)
             sorted_data = sorted(resp, key=lambda x: x['acc_trade_price_24h'], reverse=True)
             return [item['market'] for item in sorted_data[:limit]]
         except: return []
 
+    def _fetch_candles(self, ticker, interval="minute15", count=60):
+        """
+        캔들 조회 (스레드 풀에서 호출)
+        조회 실패(예외/빈 응답)만 잠시 뒤 재시도 (429 는 REST 클라이언트가 처리)
+        - 마지막 캔들이 오래됐어도 거래 없는 종목일 수 있으므로 그대로 사용
+        """
+        for attempt in range(config.SCAN_MAX_RETRY + 1):
+            try:
+                self.history.update(ticker, interval, min_bars=count, max_bars=count)
+                self.history.fill_gaps(ticker, interval, max_pages=1) # 지난 공백은 스캔마다 조금씩
+                df = self.history.get_ohlcv(ticker, interval, count=count, with_partial=True)
+            except Exception:
+                df = None
+            if df is not None and len(df):
+                return df
+            if attempt < config.SCAN_MAX_RETRY:
+                with self._retries_lock:
+                    self.retries += 1
+                time.sleep(0.5 * (attempt + 1))
+        return df
+
+    def _analyze_ticker(self, ticker):
+        df = self._fetch_candles(ticker)
+        if df is None: return None
+        analysis = self.analyzer.analyze_1m_candle(df)
+
+        # 기술적 필터 (RSI 40 이하 or 볼밴 하단) - 느슨하게 잡음 (AI가 거를 거니까)
+        if analysis['RSI_14'] <= 40 or analysis['is_oversold']:
+            return ticker
+        return None
+
     def scan_market(self):
         """
         [1. 차트 분석] 기술적 지표로 1차 타겟 선정
+        (스레드 풀 동시 조회 + 토큰 버킷으로 초당 요청 수 제한)
         """
-        candidates = self.get_top_volume_coins(limit=40)
+        started = time.perf_counter()
+        limit = config.SCAN_UNIVERSE or len(self.get_all_krw_tickers())
+        candidates = self.get_top_volume_coins(limit=limit)
         selected_coins = {}
         
         # 일단 안전하게 비트, 이더, 리플은 기본 포함
         defaults = {"KRW-BTC": "btcusdt", "KRW-ETH": "ethusdt", "KRW-XRP": "xrpusdt"}
+        targets = [t for t in candidates if t not in defaults] # 기본 타겟은 나중에 합침
         
         print(f"\n🔍 [Scanner] 기술적 타겟 발굴 시작 ({len(candidates)}개)...")
-        for ticker in candidates:
+        requests_before, retries_before = self.history.requests, self.retries
+        wait_before = self.client.quotation.wait_seconds
+        with ThreadPoolExecutor(max_workers=config.SCAN_WORKERS) as pool:
+            futures = {ticker: pool.submit(self._analyze_ticker, ticker) for ticker in targets}
+        for ticker, future in futures.items():
             try:
-                if ticker in defaults: continue # 기본 타겟은 나중에 합침
-                time.sleep(0.05)
-                df = pyupbit.get_ohlcv(ticker, interval="minute15", count=60)
-                if df is None: continue
-
-                analysis = self.analyzer.analyze_1m_candle(df)
-                
-                # 기술적 필터 (RSI 40 이하 or 볼밴 하단) - 느슨하게 잡음 (AI가 거를 거니까)
-                if analysis['RSI_14'] <= 40 or analysis['is_oversold']:
+                if future.result():
                     symbol = ticker.replace("KRW-", "").lower() + "usdt"
                     selected_coins[ticker] = symbol
             except: continue
+
+        elapsed = time.perf_counter() - started
+        print(f"⏱️ [Scanner] {len(targets)}개 {elapsed:.2f}초 "
+              f"(요청 {self.history.requests - requests_before}회 / 재시도 {self.retries - retries_before}회 / "
+              f"스레드 대기 합계 {self.client.quotation.wait_seconds - wait_before:.1f}초)")
         
         # 타겟이 너무 적으면 기본 종목 추가
         if len(selected_coins) < 3:
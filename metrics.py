@@ -0,0 +1,223 @@
+# metrics.py
+# [NEW] 핫패스 계측 - 시세 수신부터 체결까지 단계별 지연 분포 + 카운터/게이지
+#
+# 단계(stage): ws_queue(수신->처리 대기) / market_data(시세 반영) / signal_fetch(캔들 조회, REST 포함)
+#   / signal_indicators(지표 계산) / fake_buy / ai_verify / buy_lock_wait(매수 잠금 대기)
+#   / buy_order(주문 접수) / buy_fill(판단->체결) / evaluate(종목 1개 판단, 잠금 대기/주문 제외)
+#   / loop_step(메인 루프 1회) / event_loop_lag(이벤트 루프 지연)
+# 노출: METRICS_PORT 로 로컬 HTTP (/metrics = Prometheus 텍스트, /json = 전체 JSON)
+#       METRICS_JSON_FILE 에 METRICS_DUMP_SEC 마다 JSON 스냅샷 (원자적 교체)
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+import config
+from data_feed.latency import _percentile
+
+# 지연 분포 구간 (초, Prometheus le 기준 / 마지막 +Inf 는 count)
+STAGE_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+PREFIX = "tradebot"
+
+
+class StageHistogram:
+    def __init__(self):
+        self.buckets = [0] * len(STAGE_BUCKETS)  # 구간별 (누적 아님)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=config.LATENCY_SAMPLE_SIZE)  # p50/p99 용 최근 샘플 (초)
+
+    def observe(self, seconds):
+        for i, edge in enumerate(STAGE_BUCKETS):
+            if seconds <= edge:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max: self.max = seconds
+        self.recent.append(seconds)
+
+    def stats(self):
+        values = sorted(self.recent)
+        ms = lambda v: round(v * 1000, 2) if v is not None else None
+        return {
+            "count": self.count,
+            "avg_ms": ms(self.sum / self.count) if self.count else None,
+            "p50_ms": ms(_percentile(values, 50)),
+            "p99_ms": ms(_percentile(values, 99)),
+            "max_ms": ms(self.max) if self.count else None,
+        }
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stages = {}    # {단계: StageHistogram}
+        self.counters = {}  # {이름: 누적 횟수}
+        self.gauges = {}    # {이름: 현재 값}
+        self.sources = {}   # {이름: stats() 함수} - 다른 모듈의 통계를 JSON 에 같이 노출
+        self.started = time.time()
+
+    # -----------------------------------------------------------
+    # ✍️ 기록 (핫패스 - 락 구간 최소화)
+    # -----------------------------------------------------------
+    def observe(self, stage, seconds):
+        with self._lock:
+            hist = self.stages.get(stage)
+            if hist is None:
+                hist = self.stages[stage] = StageHistogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def inc(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def add_source(self, name, fn):
+        self.sources[name] = fn
+
+    # -----------------------------------------------------------
+    # 📤 조회 / 출력
+    # -----------------------------------------------------------
+    def snapshot(self):
+        with self._lock:
+            out = {
+                "time": time.time(),
+                "uptime_sec": round(time.time() - self.started, 1),
+                "stages": {name: hist.stats() for name, hist in self.stages.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+            }
+        for name, fn in list(self.sources.items()):
+            try:
+                out[name] = fn()
+            except Exception as e:
+                out[name] = {"error": str(e)}
+        return out
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식 (단계 히스토그램 + 카운터 + 게이지 + REST 호출 수)"""
+        lines = [f"# TYPE {PREFIX}_stage_seconds histogram"]
+        with self._lock:
+            for stage, hist in sorted(self.stages.items()):
+                cumulative = 0
+                for edge, n in zip(STAGE_BUCKETS, hist.buckets):
+                    cumulative += n
+                    lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{edge}"}} {cumulative}')
+                lines.append(f'{PREFIX}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'{PREFIX}_stage_seconds_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'{PREFIX}_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+            lines.append(f"# TYPE {PREFIX}_events_total counter")
+            for name, n in sorted(self.counters.items()):
+                lines.append(f'{PREFIX}_events_total{{event="{name}"}} {n}')
+            lines.append(f"# TYPE {PREFIX}_gauge gauge")
+            for name, value in sorted(self.gauges.items()):
+                lines.append(f'{PREFIX}_gauge{{name="{name}"}} {value}')
+
+        rest = self.sources.get("rest")
+        if rest is not None:
+            try:
+                endpoints = rest()["endpoints"]
+            except Exception:
+                endpoints = {}
+            # 메트릭 이름(family)마다 TYPE 줄 + 샘플을 연속으로 (섞이면 엄격한 파서가 거부)
+            for family, field in (("rest_calls_total", "calls"), ("rest_errors_total", "errors"),
+                                  ("rest_throttled_total", "throttled")):
+                lines.append(f"# TYPE {PREFIX}_{family} counter")
+                for name, ep in sorted(endpoints.items()):
+                    lines.append(f'{PREFIX}_{family}{{endpoint="{name}"}} {ep[field]}')
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path=None):
+        path = path or config.METRICS_JSON_FILE
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp, path)
+
+    # -----------------------------------------------------------
+    # 🔄 백그라운드 태스크
+    # -----------------------------------------------------------
+    async def monitor_loop_lag(self, interval=None):
+        """sleep(interval) 이 예정보다 늦게 깨어난 만큼 = 이벤트 루프가 막혀 있던 시간"""
+        interval = interval or config.METRICS_LAG_INTERVAL
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(time.perf_counter() - started - interval, 0.0)
+            self.observe("event_loop_lag", lag)
+            self.set_gauge("event_loop_lag_ms", round(lag * 1000, 2))
+
+    async def run_dump(self):
+        while True:
+            await asyncio.sleep(config.METRICS_DUMP_SEC)
+            try:
+                await asyncio.to_thread(self.dump_json)
+            except Exception as e:
+                print(f"⚠️ [Metrics] JSON 저장 실패: {e}")
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            path = request.decode("latin-1").split(" ")[1] if request.count(b" ") >= 2 else "/"
+            if path.startswith("/json"):
+                body = json.dumps(self.snapshot(), ensure_ascii=False, default=str).encode("utf-8")
+                ctype = "application/json; charset=utf-8"
+            else:
+                body = self.render_prometheus().encode("utf-8")
+                ctype = "text/plain; version=0.0.4; charset=utf-8"
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {ctype}\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, port=None, host=None):
+        port = port or config.METRICS_PORT
+        host = host or config.METRICS_HOST
+        server = await asyncio.start_server(self._handle, host, port)
+        print(f"📈 [Metrics] http://{host}:{port}/metrics (JSON: /json)")
+        return server
+
+    async def start(self):
+        """설정에 따라 지연 감시 / JSON 덤프 / HTTP 엔드포인트 시작"""
+        asyncio.create_task(self.monitor_loop_lag())
+        if config.METRICS_DUMP_SEC and config.METRICS_JSON_FILE:
+            asyncio.create_task(self.run_dump())
+        if config.METRICS_PORT:
+            try:
+                await self.serve()
+            except OSError as e:
+                print(f"⚠️ [Metrics] 엔드포인트 시작 실패: {e}")
+
+
+# -----------------------------------------------------------
+# 🌐 공용 인스턴스
+# -----------------------------------------------------------
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
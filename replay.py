@@ -0,0 +1,137 @@
+# replay.py
+# [NEW] 녹화 시세 리플레이 - 시뮬레이션 시계로 실제 매매 루프(TradingLoop)를 CPU 최대 속도로 재생
+#
+# 사용법: python replay.py [녹화파일 ...] --out replay_history.csv [--targets KRW-BTC,KRW-ETH] [--verbose]
+# - 녹화 데이터(data_feed/recorder.py)를 수신 시각 순서대로 DataAggregator 에 주입
+# - LOOP_DELAY 간격(시뮬레이션 시간)마다 TradingLoop.step() 실행 (모의투자 / REST·AI 호출 없음)
+# - 같은 입력이면 결과 매매 기록은 실행할 때마다 바이트 단위로 동일
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import time
+import config
+import clock
+from data_feed.recorder import iter_recordings, list_recordings, KIND_UPBIT
+
+
+async def run_replay(paths, out_file="replay_history.csv", warmup=3.0, verbose=False):
+    """
+    녹화 파일을 재생하고 요약 dict 리턴
+    :param warmup: 첫 레코드 이후 초기 자산을 잡기까지 기다릴 시뮬레이션 시간 (main 의 3초 동기화와 동일)
+    """
+    # 리플레이 전용 설정 (REST/녹화/실주문 차단)
+    config.IS_SIMULATION = True
+    config.OFFLINE_MODE = True
+    config.ENABLE_FEED_RECORDER = False
+
+    sim = clock.SimClock()
+    clock.set_clock(sim)
+
+    # main 은 설정 변경 후에 임포트 (AI/스캐너 모듈 초기화 영향 최소화)
+    from main import TradingLoop
+    from data_feed.aggregator import DataAggregator
+    from data_feed.macro_client import MacroClient
+    from strategy.signal_maker import SignalMaker
+    from execution.order_manager import OrderManager
+    from execution.risk_manager import RiskManager
+    from trade_logger import TradeLogger
+
+    db_file = os.path.splitext(out_file)[0] + ".db" # 리플레이 매매 기록 DB (CSV 옆)
+    for path in (out_file, db_file, db_file + "-wal", db_file + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    out = None if verbose else io.StringIO()
+    with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+        aggregator = DataAggregator()
+        aggregator._sync_targets(list(config.TARGET_COINS.keys()))
+        order_manager = OrderManager(aggregator.orderbooks)
+        logger = TradeLogger(out_file, db_path=db_file, csv_mirror=True)
+        loop = TradingLoop(
+            aggregator, SignalMaker(aggregator.candles), order_manager,
+            RiskManager(), MacroClient(), logger, ai_analyst=None
+        )
+
+        records = steps = 0
+        next_step = None
+        started = time.perf_counter()
+        first_ts = last_ts = None
+
+        for recv_ts, kind, payload in iter_recordings(paths):
+            if first_ts is None:
+                first_ts = recv_ts
+                sim.advance_to(recv_ts)
+                next_step = recv_ts + warmup
+
+            # 이 레코드 이전에 예정된 step 먼저 실행
+            while next_step is not None and recv_ts >= next_step:
+                sim.advance_to(next_step)
+                if steps == 0:
+                    loop.init_assets()
+                delay = await loop.step()
+                steps += 1
+                next_step = None if delay is None else next_step + delay
+            if next_step is None and steps:
+                break  # 서킷 브레이커 종료
+
+            sim.advance_to(recv_ts)
+            last_ts = recv_ts
+            records += 1
+            msg = json.loads(payload)
+            try:
+                if kind == KIND_UPBIT:
+                    aggregator.handle_upbit_message(msg, recv_ts)
+                elif 'stream' in msg:
+                    aggregator.handle_binance_message(msg, recv_ts)
+            except Exception as e:
+                print(f"⚠️ [Replay] 메시지 처리 오류: {e}")
+
+        elapsed = time.perf_counter() - started
+        final_assets = order_manager.get_total_assets(loop._current_prices())
+        logger.close() # 남은 기록 저장
+
+    span = (last_ts - first_ts) if first_ts is not None else 0.0
+    return {
+        "records": records,
+        "steps": steps,
+        "sim_seconds": round(span, 1),
+        "wall_seconds": round(elapsed, 3),
+        "speedup": round(span / elapsed, 1) if elapsed > 0 else None,
+        "initial_assets": loop.initial_total_assets,
+        "final_assets": final_assets,
+        "out_file": out_file,
+        "db_file": db_file,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="녹화 시세 리플레이 (모의투자)")
+    parser.add_argument("paths", nargs="*", help="녹화 파일 (생략 시 RECORDER_DIR 전체)")
+    parser.add_argument("--out", default="replay_history.csv", help="리플레이 매매 기록 파일")
+    parser.add_argument("--targets", default="", help="타겟 종목 (예: KRW-BTC,KRW-ETH). 생략 시 config 값")
+    parser.add_argument("--verbose", action="store_true", help="봇 출력 그대로 표시")
+    args = parser.parse_args()
+
+    if args.targets:
+        tickers = [t.strip() for t in args.targets.split(",") if t.strip()]
+        config.TARGET_COINS = {t: t.replace("KRW-", "").lower() + "usdt" for t in tickers}
+        config.FOLLOWER_COINS = [t for t in config.FOLLOWER_COINS if t in config.TARGET_COINS]
+
+    paths = args.paths or list_recordings()
+    if not paths:
+        print("⚠️ [Replay] 녹화 파일이 없습니다. (config.ENABLE_FEED_RECORDER 로 먼저 녹화)")
+        return
+
+    result = asyncio.run(run_replay(paths, args.out, verbose=args.verbose))
+    print(f"📼 [Replay] {len(paths)}개 파일 / 레코드 {result['records']:,}건 / step {result['steps']:,}회")
+    print(f"   ⏱️ 시뮬레이션 {result['sim_seconds']:,.0f}초 -> 실제 {result['wall_seconds']:.2f}초 (x{result['speedup']})")
+    print(f"   💰 자산 {result['initial_assets']:,.0f}원 -> {result['final_assets']:,.0f}원")
+    print(f"   📝 매매 기록: {result['out_file']}")
+
+
+if __name__ == "__main__":
+    main()
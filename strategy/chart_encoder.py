@@ -0,0 +1,44 @@
+# strategy/chart_encoder.py
+# [NEW] AI 프롬프트용 압축 차트 - 패딩된 전체 정밀도 표 대신 상대 변화(bp) + 거래량 배율 + 지표 요약
+#
+# 형식 (config.AI_CHART_FORMAT = "compact"):
+#   last=<종가> t=<시각> n=<봉 수>x1m
+#   ind RSI14=.. RSI9=.. BB_L/BB_M/BB_U/VWAP=<마지막 종가 대비 %>
+#   o,h,l,c,v  (o/h/l/c = 직전 봉 종가 대비 bp(0.01%), v = 평균 거래량 대비 x10)
+
+import numpy as np
+import config
+from strategy.indicators import TechnicalAnalyzer
+
+_analyzer = TechnicalAnalyzer()
+
+
+def _fmt(value, pct_of=None):
+    """지표 값 -> 문자열 (pct_of 가 있으면 그 가격 대비 %), 계산 불가면 na"""
+    if value is None or not np.isfinite(value): return "na"
+    if pct_of: return f"{(value / pct_of - 1) * 100:+.2f}%"
+    return f"{value:.1f}"
+
+
+def encode_chart(df, bars=None):
+    bars = bars or config.AI_CHART_BARS
+    ind = _analyzer.analyze_1m_candle(df)  # 지표는 받은 전체 구간으로 계산
+    last = float(df['close'].iloc[-1])
+
+    window = df.tail(bars + 1)
+    rows = window.iloc[1:]
+    ref = window['close'].to_numpy(dtype="float64")[:-1]
+    cols = [np.round((rows[c].to_numpy(dtype="float64") / ref - 1) * 10000).astype(int) for c in ('open', 'high', 'low', 'close')]
+    volume = rows['volume'].to_numpy(dtype="float64")
+    avg = volume.mean() if len(volume) else 0.0
+    cols.append(np.round(volume / avg * 10).astype(int) if avg > 0 else np.zeros(len(volume), dtype=int))
+
+    lines = [
+        f"last={last:g} t={rows.index[-1]:%H:%M} n={len(rows)}x1m",
+        f"ind RSI14={_fmt(ind['RSI_14'])} RSI9={_fmt(ind['RSI_9'])} "
+        f"BB_L={_fmt(ind['BB_Lower'], last)} BB_M={_fmt(ind['BB_Mid'], last)} BB_U={_fmt(ind['BB_Upper'], last)} "
+        f"VWAP={_fmt(ind['VWAP'], last)} (vs last)",
+        "o,h,l,c=bp vs prev close; v=vol/avg*10; oldest->newest",
+    ]
+    lines.extend(",".join(str(v) for v in row) for row in zip(*cols))
+    return "\n".join(lines)
@@ -1,15 +1,46 @@
 # strategy/signal_maker.py
 # [업데이트] main.py에서 보유 코인 분석을 위해 호출할 함수 추가
 
-import pyupbit
+from data_feed.rest_client import get_client
 from strategy.indicators import TechnicalAnalyzer
+from strategy.streaming_indicators import StreamingIndicators
 from strategy.calculator import TickCalculator
 import config
+from metrics import get_metrics
 
 class SignalMaker:
-    def __init__(self):
+    def __init__(self, candle_store=None):
         self.analyzer = TechnicalAnalyzer()
         self.calculator = TickCalculator()
+        # ✅ [신규] 웹소켓 기반 로컬 1분봉 저장소 (없거나 준비 전이면 REST 사용)
+        self.candle_store = candle_store
+        # ✅ [신규] 종목별 증분 지표 엔진 (캔들 갱신분만 O(1) 반영)
+        self.engines = {}
+
+    def _analyze(self, ticker):
+        """로컬 저장소가 준비된 종목은 증분 엔진, 아니면 REST + pandas 전체 계산"""
+        metrics = get_metrics()
+        store = self.candle_store
+        if store is not None and store.is_ready(ticker):
+            engine = self.engines.get(ticker)
+            if engine is None:
+                engine = self.engines[ticker] = StreamingIndicators(store.maxlen)
+            with metrics.timer("signal_indicators"):
+                return engine.sync(store.get_rows(ticker), store.generation.get(ticker))
+
+        with metrics.timer("signal_fetch"):
+            df = self._get_ohlcv(ticker)
+        if df is None: return None
+        with metrics.timer("signal_indicators"):
+            return self.analyzer.analyze_1m_candle(df)
+
+    def _get_ohlcv(self, ticker):
+        """로컬 캔들 저장소 우선 조회 -> 준비 안 된 종목만 REST 호출"""
+        if self.candle_store is not None:
+            df = self.candle_store.get_ohlcv(ticker, config.OHLCV_COUNT)
+            if df is not None: return df
+        if config.OFFLINE_MODE: return None
+        return get_client().get_ohlcv(ticker, interval=config.OHLCV_INTERVAL, count=config.OHLCV_COUNT)
 
     def get_analysis_only(self, ticker):
         """
@@ -17,12 +48,8 @@ class SignalMaker:
         (보유 중인 코인의 매도 판단용)
         """
         try:
-            df = pyupbit.get_ohlcv(ticker, interval=config.OHLCV_INTERVAL, count=config.OHLCV_COUNT)
-            if df is None: return None
-            
             # 지표 계산
-            analysis = self.analyzer.analyze_1m_candle(df)
-            return analysis
+            return self._analyze(ticker)
         except:
             return None
 
@@ -42,14 +69,12 @@ class SignalMaker:
         if ticks_to_bep > config.MAX_TICKS_FOR_BEP:
             return False, f"틱 효율 나쁨(본전까지 {ticks_to_bep}틱 필요)", None # None 추가
 
-        # 3. 데이터 수집
+        # 3. 데이터 수집 + 4. 지표 분석
         try:
-            df = pyupbit.get_ohlcv(ticker, interval=config.OHLCV_INTERVAL, count=config.OHLCV_COUNT)
-            if df is None: return False, "데이터 없음", None # None 추가
+            analysis = self._analyze(ticker)
+            if analysis is None: return False, "데이터 없음", None # None 추가
         except: return False, "API 오류", None # None 추가
 
-        # 4. 지표 분석
-        analysis = self.analyzer.analyze_1m_candle(df)
         rsi_14 = analysis['RSI_14']
         rsi_9 = analysis['RSI_9']
         is_bb_touch = analysis['is_oversold']
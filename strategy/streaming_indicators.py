@@ -0,0 +1,267 @@
+# strategy/streaming_indicators.py
+# [NEW] 종목별 상태 유지형 지표 엔진 - 새 캔들/갱신 캔들마다 RSI, BB, VWAP를 O(1)로 업데이트
+# (TechnicalAnalyzer.analyze_1m_candle 과 같은 dict 를 리턴)
+
+import math
+from collections import deque
+import config
+
+_NAN = float('nan')
+
+
+class _RollingRSI:
+    """단순이동평균(SMA) 방식 RSI - indicators.calculate_rsi 와 같은 정의"""
+    def __init__(self, period):
+        self.period = period
+        self.deltas = deque(maxlen=period)
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.gain_cnt = 0   # 0이 아닌 값 개수 (부동소수 잔여오차 방지용)
+        self.loss_cnt = 0
+
+    def _add(self, delta):
+        if len(self.deltas) == self.period:
+            self._remove(self.deltas[0])
+            self.deltas.popleft()
+        self.deltas.append(delta)
+        if delta > 0:
+            self.gain_sum += delta
+            self.gain_cnt += 1
+        elif delta < 0:
+            self.loss_sum -= delta
+            self.loss_cnt += 1
+
+    def _remove(self, delta):
+        if delta > 0:
+            self.gain_sum -= delta
+            self.gain_cnt -= 1
+        elif delta < 0:
+            self.loss_sum += delta
+            self.loss_cnt -= 1
+        if self.gain_cnt == 0: self.gain_sum = 0.0
+        if self.loss_cnt == 0: self.loss_sum = 0.0
+
+    def push(self, delta):
+        self._add(delta)
+
+    def replace_last(self, delta):
+        self._remove(self.deltas.pop())
+        self.deltas.append(delta)
+        if delta > 0:
+            self.gain_sum += delta
+            self.gain_cnt += 1
+        elif delta < 0:
+            self.loss_sum -= delta
+            self.loss_cnt += 1
+
+    def resync(self):
+        self.gain_sum = sum(d for d in self.deltas if d > 0)
+        self.loss_sum = -sum(d for d in self.deltas if d < 0)
+
+    def value(self):
+        if len(self.deltas) < self.period:
+            return _NAN
+        if self.loss_sum == 0:
+            return _NAN if self.gain_sum == 0 else 100.0
+        rs = self.gain_sum / self.loss_sum
+        return 100 - (100 / (1 + rs))
+
+
+class StreamingIndicators:
+    """
+    종목 1개 전용 지표 상태
+    - RSI(14), RSI(9): 최근 N개 종가 변화량의 누적합
+    - 볼린저밴드: 최근 20개 종가의 합/제곱합 (기준값 K를 빼서 정밀도 유지)
+    - VWAP: 최근 window(=OHLCV_COUNT)개 캔들의 (TP*V), V 누적합
+    """
+    RESYNC_EVERY = 500  # 누적 오차 정리 주기 (신규 캔들 수)
+
+    def __init__(self, window=None):
+        self.window = window or config.OHLCV_COUNT
+        self.bb_period = config.BB_PERIOD
+        self.bb_std = config.BB_STD_DEV
+        self.reset()
+
+    def reset(self):
+        self.candles = deque()  # (ts, high, low, close, volume)
+        self.rsi_long = _RollingRSI(config.RSI_LONG_PERIOD)
+        self.rsi_short = _RollingRSI(config.RSI_SHORT_PERIOD)
+        self.bb_closes = deque(maxlen=self.bb_period)
+        self.bb_ref = None
+        self.bb_sum = 0.0
+        self.bb_sq = 0.0
+        self.pv_sum = 0.0
+        self.v_sum = 0.0
+        self.generation = None
+        self._since_resync = 0
+
+    # -----------------------------------------------------------
+    # 🔄 캔들 반영
+    # -----------------------------------------------------------
+    def update(self, ts, high, low, close, volume):
+        """
+        캔들 1개 반영 (O(1))
+        - 마지막 캔들과 같은 ts -> 진행 중인 캔들 갱신
+        - 더 최근 ts -> 새 캔들 추가
+        """
+        if self.candles and ts == self.candles[-1][0]:
+            self._replace_last(ts, high, low, close, volume)
+        elif not self.candles or ts > self.candles[-1][0]:
+            self._append(ts, high, low, close, volume)
+
+    def _append(self, ts, high, low, close, volume):
+        prev_close = self.candles[-1][3] if self.candles else None
+        if len(self.candles) == self.window:
+            old = self.candles.popleft()
+            self.pv_sum -= (old[1] + old[2] + old[3]) / 3 * old[4]
+            self.v_sum -= old[4]
+        self.candles.append((ts, high, low, close, volume))
+
+        # 첫 캔들의 변화량은 NaN -> pandas where() 에서 0으로 처리되므로 동일하게 0
+        delta = close - prev_close if prev_close is not None else 0.0
+        self.rsi_long.push(delta)
+        self.rsi_short.push(delta)
+
+        if self.bb_ref is None:
+            self.bb_ref = close
+        if len(self.bb_closes) == self.bb_period:
+            d = self.bb_closes[0] - self.bb_ref
+            self.bb_sum -= d
+            self.bb_sq -= d * d
+        self.bb_closes.append(close)
+        d = close - self.bb_ref
+        self.bb_sum += d
+        self.bb_sq += d * d
+
+        self.pv_sum += (high + low + close) / 3 * volume
+        self.v_sum += volume
+
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_EVERY:
+            self.resync()
+
+    def _replace_last(self, ts, high, low, close, volume):
+        old = self.candles[-1]
+        self.candles[-1] = (ts, high, low, close, volume)
+
+        prev_close = self.candles[-2][3] if len(self.candles) > 1 else None
+        delta = close - prev_close if prev_close is not None else 0.0
+        self.rsi_long.replace_last(delta)
+        self.rsi_short.replace_last(delta)
+
+        d_old = self.bb_closes[-1] - self.bb_ref
+        d_new = close - self.bb_ref
+        self.bb_closes[-1] = close
+        self.bb_sum += d_new - d_old
+        self.bb_sq += d_new * d_new - d_old * d_old
+
+        self.pv_sum += (high + low + close) / 3 * volume - (old[1] + old[2] + old[3]) / 3 * old[4]
+        self.v_sum += volume - old[4]
+
+    def resync(self):
+        """누적합을 현재 버퍼로부터 다시 계산 (부동소수 오차 제거, O(window))"""
+        self.rsi_long.resync()
+        self.rsi_short.resync()
+        if self.bb_closes:
+            self.bb_ref = self.bb_closes[-1]
+            diffs = [c - self.bb_ref for c in self.bb_closes]
+            self.bb_sum = sum(diffs)
+            self.bb_sq = sum(d * d for d in diffs)
+        self.pv_sum = sum((h + l + c) / 3 * v for _, h, l, c, v in self.candles)
+        self.v_sum = sum(v for *_, v in self.candles)
+        self._since_resync = 0
+
+    def sync(self, rows, generation=None):
+        """
+        CandleStore 의 캔들 deque 와 동기화 후 분석 결과 리턴
+        (보통 마지막 1~2개 캔들만 반영하므로 O(1))
+        :param rows: [ts, open, high, low, close, volume, value] 리스트의 deque
+        :param generation: 저장소 재시딩 번호 (바뀌면 처음부터 재구성)
+        """
+        if not rows:
+            return None
+        if generation != self.generation or not self.candles or rows[0][0] > self.candles[-1][0]:
+            self.reset()
+            self.generation = generation
+            for r in rows:
+                self.update(r[0], r[2], r[3], r[4], r[5])
+            return self.result()
+
+        last_ts = self.candles[-1][0]
+        pending = []
+        for r in reversed(rows):
+            if r[0] < last_ts: break
+            pending.append(r)
+        for r in reversed(pending):
+            self.update(r[0], r[2], r[3], r[4], r[5])
+        return self.result()
+
+    # -----------------------------------------------------------
+    # 📊 결과 (analyze_1m_candle 과 동일한 모양)
+    # -----------------------------------------------------------
+    def result(self):
+        if not self.candles:
+            return None
+        close = self.candles[-1][3]
+        rsi_14 = self.rsi_long.value()
+        rsi_9 = self.rsi_short.value()
+
+        n = len(self.bb_closes)
+        if n == self.bb_period and n > 1:
+            mean_d = self.bb_sum / n
+            var = max((self.bb_sq - self.bb_sum * mean_d) / (n - 1), 0.0)
+            std = math.sqrt(var)
+            bb_mid = self.bb_ref + mean_d
+            bb_upper = bb_mid + std * self.bb_std
+            bb_lower = bb_mid - std * self.bb_std
+        else:
+            bb_mid = bb_upper = bb_lower = _NAN
+
+        vwap = self.pv_sum / self.v_sum if self.v_sum > 0 else _NAN
+
+        return {
+            "current_price": close,
+            "RSI_14": round(rsi_14, 2),
+            "RSI_9": round(rsi_9, 2),
+            "BB_Upper": round(bb_upper, 2),
+            "BB_Mid": round(bb_mid, 2),
+            "BB_Lower": round(bb_lower, 2),
+            "VWAP": round(vwap, 2),
+            "is_oversold": close <= bb_lower,  # 볼밴 하단 터치
+            "is_rsi_low": rsi_14 < 30
+        }
+
+
+if __name__ == "__main__":
+    # 패리티 점검: 랜덤 캔들을 흘려보내며 pandas 버전(analyze_1m_candle)과 비교
+    import random
+    import pandas as pd
+    from strategy.indicators import TechnicalAnalyzer
+
+    random.seed(7)
+    analyzer = TechnicalAnalyzer()
+    engine = StreamingIndicators()
+    rows, price, mismatch = [], 130_000.0, 0
+
+    for i in range(1000):
+        ts = 1_700_000_000 + (i // 3) * 60  # 캔들마다 3번씩 갱신
+        price = max(price + random.choice([-50, 0, 50]) * random.randint(0, 3), 1000)
+        vol = random.random() * 10
+        if rows and rows[-1][0] == ts:
+            r = rows[-1]
+            r[2], r[3], r[4], r[5] = max(r[2], price), min(r[3], price), price, r[5] + vol
+        else:
+            rows.append([ts, price, price, price, price, vol, 0.0])
+        rows = rows[-config.OHLCV_COUNT:]
+
+        fast = engine.sync(rows)
+        df = pd.DataFrame([r[1:6] for r in rows], columns=['open', 'high', 'low', 'close', 'volume'])
+        slow = analyzer.analyze_1m_candle(df)
+        for k, v in slow.items():
+            a, b = fast[k], v
+            if isinstance(a, float) and math.isnan(a) and pd.isna(b): continue
+            if a != b and not (isinstance(a, float) and abs(a - b) <= 0.011):
+                mismatch += 1
+                print(f"[{i}] {k}: stream={a} pandas={b}")
+
+    print("✅ 패리티 OK" if mismatch == 0 else f"❌ 불일치 {mismatch}건")
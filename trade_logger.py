@@ -1,15 +1,83 @@
+# trade_logger.py
+# [업데이트] 백그라운드 기록 - 매매 루프는 큐에 넣기만 하고, 별도 스레드가 모아서 한 번에 저장
+# - 저장소: SQLite(WAL) 타입 그대로 저장 (가격/수익률 float, 지표 dict 전체, 주문 uuid, 체결 지연)
+# - CSV: 기존 trade_history.csv 형식 미러(TRADE_LOG_CSV_MIRROR) + export_csv 로 언제든 내보내기
+
+import argparse
+import atexit
 import csv
+import json
 import os
-from datetime import datetime
+import queue
+import sqlite3
+import threading
+import clock
+import config
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts TEXT NOT NULL,
+    epoch REAL NOT NULL,
+    ticker TEXT NOT NULL,
+    action TEXT NOT NULL,
+    price REAL NOT NULL,
+    profit_rate REAL,
+    reason TEXT,
+    rsi REAL,
+    vwap REAL,
+    analysis TEXT,
+    order_uuid TEXT,
+    order_state TEXT,
+    fill_ms REAL
+);
+CREATE INDEX IF NOT EXISTS idx_trades_ticker_epoch ON trades (ticker, epoch);
+CREATE INDEX IF NOT EXISTS idx_trades_action_epoch ON trades (action, epoch);
+"""
+FIELDS = ["ts", "epoch", "ticker", "action", "price", "profit_rate", "reason",
+          "rsi", "vwap", "analysis", "order_uuid", "order_state", "fill_ms"]
+
+_STOP = object()
+
+
+def _json_default(value):
+    """numpy 스칼라/bool 등 json 기본 타입이 아닌 지표 값"""
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _csv_row(record):
+    """기존 trade_history.csv 형식 (천 단위 콤마 / % 문자열)"""
+    profit = record["profit_rate"]
+    return [
+        record["ts"],
+        record["ticker"],
+        record["action"],
+        f"{record['price']:,.0f}",
+        f"{record['rsi'] or 0:.1f}",
+        f"{record['vwap'] or 0:,.0f}",
+        f"{profit:.2f}%" if profit else "",
+        record["reason"],
+    ]
+
 
 class TradeLogger:
-    def __init__(self, filename="trade_history.csv"):
+    def __init__(self, filename="trade_history.csv", db_path=None, csv_mirror=None):
         self.filename = filename
+        self.db_path = config.TRADE_DB_FILE if db_path is None else db_path
+        self.csv_mirror = config.TRADE_LOG_CSV_MIRROR if csv_mirror is None else csv_mirror
         self.columns = [
-            "Timestamp", "Ticker", "Action", "Price", 
+            "Timestamp", "Ticker", "Action", "Price",
             "RSI", "VWAP", "Profit_Rate", "Reason"
         ]
-        self._initialize_csv()
+        if self.csv_mirror:
+            self._initialize_csv()
+
+        self.queue = queue.Queue()
+        self.written = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._writer, name="trade-logger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
 
     def _initialize_csv(self):
         """파일이 없으면 헤더(제목)를 생성"""
@@ -18,32 +86,154 @@ class TradeLogger:
                 writer = csv.writer(file)
                 writer.writerow(self.columns)
 
-    def log(self, ticker, action, price, analysis=None, profit_rate=0.0, reason=""):
+    def log(self, ticker, action, price, analysis=None, profit_rate=0.0, reason="", order_info=None, fill_ms=None):
         """
-        매매 기록 저장
+        매매 기록 (큐에 넣고 바로 리턴)
         :param analysis: signal_maker에서 받은 지표 딕셔너리 (RSI, VWAP 등 포함)
+        :param order_info: 체결된 주문 정보 (uuid/state 저장)
+        :param fill_ms: 매매 판단 ~ 체결 확인까지 걸린 시간 (ms)
         """
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        # 지표 데이터가 없는 경우(API 에러 등) 대비
-        rsi = analysis['RSI_14'] if analysis else 0
-        vwap = analysis['VWAP'] if analysis else 0
-
-        row = [
-            now, 
-            ticker, 
-            action, 
-            f"{price:,.0f}", 
-            f"{rsi:.1f}", 
-            f"{vwap:,.0f}", 
-            f"{profit_rate:.2f}%" if profit_rate else "", 
-            reason
-        ]
+        order_info = order_info if isinstance(order_info, dict) else {}
+        record = {
+            "ts": clock.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "epoch": clock.time(),
+            "ticker": ticker,
+            "action": action,
+            "price": float(price),
+            "profit_rate": None if action.startswith("BUY") else float(profit_rate),
+            "reason": reason,
+            # 지표 데이터가 없는 경우(API 에러 등) 대비
+            "rsi": float(analysis['RSI_14']) if analysis else None,
+            "vwap": float(analysis['VWAP']) if analysis else None,
+            "analysis": json.dumps(analysis, default=_json_default, ensure_ascii=False) if analysis else None,
+            "order_uuid": order_info.get("uuid"),
+            "order_state": order_info.get("state"),
+            "fill_ms": fill_ms,
+        }
+        self.queue.put(record)
+        print(f"📝 [Logger] 기록 대기열 추가: {action} {ticker}") # 저장 완료는 _write_batch 가 출력
 
-        try:
-            with open(self.filename, mode='a', newline='', encoding='utf-8-sig') as file:
-                writer = csv.writer(file)
-                writer.writerow(row)
-            print(f"📝 [Logger] 기록 저장 완료: {action} {ticker}")
-        except Exception as e:
-            print(f"⚠️ [Logger] 저장 실패: {e}")
\ No newline at end of file
+    # -----------------------------------------------------------
+    # ✍️ 백그라운드 기록 스레드
+    # -----------------------------------------------------------
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _writer(self):
+        conn = None
+        if self.db_path:
+            try:
+                conn = self._connect()
+                conn.executescript(_SCHEMA)
+            except Exception as e:
+                print(f"⚠️ [Logger] DB 열기 실패: {e}")
+                conn = None
+
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            # 쌓인 기록을 모아서 한 번에 (최대 TRADE_LOG_BATCH 건, TRADE_LOG_FLUSH_SEC 동안)
+            while len(batch) < config.TRADE_LOG_BATCH:
+                try:
+                    batch.append(self.queue.get(timeout=config.TRADE_LOG_FLUSH_SEC))
+                except queue.Empty:
+                    break
+            stop = any(r is _STOP for r in batch)
+            records = [r for r in batch if r is not _STOP]
+            if records:
+                self._write_batch(conn, records)
+            for _ in batch:
+                self.queue.task_done()
+        if conn is not None:
+            conn.close()
+
+    def _write_batch(self, conn, records):
+        saved = False
+        if conn is not None:
+            try:
+                with conn:
+                    conn.executemany(
+                        f"INSERT INTO trades ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})",
+                        [[r[f] for f in FIELDS] for r in records],
+                    )
+                saved = True
+            except Exception as e:
+                print(f"⚠️ [Logger] DB 저장 실패: {e}")
+        if self.csv_mirror:
+            try:
+                with open(self.filename, mode='a', newline='', encoding='utf-8-sig') as file:
+                    csv.writer(file).writerows(_csv_row(r) for r in records)
+                saved = True
+            except Exception as e:
+                print(f"⚠️ [Logger] 저장 실패: {e}")
+        if not saved: return
+        self.written += len(records)
+        self.batches += 1
+        print(f"📝 [Logger] 기록 저장 완료: {', '.join(r['action'] + ' ' + r['ticker'] for r in records)}")
+
+    def flush(self):
+        """지금까지 넣은 기록이 모두 저장될 때까지 대기"""
+        self.queue.join()
+
+    def close(self):
+        if not self._thread.is_alive(): return
+        self.queue.put(_STOP)
+        self._thread.join()
+
+    # -----------------------------------------------------------
+    # 🔎 조회 / 내보내기 (읽기 전용 연결 - WAL 이라 기록 중에도 가능)
+    # -----------------------------------------------------------
+    def query(self, ticker=None, action=None, since=None):
+        """
+        :param since: epoch 초 (이후 기록만)
+        Return: [{필드: 값}] 시간순 (analysis 는 dict 로 복원)
+        """
+        return load_trades(self.db_path, ticker, action, since)
+
+    def export_csv(self, path, since=None):
+        return export_csv(self.db_path, path, since)
+
+
+def load_trades(db_path, ticker=None, action=None, since=None):
+    conds, params = [], []
+    if ticker: conds.append("ticker = ?"); params.append(ticker)
+    if action: conds.append("action = ?"); params.append(action)
+    if since is not None: conds.append("epoch >= ?"); params.append(since)
+    sql = f"SELECT {', '.join(FIELDS)} FROM trades"
+    if conds: sql += " WHERE " + " AND ".join(conds)
+    sql += " ORDER BY epoch, id"
+
+    conn = sqlite3.connect(db_path, timeout=10)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    records = [dict(zip(FIELDS, row)) for row in rows]
+    for r in records:
+        r["analysis"] = json.loads(r["analysis"]) if r["analysis"] else None
+        # SQLite 는 NaN 을 NULL 로 저장 -> 지표 원본(analysis)에서 복원
+        if r["analysis"]:
+            if r["rsi"] is None: r["rsi"] = float(r["analysis"].get("RSI_14", "nan"))
+            if r["vwap"] is None: r["vwap"] = float(r["analysis"].get("VWAP", "nan"))
+    return records
+
+
+def export_csv(db_path, path, since=None):
+    """DB -> 기존 trade_history.csv 형식. Return: 내보낸 건수"""
+    records = load_trades(db_path, since=since)
+    with open(path, mode='w', newline='', encoding='utf-8-sig') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Timestamp", "Ticker", "Action", "Price", "RSI", "VWAP", "Profit_Rate", "Reason"])
+        writer.writerows(_csv_row(r) for r in records)
+    return len(records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="매매 기록 DB -> CSV 내보내기")
+    parser.add_argument("out", help="저장할 CSV 파일")
+    parser.add_argument("--db", default=config.TRADE_DB_FILE)
+    args = parser.parse_args()
+    print(f"📤 {export_csv(args.db, args.out)}건 -> {args.out}")
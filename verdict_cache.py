@@ -0,0 +1,139 @@
+# verdict_cache.py
+# [NEW] AI 차트 판정 캐시 - (종목 + 차트 가격대 지문) 이 같으면 AI 위원회를 다시 부르지 않음
+# TTL 만료 + LRU(OrderedDict) 제한 + 적중/실패 카운터 + JSON 파일 저장 (재시작 후에도 유지)
+# 재사용은 REJECT 판정만 - 비슷한 가격대라도 다른 차트를 새 검증 없이 매수하지 않도록
+
+import json
+import math
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import clock
+import config
+
+
+def chart_fingerprint(df, count=None, step_pct=None):
+    """
+    AI 에 보내는 차트의 가격대 지문 ("고가:저가:종가" 눈금 번호)
+    - 진행 중인 마지막 캔들은 체결마다 바뀌므로 제외하고 완성된 캔들만 사용
+    - 정확한 값 대신 구간 고가/저가/마지막 종가를 step_pct(%) 로그 눈금으로 양자화
+      -> 거부 후 쿨다운(180초) 동안 캔들이 몇 개 더 닫혀도 가격대가 그대로면 같은 지문
+      (시간 범위는 AI_VERDICT_TTL 로 제한)
+    - 대략적인 지문이므로 REJECT 판정만 재사용 (APPROVE 는 매번 새로 검증 - VerdictCache.put 참고)
+    :param count: AI 에 보내는 봉 수 (기본 AI_CHART_BARS)
+    """
+    window = df.tail(count or config.AI_CHART_BARS).iloc[:-1]
+    if window.empty: return ""
+    step = math.log1p((step_pct or config.AI_VERDICT_PRICE_STEP_PCT) / 100)
+    levels = (window['high'].max(), window['low'].min(), window['close'].iloc[-1])
+    return ":".join(str(math.floor(math.log(float(v)) / step)) for v in levels)
+
+
+class VerdictCache:
+    def __init__(self, ttl=None, capacity=None, path=None):
+        self.ttl = config.AI_VERDICT_TTL if ttl is None else ttl
+        self.capacity = capacity or config.AI_VERDICT_CACHE_SIZE
+        self.path = config.AI_VERDICT_CACHE_FILE if path is None else path
+        self.entries = OrderedDict()  # {"ticker:지문": {"verdict", "expires"}} (오래 안 쓴 순)
+        self._lock = threading.Lock()  # 이벤트 모드에서 여러 종목 검증 스레드가 동시에 get/put
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.load()
+
+    @staticmethod
+    def key(ticker, fingerprint):
+        return f"{ticker}:{fingerprint}"
+
+    def get(self, ticker, fingerprint):
+        """유효한 판정 리턴 (없거나 만료면 None)"""
+        k = self.key(ticker, fingerprint)
+        with self._lock:
+            entry = self.entries.get(k)
+            if entry is not None and (entry['expires'] <= clock.time() or entry['verdict'].get('decision') != "REJECT"):
+                del self.entries[k]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(k)
+            self.hits += 1
+            return entry['verdict']
+
+    def put(self, ticker, fingerprint, verdict):
+        """REJECT 판정만 저장 (APPROVE 를 재사용하면 모양이 다른 차트도 검증 없이 매수될 수 있음)"""
+        if verdict.get('decision') != "REJECT": return
+        k = self.key(ticker, fingerprint)
+        with self._lock:
+            self.entries[k] = {"verdict": verdict, "expires": clock.time() + self.ttl}
+            self.entries.move_to_end(k)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        self.save()
+
+    # -----------------------------------------------------------
+    # 💾 파일 저장 / 불러오기
+    # -----------------------------------------------------------
+    def save(self):
+        if not self.path: return
+        # 저장은 한 번에 하나씩 (복사 -> 기록 -> 교체 순서 보장, 오래된 복사본이 새 파일을 덮지 않음)
+        with self._save_lock:
+            with self._lock:
+                items = list(self.entries.items())  # 복사본을 기록 (기록 중 다른 스레드의 put 과 무관)
+            tmp = None
+            try:
+                # 임시 파일 이름은 매번 새로 (다른 프로세스/인스턴스와도 겹치지 않음)
+                fd, tmp = tempfile.mkstemp(prefix=os.path.basename(self.path) + ".", suffix=".tmp",
+                                           dir=os.path.dirname(os.path.abspath(self.path)))
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(items, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+                tmp = None
+            except Exception as e:
+                print(f"⚠️ [VerdictCache] 저장 실패: {e}")
+            finally:
+                if tmp and os.path.exists(tmp): os.remove(tmp)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path): return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            now = clock.time()
+            for k, entry in items:
+                if entry['expires'] > now:
+                    self.entries[k] = entry
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+        except Exception as e:
+            print(f"⚠️ [VerdictCache] 불러오기 실패: {e}")
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round(self.hits / total * 100, 1) if total else 0.0,
+        }
+
+
+if __name__ == "__main__":
+    # 점검: 거부 후 쿨다운 동안 1분봉 3개가 더 닫혀도 같은 차트면 캐시 적중
+    import numpy as np
+    import pandas as pd
+    idx = pd.date_range("2026-01-01 09:00", periods=64, freq="1min")
+    close = 100000 + np.sin(np.arange(64) / 3) * 50
+    df = pd.DataFrame({"open": close, "high": close + 20, "low": close - 20, "close": close, "volume": 1.0}, index=idx)
+    cache = VerdictCache(path="")
+    cache.put("KRW-BTC", chart_fingerprint(df.iloc[:61]), {"decision": "REJECT", "reason": "test"})
+    assert cache.get("KRW-BTC", chart_fingerprint(df)) is not None, "쿨다운 후 같은 차트 미적중"
+    moved = df.assign(close=df["close"] * 1.02, high=df["high"] * 1.02)
+    assert cache.get("KRW-BTC", chart_fingerprint(moved)) is None, "가격대가 바뀐 차트가 적중"
+    cache.put("KRW-ETH", chart_fingerprint(df), {"decision": "APPROVE", "reason": "test"})
+    assert cache.get("KRW-ETH", chart_fingerprint(df)) is None, "APPROVE 판정이 재사용됨"
+    print(f"✅ [VerdictCache] 점검 통과 {cache.stats()}")